@@ -0,0 +1,12 @@
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.role import (
+    ROLE_ARGUMENTS,
+    RoleModule,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.plugin_utils.action import (
+    ControllerAction,
+)
+
+
+class ActionModule(ControllerAction):
+    MODULE_CLASS = RoleModule
+    ARGUMENT_SPEC = ROLE_ARGUMENTS
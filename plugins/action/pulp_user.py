@@ -0,0 +1,13 @@
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.user import (
+    PASSWORD_ARGUMENTS,
+    USER_ARGUMENTS,
+    UserModule,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.plugin_utils.action import (
+    ControllerAction,
+)
+
+
+class ActionModule(ControllerAction):
+    MODULE_CLASS = UserModule
+    ARGUMENT_SPEC = dict(**USER_ARGUMENTS, **PASSWORD_ARGUMENTS)
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2021, Red Hat, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = """
+---
+name: pulp_summary
+type: aggregate
+short_description: Summarize requests made to Pulp during a playbook run
+description:
+- Collects timings returned by modules in this collection and, at the end of
+  a playbook run, displays a summary of requests made to Pulp by endpoint,
+  request latency percentiles, the slowest roles and users, and the number
+  of resources changed.
+- Only tasks run with C(timings=true) return timings, e.g. set for all modules
+  in this collection via C(module_defaults).
+- The summary may also be written to a file, as JSON or OpenMetrics text.
+requirements:
+- Enable this callback, e.g. via C(callbacks_enabled) in C(ansible.cfg).
+version_added: 0.4.0
+author: Rohan McGovern (@rohanpm)
+options:
+    output_file:
+        type: path
+        description:
+        - If set, the summary is also written to this file.
+        env:
+        - name: PULP2_API_SUMMARY_FILE
+        ini:
+        - section: callback_pulp_summary
+          key: output_file
+
+    output_format:
+        type: str
+        default: json
+        choices:
+        - json
+        - openmetrics
+        description:
+        - Format of the summary written to C(output_file).
+        env:
+        - name: PULP2_API_SUMMARY_FORMAT
+        ini:
+        - section: callback_pulp_summary
+          key: output_format
+"""
+
+import json
+import math
+
+from ansible.plugins.callback import CallbackBase
+
+# Modules whose results are summarized, and the parameter identifying the
+# resource managed by each task. For bulk modules, the parameter holding
+# all items.
+MODULE_RESOURCES = {
+    "pulp_role": "id",
+    "pulp_user": "login",
+    "pulp_roles": "roles",
+    "pulp_users": "users",
+}
+
+# Number of resources listed as the slowest.
+SLOWEST_COUNT = 10
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    # Returns the given percentile of values, by the nearest-rank method.
+    values = sorted(values)
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def latency_stats(latencies):
+    out = dict(count=len(latencies), seconds=sum(latencies))
+    for pct in PERCENTILES:
+        out[f"p{pct}"] = percentile(latencies, pct)
+    return out
+
+
+def label_value(value):
+    # Escapes a label value for OpenMetrics text.
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**kwargs):
+    return ",".join(f'{key}="{label_value(value)}"' for (key, value) in kwargs.items())
+
+
+class Summary:
+    """Aggregates timings from the results of many tasks."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.resources = []
+        self.changed = {}
+
+    def add_result(self, module, args, result):
+        resource_param = MODULE_RESOURCES[module]
+        items = result.get(resource_param)
+
+        # Changed counts are by resource, so each item of a bulk module counts
+        # separately.
+        counts = self.changed.setdefault(module, dict(resources=0, changed=0))
+        if isinstance(items, list):
+            counts["resources"] += len(items)
+            counts["changed"] += sum(1 for item in items if item.get("changed"))
+        else:
+            counts["resources"] += 1
+            counts["changed"] += 1 if result.get("changed") else 0
+
+        timings = result.get("timings")
+        if not timings:
+            return
+
+        for request in timings["requests"]:
+            endpoint = f"{request['method']} {request['path']}"
+            self.latencies.setdefault(endpoint, []).append(request["seconds"])
+
+        resource = args.get(resource_param)
+        if isinstance(resource, list):
+            resource = f"{len(resource)} {resource_param}"
+        self.resources.append(
+            dict(
+                module=module,
+                resource=resource,
+                seconds=timings["total_seconds"],
+                requests=len(timings["requests"]),
+            )
+        )
+
+    def summary(self):
+        all_latencies = [
+            latency for latencies in self.latencies.values() for latency in latencies
+        ]
+        slowest = sorted(self.resources, key=lambda r: r["seconds"], reverse=True)
+
+        return dict(
+            requests=latency_stats(all_latencies),
+            endpoints={
+                endpoint: latency_stats(latencies)
+                for (endpoint, latencies) in sorted(self.latencies.items())
+            },
+            slowest=slowest[:SLOWEST_COUNT],
+            changed=self.changed,
+        )
+
+    def table(self):
+        # Returns lines of a human-readable summary.
+        summary = self.summary()
+
+        def ms(seconds):
+            return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+        rows = [("ENDPOINT", "COUNT", "TOTAL", "P50", "P95", "P99")]
+        for (endpoint, stats) in list(summary["endpoints"].items()) + [
+            ("all requests", summary["requests"])
+        ]:
+            rows.append(
+                (endpoint, str(stats["count"]), ms(stats["seconds"]))
+                + tuple(ms(stats[f"p{pct}"]) for pct in PERCENTILES)
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = [
+            "  ".join(
+                [row[0].ljust(widths[0])]
+                + [cell.rjust(width) for (cell, width) in zip(row[1:], widths[1:])]
+            )
+            for row in rows
+        ]
+
+        if summary["slowest"]:
+            lines.append("")
+            lines.append("Slowest tasks:")
+            for entry in summary["slowest"]:
+                lines.append(
+                    f"  {ms(entry['seconds']):>8}  {entry['module']} {entry['resource']}"
+                    f" ({entry['requests']} requests)"
+                )
+
+        lines.append("")
+        lines.append("Changed:")
+        for (module, counts) in sorted(summary["changed"].items()):
+            lines.append(
+                f"  {module}: {counts['changed']} of {counts['resources']} resource(s)"
+            )
+
+        return lines
+
+    def openmetrics(self):
+        # Returns the summary as OpenMetrics text.
+        summary = self.summary()
+        lines = [
+            "# TYPE pulp2_api_request_seconds summary",
+            "# UNIT pulp2_api_request_seconds seconds",
+            "# HELP pulp2_api_request_seconds Latency of requests to Pulp.",
+        ]
+        for (endpoint, stats) in summary["endpoints"].items():
+            (method, path) = endpoint.split(" ", 1)
+            for pct in PERCENTILES:
+                lines.append(
+                    f"pulp2_api_request_seconds{{"
+                    f"{labels(method=method, path=path, quantile=pct / 100)}}} "
+                    f"{stats[f'p{pct}']}"
+                )
+            lines.append(
+                f"pulp2_api_request_seconds_count{{{labels(method=method, path=path)}}} "
+                f"{stats['count']}"
+            )
+            lines.append(
+                f"pulp2_api_request_seconds_sum{{{labels(method=method, path=path)}}} "
+                f"{stats['seconds']}"
+            )
+
+        lines.extend(
+            [
+                "# TYPE pulp2_api_resources gauge",
+                "# HELP pulp2_api_resources Resources managed, by whether changed.",
+            ]
+        )
+        for (module, counts) in sorted(summary["changed"].items()):
+            changed = counts["changed"]
+            unchanged = counts["resources"] - changed
+            lines.append(
+                f"pulp2_api_resources{{{labels(module=module, changed='true')}}} "
+                f"{changed}"
+            )
+            lines.append(
+                f"pulp2_api_resources{{{labels(module=module, changed='false')}}} "
+                f"{unchanged}"
+            )
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "release_engineering.pulp2_api.pulp_summary"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.summary = Summary()
+
+    def add_result(self, result):
+        module = result._task.action.split(".")[-1]
+        if module not in MODULE_RESOURCES:
+            return
+
+        # The result of a looped task only gathers the results of its items,
+        # which have already been added as each item completed.
+        if "results" in result._result:
+            return
+
+        # The task's args may refer to a loop's item (e.g. "{{ item }}"), so
+        # args as the module received them are used where available.
+        invocation = result._result.get("invocation") or {}
+        args = invocation.get("module_args") or result._task.args
+        self.summary.add_result(module, args, result._result)
+
+    def v2_runner_on_ok(self, result):
+        self.add_result(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.add_result(result)
+
+    def v2_runner_item_on_ok(self, result):
+        self.add_result(result)
+
+    def v2_runner_item_on_failed(self, result):
+        self.add_result(result)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.summary.changed:
+            return
+
+        self._display.banner("PULP SUMMARY")
+        for line in self.summary.table():
+            self._display.display(line)
+
+        output_file = self.get_option("output_file")
+        if output_file:
+            if self.get_option("output_format") == "openmetrics":
+                content = self.summary.openmetrics()
+            else:
+                content = json.dumps(self.summary.summary(), indent=2) + "\n"
+
+            with open(output_file, "w") as f:
+                f.write(content)
@@ -11,6 +11,77 @@ options:
         - Base URL of the Pulp service.
         - Should include trailing "/pulp/api/v2" component if applicable.
         - 'Example: https://pulp.example.com/pulp/api/v2'
+        - >
+            When using the C(release_engineering.pulp2_api.pulp2) httpapi plugin,
+            only the path component of this URL is used; requests are sent
+            over the persistent connection.
+
+    persistent_connections:
+        type: bool
+        description:
+        - If true, HTTP/1.1 keep-alive connections are reused for all requests
+          made during the task, rather than opening a new connection per request.
+        - >
+            If unset, this is enabled for tasks which may make many requests
+            concurrently, i.e. C(pulp_users), C(pulp_roles) and C(pulp_role) with
+            C(parallelism) greater than 1, unless a proxy is configured for
+            C(pulp_url) in the environment.
+        - >
+            Concurrent requests are only effective with this option enabled.
+            Otherwise, most of the time spent per request is in setting up TLS,
+            which can't be done in parallel.
+        - Connection reuse statistics are returned in C(connection_stats).
+        - >
+            For HTTPS, a single SSL context is used for all requests, so the
+            client certificate and key are only loaded once. TLS sessions are
+            resumed when new connections are needed. TLS handshake statistics
+            are returned in C(tls_stats).
+        - Proxies are not supported when this option is enabled.
+
+    cache_ttl:
+        type: int
+        default: 0
+        description:
+        - If greater than 0, resources fetched from Pulp are cached for up to
+          this many seconds, and the cache is shared by all tasks on the same host
+          using the same credentials.
+        - Cached resources are invalidated when modified by any module in this
+          collection. Changes made to Pulp by other means are not detected
+          until the cached data expires.
+        - >
+            The cache is stored under C(~/.ansible/tmp/pulp2_api_cache), or under
+            the directory set in the C(PULP2_API_CACHE_DIR) environment variable.
+
+    max_retries:
+        type: int
+        default: 3
+        description:
+        - Maximum number of times a request is retried when Pulp appears to be
+          overloaded.
+        - >
+            Requests are retried on status 429 or 503, honoring any
+            C(Retry-After) header, or with exponential backoff otherwise.
+            GET, PUT and DELETE requests are also retried on status 502 or 504
+            or on connection errors.
+        - >
+            Regardless of this option, the number of concurrent requests made to
+            Pulp adapts to its responses; concurrency is reduced when Pulp
+            appears to be overloaded, and stops growing while Pulp responds
+            slowly.
+
+    timings:
+        type: bool
+        default: false
+        description:
+        - If true, timings of the task are returned in C(timings).
+        - >
+            C(timings.requests) records the method, path (with identifiers replaced
+            by placeholders), status, response size and latency of every request
+            made to Pulp. C(timings.request_summary) totals these by method and path.
+        - >
+            C(timings.phases) records the time spent in each phase of the task,
+            such as C(get), C(diff) and C(writes). Where a phase runs
+            concurrently, the time spent by each thread is summed.
 
     validate_certs:
         type: bool
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2021, Red Hat, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = """
+---
+name: pulp2
+short_description: HttpApi plugin for Pulp 2.x
+description:
+- Allows modules in this collection to make all requests over a persistent
+  HTTP session to a Pulp 2.x server, shared by all tasks in a play.
+- Requires the C(ansible.netcommon) collection.
+- 'Use with C(ansible_connection: ansible.netcommon.httpapi) and
+  C(ansible_network_os: release_engineering.pulp2_api.pulp2).'
+- >
+    The connection's C(ansible_host), C(ansible_httpapi_port),
+    C(ansible_httpapi_use_ssl), C(ansible_user), C(ansible_httpapi_password) and
+    related variables determine the server and credentials for all requests.
+    Only the path component of each module's C(pulp_url) is used.
+version_added: 0.4.0
+author: Rohan McGovern (@rohanpm)
+"""
+
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible_collections.ansible.netcommon.plugins.plugin_utils.httpapi_base import (
+    HttpApiBase,
+)
+
+
+class HttpApi(HttpApiBase):
+    def handle_httperror(self, exc):
+        # Unexpected statuses are handled by the calling module, so just
+        # pass the error response back as-is.
+        #
+        # 401 is passed through too; we don't implement any login flow,
+        # since Pulp accepts basic auth or client certs on every request.
+        return exc
+
+    def send_request(self, path, method="GET", data=None, headers=None):
+        """Perform a request over the persistent connection.
+
+        Returns a (status, body) tuple, where body is the response body as text.
+        """
+        (response, response_data) = self.connection.send(
+            path, data, method=method, headers=headers or {}
+        )
+
+        if isinstance(response, HTTPError):
+            status = response.code
+        else:
+            status = response.getcode()
+
+        return (status, response_data.getvalue().decode("utf-8", errors="replace"))
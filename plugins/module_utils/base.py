@@ -1,15 +1,70 @@
 #!/usr/bin/python3
 import contextlib
+import email.utils
+import io
 import json
 import logging
 import os
+import reprlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
 
-from ansible.module_utils import urls
+from ansible.module_utils import connection, urls
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.cache import (
+    ResourceCache,
+    default_cache_dir,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.limiter import (
+    AdaptiveLimiter,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.pool import (
+    ConnectionPool,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.profiling import (
+    Profiler,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.stream import (
+    iter_json_array,
+    load_json,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.timing import (
+    Timings,
+    path_template,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.tracing import (
+    SPAN_KIND_CLIENT,
+    Tracer,
+)
 
 LOG = logging.getLogger("release_engineering.pulp2_api")
 
+# Resources can be very large (e.g. roles with many permissions), so the size
+# of logged values is capped.
+LOG_REPR = reprlib.Repr()
+LOG_REPR.maxlevel = 3
+LOG_REPR.maxdict = 10
+LOG_REPR.maxlist = 10
+LOG_REPR.maxstring = 80
+LOG_REPR.maxother = 80
+
+# Statuses meaning that Pulp didn't handle a request since it's overloaded,
+# so the request may be retried regardless of method.
+RETRY_STATUSES = (429, 503)
+
+# Statuses meaning that a request may or may not have been handled, so the
+# request is only retried if it's safe to repeat.
+RETRY_IDEMPOTENT_STATUSES = (-1, 502, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+# Delay before the first retry if Pulp doesn't provide one, doubled for each
+# subsequent retry.
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
 MODULES = {}
 
 URL_ARGUMENTS = dict(
@@ -26,29 +81,378 @@ URL_ARGUMENTS = dict(
 
 COMMON_ARGUMENTS = dict(
     pulp_url=dict(required=True, type="str"),
+    persistent_connections=dict(type="bool"),
+    cache_ttl=dict(type="int", default=0),
+    max_retries=dict(type="int", default=3),
+    timings=dict(type="bool", default=False),
     **URL_ARGUMENTS,
 )
 
 
+class LogValue:
+    """Wraps a value to be logged, formatting it lazily with capped size."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return LOG_REPR.repr(self.value)
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats log records as JSON objects, for logs with one record per line."""
+
+    # Attributes which may be set on records via 'extra' and are included in
+    # the output as-is.
+    EXTRA_FIELDS = ("request",)
+
+    def format(self, record):
+        out = dict(
+            time=record.created,
+            level=record.levelname,
+            logger=record.name,
+            thread=record.threadName,
+            msg=record.getMessage(),
+        )
+        for field in self.EXTRA_FIELDS:
+            if hasattr(record, field):
+                out[field] = getattr(record, field)
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+class RequestError(Exception):
+    """Raised when Pulp responds to a request with an unexpected status."""
+
+    def __init__(self, url, status):
+        super().__init__(f"unexpected status {status} from URL {url}")
+        self.url = url
+        self.status = status
+
+
+def pem_file(content):
+    # Returns (file, path) for a file holding the given content, which exists
+    # until the file is closed.
+    #
+    # Where possible, the file is created in anonymous memory, so that e.g.
+    # private keys are never written to disk. Otherwise, a temporary file is
+    # used.
+    if hasattr(os, "memfd_create") and os.path.isdir("/proc/self/fd"):
+        try:
+            fd = os.memfd_create("pulp2_api", os.MFD_CLOEXEC)
+        except OSError as error:
+            LOG.debug("Can't use memfd: %s", error)
+        else:
+            file = os.fdopen(fd, "wb")
+            file.write(content)
+            file.flush()
+            return (file, f"/proc/self/fd/{fd}")
+
+    tempfile = NamedTemporaryFile(suffix="pulp2_api")
+    tempfile.write(content)
+    tempfile.flush()
+    return (tempfile, tempfile.name)
+
+
+def response_size(response, info):
+    # Returns the size in bytes of a response body, if known.
+    if hasattr(response, "getbuffer"):
+        return response.getbuffer().nbytes
+    try:
+        return int(info["content-length"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def uses_proxy(url):
+    # Whether requests to url would be sent via a proxy configured in the
+    # environment (as respected by module_utils.urls).
+    parsed = urlsplit(url)
+    return parsed.scheme in getproxies() and not proxy_bypass(parsed.hostname or "")
+
+
+def is_overloaded(status):
+    # Whether a response status suggests that Pulp is overloaded.
+    return isinstance(status, int) and (status in (-1, 429) or status >= 500)
+
+
+def retry_delay(info, attempt):
+    # Returns the delay in seconds before retrying a request, honoring any
+    # Retry-After header in the response.
+    delay = RETRY_DELAY * 2**attempt
+
+    retry_after = info.get("retry-after")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(retry_after)
+                delay = when.timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+
+    return min(max(delay, 0), MAX_RETRY_DELAY)
+
+
 class BaseModule:
     """A base class for modules in this collection."""
 
     def __init__(self, module=None):
         self.module = module or AnsibleModule({})
         self.changed = False
+        self.parent = None
+        self.pool = None
+        self.snapshot = None
+        self.cache = None
+        self.limiter = None
+        self.timings = None
+        self.profiler = None
+        self.tracer = None
+        self.result = {}
+
+    @property
+    def root(self):
+        # The module owning state shared by all requests in this run.
+        # For items of a bulk module, this is the bulk module.
+        return self.parent.root if self.parent else self
+
+    def run_stats(self):
+        # Statistics of this run, returned along with the module's result.
+        out = {}
+        if self.pool:
+            out["connection_stats"] = dict(self.pool.stats)
+            if self.pool.tls_stats["handshakes"]:
+                out["tls_stats"] = dict(self.pool.tls_stats)
+        if self.timings:
+            out["timings"] = self.timings.summary()
+        return out
 
     def exit_ok(self, **kwargs):
         changed = kwargs.pop("changed", self.changed)
-        return self.module.exit_json(changed=changed, **kwargs)
+        out = self.run_stats()
+        out.update(self.result)
+        out.update(kwargs)
+        return self.module.exit_json(changed=changed, **out)
+
+    def phase(self, name):
+        # A context manager timing a phase of this run, if timings are enabled.
+        timings = self.root.timings
+        return timings.phase(name) if timings else contextlib.nullcontext()
+
+    @property
+    def resource_id(self):
+        # Identifier of the resource managed by this module, if any.
+        return None
+
+    @property
+    def many_requests(self):
+        # Whether this module may make many requests, e.g. concurrently, such
+        # that it benefits from a pool of persistent connections.
+        return False
+
+    def in_thread(self, fn):
+        # Wraps fn for calls in a new thread, so it's profiled if enabled.
+        profiler = self.root.profiler
+        return profiler.wrap(fn) if profiler else fn
 
     def api_url(self, rest):
         return os.path.join(self.module.params["pulp_url"], rest)
 
-    def get_resource(self, rest):
+    @property
+    def socket_path(self):
+        # Path to the socket of a persistent connection (i.e. the pulp2 httpapi
+        # plugin), if the module is being run with one.
+        return getattr(self.root.module, "_socket_path", None)
+
+    def fetch_url(self, url, method, **kwargs):
+        # Performs a request, recorded as a span if tracing is enabled.
+        tracer = self.root.tracer
+        if not tracer:
+            return self.fetch_url_retrying(url, method, **kwargs)
+
+        path = self.request_path(url)
+        with tracer.span(f"{method} {path}", SPAN_KIND_CLIENT) as span:
+            # Lets Pulp's logs of the request be correlated with the span.
+            headers = dict(kwargs.get("headers") or {}, traceparent=span.traceparent)
+            kwargs["headers"] = headers
+
+            (response, info) = self.fetch_url_retrying(url, method, **kwargs)
+
+            status = info["status"]
+            span.attributes.update(
+                {
+                    "http.request.method": method,
+                    "url.template": path,
+                    "server.address": urlsplit(url).hostname,
+                    "http.response.status_code": status,
+                    "http.response.body.size": response_size(response, info),
+                }
+            )
+            span.error = not isinstance(status, int) or status < 0 or status >= 400
+
+        return (response, info)
+
+    def fetch_url_retrying(self, url, method, **kwargs):
+        # Performs a request, limiting concurrency according to the load on
+        # Pulp and retrying if Pulp is overloaded.
+        limiter = self.root.limiter
+        max_retries = self.root.module.params.get("max_retries") or 0
+        attempt = 0
+
+        while True:
+            with limiter.slot() if limiter else contextlib.nullcontext():
+                start = time.monotonic()
+                (response, info) = self.fetch_url_once(url, method, **kwargs)
+                latency = time.monotonic() - start
+
+            status = info["status"]
+            self.record_request(url, method, response, info, latency, attempt)
+            if not is_overloaded(status):
+                if limiter:
+                    limiter.succeeded(latency)
+                return (response, info)
+
+            retry = attempt < max_retries and (
+                status in RETRY_STATUSES
+                or (
+                    status in RETRY_IDEMPOTENT_STATUSES
+                    and method.upper() in IDEMPOTENT_METHODS
+                )
+            )
+            delay = retry_delay(info, attempt) if retry else 0
+
+            if limiter:
+                limiter.overloaded(delay)
+
+            if not retry:
+                return (response, info)
+
+            attempt += 1
+            LOG.warning(
+                "%s %s => %s, retrying in %.1fs (attempt %s of %s)",
+                method,
+                url,
+                status,
+                delay,
+                attempt,
+                max_retries,
+            )
+            if not limiter:
+                time.sleep(delay)
+
+    def request_path(self, url):
+        # Path of a request relative to pulp_url, with identifiers replaced
+        # by placeholders.
+        pulp_url = self.module.params["pulp_url"]
+        rest = url[len(pulp_url) :] if url.startswith(pulp_url) else url
+        return path_template(rest.lstrip("/"))
+
+    def record_request(self, url, method, response, info, latency, attempt):
+        # Logs a structured record of a request, and adds it to timings.
+        record = dict(
+            method=method,
+            path=self.request_path(url),
+            status=info["status"],
+            bytes=response_size(response, info),
+            seconds=round(latency, 6),
+            attempt=attempt,
+        )
+
+        LOG.info(
+            "%s %s => %s in %.3fs",
+            method,
+            record["path"],
+            record["status"],
+            latency,
+            extra=dict(request=record),
+        )
+
+        timings = self.root.timings
+        if timings:
+            timings.add_request(record)
+
+    def fetch_url_once(self, url, method, module=None, **kwargs):
+        # If module is given, its params are used for this request in place of
+        # this module's, e.g. to authenticate as another user. The persistent
+        # connection authenticates on its own terms, so isn't used then.
+        if self.socket_path and module is None:
+            return self.fetch_url_persistent(url, method, **kwargs)
+
+        pool = self.root.pool
+        if pool:
+            params = module.params if module else None
+            return pool.fetch_url(url, method=method, params=params, **kwargs)
+        return urls.fetch_url(module or self.module, url=url, method=method, **kwargs)
+
+    def fetch_url_persistent(self, url, method, data=None, headers=None):
+        # As fetch_url, but sending the request through the persistent
+        # connection. The connection determines the scheme, host and port,
+        # so only the path from the URL is passed along.
+        parsed = urlsplit(url)
+        path = parsed.path
+        if parsed.query:
+            path += "?" + parsed.query
+
+        try:
+            (status, body) = connection.Connection(self.socket_path).send_request(
+                path, method=method, data=data, headers=headers
+            )
+        except connection.ConnectionError as error:
+            LOG.warning("Request to %s failed: %s", url, error)
+            return (None, dict(status=-1, msg=f"Request failed: {error}", url=url))
+
+        return (io.BytesIO(body.encode("utf-8")), dict(status=status, url=url))
+
+    def run_concurrently(self, fn, args, max_workers=1):
+        """Call fn(arg) for each arg, with up to max_workers calls in progress.
+
+        Unlike a plain loop, a RequestError raised by one call does not prevent
+        the other calls from proceeding. Returns a list of (arg, error) for each
+        call which raised a RequestError, in the same order as args.
+        """
+
+        def call(arg):
+            try:
+                fn(arg)
+            except RequestError as error:
+                return error
+
+        if max_workers <= 1 or len(args) <= 1:
+            results = [call(arg) for arg in args]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self.in_thread(call), args))
+
+        return [(arg, error) for (arg, error) in zip(args, results) if error]
+
+    def get_resource(self, rest, fields=None):
+        """Returns the resource at the given path, or None if it doesn't exist.
+
+        If fields is provided, the returned resource may hold only those
+        fields. The response is then parsed incrementally and the values of
+        other fields are skipped without being decoded.
+        """
+        snapshot = self.root.snapshot
+        if snapshot:
+            (found, data) = snapshot.lookup(rest)
+            if found:
+                LOG.info("%s => %s (from snapshot)", rest, LogValue(data))
+                return data
+
         url = self.api_url(rest)
+
+        cache = self.root.cache
+        if cache:
+            (found, data) = cache.get(url, fields)
+            if found:
+                LOG.info("%s => %s (from cache)", url, LogValue(data))
+                return data
+
         LOG.info("Fetching %s", url)
 
-        (response, info) = urls.fetch_url(self.module, url=url, method="GET")
+        (response, info) = self.fetch_url(url, method="GET")
 
         status_code = info["status"]
 
@@ -57,28 +461,95 @@ class BaseModule:
             return None
 
         if status_code == 200:
-            data = json.load(response)
-            LOG.info("%s => %s", url, data)
+            if fields is None or isinstance(response, io.BytesIO):
+                # A response already held in memory (e.g. read by the connection
+                # pool) is decoded at once, which is much faster than decoding
+                # it incrementally.
+                data = json.load(response)
+                if fields is not None and isinstance(data, dict):
+                    data = {key: data[key] for key in fields if key in data}
+            else:
+                data = load_json(response, fields)
+            LOG.info("%s => %s", url, LogValue(data))
+            if cache:
+                cache.put(url, data, fields)
             return data
 
         raw_data = response.read() if response else "<no response object>"
-        LOG.warning("Unexpected response: %s, %s", info, raw_data)
+        LOG.warning("Unexpected response: %s, %s", info, LogValue(raw_data))
+
+        raise RequestError(url, status_code)
+
+    def iter_resources(self, rest, criteria=None):
+        """Yield each resource from a list endpoint, e.g. "roles/".
+
+        If criteria is provided, it's POSTed as Pulp search criteria to a
+        search endpoint instead, e.g. "roles/search/".
 
-        self.module.fail_json(msg=f"unexpected status {status_code} from URL {url}")
+        The response is parsed incrementally, so the entire response is never
+        held in memory at once. This makes it suitable for large collections.
+        """
+        url = self.api_url(rest)
+
+        if criteria is None:
+            LOG.info("Fetching list %s", url)
+            (response, info) = self.fetch_url(url, method="GET")
+        else:
+            LOG.info("Searching %s: %s", url, LogValue(criteria))
+            (response, info) = self.fetch_url(
+                url,
+                method="POST",
+                data=json.dumps(dict(criteria=criteria)),
+                headers={"Content-Type": "application/json"},
+            )
+
+        status_code = info["status"]
+
+        if status_code != 200:
+            raw_data = response.read() if response else "<no response object>"
+            LOG.warning("Unexpected response: %s, %s", info, LogValue(raw_data))
+            raise RequestError(url, status_code)
+
+        count = 0
+        for resource in iter_json_array(response):
+            count += 1
+            yield resource
+
+        LOG.info("%s => %s item(s)", url, count)
+
+    def invalidate_cache(self, rest):
+        # Drop any cached data for a resource which may have been modified,
+        # along with all parents of that resource (since e.g. a list of
+        # users is modified when a user is modified).
+        cache = self.root.cache
+        if not cache:
+            return
+
+        parts = rest.strip("/").split("/")
+        cache.invalidate(
+            [self.api_url("/".join(parts[:i]) + "/") for i in range(len(parts), 0, -1)]
+        )
 
     def update_resource(self, rest, body, method="POST"):
         url = self.api_url(rest)
         LOG.info("%s %s", method, url)
 
+        # The cache is invalidated both before and after the request, since
+        # another task may cache the resource while the request is in flight.
+        self.invalidate_cache(rest)
+
         body_json = json.dumps(body)
 
-        (response, info) = urls.fetch_url(
-            self.module,
-            url=url,
-            method=method,
-            data=body_json,
-            headers={"Content-Type": "application/json"},
-        )
+        try:
+            with self.phase("writes"):
+                (response, info) = self.fetch_url(
+                    url,
+                    method=method,
+                    data=body_json,
+                    headers={"Content-Type": "application/json"},
+                )
+        finally:
+            self.invalidate_cache(rest)
 
         status_code = info["status"]
         LOG.info("%s => %s", url, status_code)
@@ -87,19 +558,22 @@ class BaseModule:
             return
 
         raw_data = response.read() if response else "<no response object>"
-        LOG.warning("Unexpected response: %s, %s", info, raw_data)
+        LOG.warning("Unexpected response: %s, %s", info, LogValue(raw_data))
 
-        self.module.fail_json(msg=f"unexpected status {status_code} from URL {url}")
+        raise RequestError(url, status_code)
 
     def delete_resource(self, rest):
         url = self.api_url(rest)
         LOG.info("DELETE %s", url)
 
-        (response, info) = urls.fetch_url(
-            self.module,
-            url=url,
-            method="DELETE",
-        )
+        # As in update_resource.
+        self.invalidate_cache(rest)
+
+        try:
+            with self.phase("writes"):
+                (response, info) = self.fetch_url(url, method="DELETE")
+        finally:
+            self.invalidate_cache(rest)
 
         status_code = info["status"]
         LOG.info("%s => %s", url, status_code)
@@ -108,18 +582,58 @@ class BaseModule:
             return
 
         raw_data = response.read() if response else "<no response object>"
-        LOG.warning("Unexpected response: %s, %s", info, raw_data)
+        LOG.warning("Unexpected response: %s, %s", info, LogValue(raw_data))
 
-        self.module.fail_json(msg=f"unexpected status {status_code} from URL {url}")
+        raise RequestError(url, status_code)
 
     def run(self):
         if os.environ.get("PULP2_API_LOG"):
-            logging.basicConfig(
-                level=logging.INFO, filename=os.environ["PULP2_API_LOG"]
+            handler = logging.FileHandler(os.environ["PULP2_API_LOG"], delay=True)
+            handler.setFormatter(JSONFormatter())
+            logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+        if self.module.params.get("timings"):
+            self.timings = Timings()
+
+        profile_dir = os.environ.get("PULP2_API_PROFILE")
+        tracemalloc_dir = os.environ.get("PULP2_API_TRACEMALLOC")
+        if profile_dir or tracemalloc_dir:
+            self.profiler = Profiler(profile_dir, tracemalloc_dir)
+
+        if os.environ.get("PULP2_API_TRACE"):
+            self.tracer = Tracer(
+                os.environ["PULP2_API_TRACE"], os.environ.get("TRACEPARENT")
             )
 
-        with self.pem_files():
-            self.run_module()
+        self.setup_cache()
+        self.limiter = AdaptiveLimiter()
+
+        with contextlib.ExitStack() as stack:
+            if self.tracer:
+                # The root span, parent of a span for each request.
+                span = stack.enter_context(self.tracer.span(type(self).__name__))
+                span.attributes["pulp2_api.resource_id"] = self.resource_id
+                stack.callback(
+                    lambda: span.attributes.update({"pulp2_api.changed": self.changed})
+                )
+
+            with self.phase("pem_files"):
+                stack.enter_context(self.pem_files())
+            stack.enter_context(self.connection_pool())
+
+            if self.profiler:
+                # Profiles are named by module and resource.
+                name = type(self).__name__
+                if self.resource_id is not None:
+                    name += f"-{self.resource_id}"
+                stack.enter_context(self.profiler.profile(name))
+
+            try:
+                self.run_module()
+            except RequestError as error:
+                self.module.fail_json(
+                    msg=str(error), changed=self.changed, **self.run_stats()
+                )
 
         # run_module can exit early if it wants. If it completes without exiting
         # or raising, we take it as a success.
@@ -128,6 +642,53 @@ class BaseModule:
     def run_module(self):
         raise NotImplementedError()
 
+    def setup_cache(self):
+        # Set up a cache of resources shared between tasks, if enabled.
+        ttl = self.module.params.get("cache_ttl")
+        if ttl and ttl > 0:
+            directory = os.environ.get("PULP2_API_CACHE_DIR") or default_cache_dir()
+            self.cache = ResourceCache(directory, ttl, identity=self.identity())
+
+    def identity(self):
+        # Identifies the credentials used for requests, so that cached data is
+        # only used by tasks authenticating in the same way.
+        params = self.module.params
+        return json.dumps(
+            [self.socket_path]
+            + [
+                params.get(key)
+                for key in ("url_username", "url_password", "client_cert", "client_key")
+            ]
+        )
+
+    @contextlib.contextmanager
+    def connection_pool(self):
+        # A context manager to set up a pool of persistent connections for use
+        # by all requests during this run, if enabled.
+        #
+        # Must be entered after pem_files, since the pool loads client_cert and
+        # client_key from files.
+        enabled = self.module.params.get("persistent_connections")
+        if enabled is None:
+            # By default, the pool is used whenever many requests are made,
+            # e.g. concurrently. module_utils.urls builds a new SSL context for
+            # every request, which is slow and holds the GIL, so requests in
+            # threads would otherwise barely run in parallel. The pool doesn't
+            # support proxies, so isn't used by default if one is configured.
+            enabled = self.many_requests and not uses_proxy(
+                self.module.params["pulp_url"]
+            )
+
+        if not enabled:
+            yield
+            return
+
+        self.pool = ConnectionPool(self.module.params)
+        try:
+            yield
+        finally:
+            self.pool.close()
+
     @contextlib.contextmanager
     def pem_files(self):
         # A context manager to convert 'client_cert', 'client_key' parameters
@@ -156,15 +717,13 @@ class BaseModule:
             if "-----BEGIN" not in value:
                 continue
 
-            tempfile = NamedTemporaryFile(suffix="pulp2_api")
-            tempfile.write(value.encode("utf8") + b"\n")
-            tempfile.flush()
-            files.append(tempfile)
+            (file, path) = pem_file(value.encode("utf8") + b"\n")
+            files.append(file)
 
-            LOG.debug("%s serialized to %s", param, tempfile.name)
+            LOG.debug("%s serialized to %s", param, path)
 
             old_params[param] = self.module.params[param]
-            self.module.params[param] = tempfile.name
+            self.module.params[param] = path
 
         try:
             yield
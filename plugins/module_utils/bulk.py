@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+    LOG,
+    BaseModule,
+    RequestError,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.snapshot import (
+    Snapshot,
+)
+
+BULK_ARGUMENTS = dict(
+    max_workers=dict(type="int", default=8),
+)
+
+
+class ItemExit(Exception):
+    """Raised by ItemModule in place of exiting the process."""
+
+    def __init__(self, result):
+        super().__init__(result.get("msg"))
+        self.result = result
+
+
+class ItemModule:
+    """A stand-in for AnsibleModule used to process one item of a bulk module.
+
+    Only the attributes needed by BaseModule and module_utils.urls are provided.
+    exit_json and fail_json raise ItemExit rather than exiting the process, which
+    allows many items to be processed concurrently within a single module run.
+    """
+
+    def __init__(self, params, check_mode=False, tmpdir=None):
+        self.params = params
+        self.check_mode = check_mode
+        self.tmpdir = tmpdir
+
+    def exit_json(self, **kwargs):
+        raise ItemExit(kwargs)
+
+    def fail_json(self, **kwargs):
+        kwargs["failed"] = True
+        raise ItemExit(kwargs)
+
+
+class BulkModule(BaseModule):
+    """A base class for modules which apply an item module to a list of items.
+
+    Subclasses must set:
+
+    ITEM_CLASS: a BaseModule subclass implementing the logic for a single item.
+    ITEMS_PARAM: name of the module parameter holding the list of items.
+    ITEM_KEY: name of the item parameter identifying each item.
+
+    Subclasses may set:
+
+    ITEM_RESULT_KEYS: keys of an item's result to be included in its outcome,
+    in addition to the standard keys.
+
+    When processing at least SNAPSHOT_THRESHOLD items, the current state of
+    all items is fetched with a single request rather than one request per item.
+    """
+
+    ITEM_CLASS = None
+    ITEMS_PARAM = None
+    ITEM_KEY = None
+    ITEM_RESULT_KEYS = ()
+    SNAPSHOT_THRESHOLD = 20
+
+    @property
+    def max_workers(self):
+        return max(self.module.params["max_workers"], 1)
+
+    @property
+    def many_requests(self):
+        return True
+
+    def item_module(self, item):
+        # Each item inherits pulp_url and HTTP-related arguments from this module.
+        params = {key: self.module.params.get(key) for key in COMMON_ARGUMENTS}
+        params.update(item)
+
+        return ItemModule(
+            params, check_mode=self.module.check_mode, tmpdir=self.module.tmpdir
+        )
+
+    def run_item(self, module):
+        item = self.ITEM_CLASS(module)
+        item.parent = self
+        key = module.params[self.ITEM_KEY]
+
+        try:
+            item.run_module()
+            item.exit_ok()
+        except ItemExit as item_exit:
+            result = item_exit.result
+        except RequestError as error:
+            result = dict(failed=True, msg=str(error), changed=item.changed)
+
+        LOG.info("%s %s => %s", self.ITEMS_PARAM, key, result)
+
+        outcome = {
+            self.ITEM_KEY: key,
+            "changed": result.get("changed", False),
+            "failed": result.get("failed", False),
+            "msg": result.get("msg", ""),
+        }
+        for result_key in self.ITEM_RESULT_KEYS:
+            if result_key in result:
+                outcome[result_key] = result[result_key]
+
+        return outcome
+
+    def run_module(self):
+        # Build all item modules up front in the main thread, since e.g. tmpdir
+        # is lazily created.
+        modules = [
+            self.item_module(item) for item in self.module.params[self.ITEMS_PARAM]
+        ]
+
+        if len(modules) >= self.SNAPSHOT_THRESHOLD:
+            self.snapshot = Snapshot()
+            self.snapshot.load(self, self.ITEMS_PARAM)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.in_thread(self.run_item), modules))
+
+        self.changed = any(result["changed"] for result in results)
+        failed = [result for result in results if result["failed"]]
+
+        if failed:
+            self.module.fail_json(
+                msg=f"{len(failed)} of {len(results)} {self.ITEMS_PARAM} failed",
+                changed=self.changed,
+                **self.run_stats(),
+                **{self.ITEMS_PARAM: results},
+            )
+
+        self.exit_ok(**{self.ITEMS_PARAM: results})
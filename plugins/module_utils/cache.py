@@ -0,0 +1,134 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from tempfile import NamedTemporaryFile
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+
+def default_cache_dir():
+    # Use the same directory as ansible's local tmp, by default.
+    tmp = os.environ.get("ANSIBLE_LOCAL_TEMP") or "~/.ansible/tmp"
+    return os.path.join(os.path.expanduser(tmp), "pulp2_api_cache")
+
+
+def digest(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class ResourceCache:
+    """A cache of Pulp resources, persisted to files in a directory.
+
+    Entries are keyed by URL and by identity, which should identify the
+    credentials used to fetch resources, since Pulp may permit different
+    users to read different resources. Entries expire after a TTL. Once the
+    cache holds more than max_entries, the least recently used entries are
+    evicted. Invalidating a URL removes its entries for every identity.
+
+    Each entry is held in its own file, named after hashes of its URL and
+    identity and replaced atomically when written, so the cache may be shared safely by
+    concurrent processes (e.g. ansible forks) and threads without locking.
+    The time an entry was last used is recorded as its file's mtime, so that
+    reading an entry doesn't rewrite it.
+    """
+
+    def __init__(self, directory, ttl, max_entries=1000, identity=""):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.identity = digest(identity)
+
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def path(self, url):
+        return os.path.join(self.directory, f"{digest(url)}-{self.identity}.json")
+
+    def load(self, path):
+        # Returns the entry held in path, or None if missing or unreadable.
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def remove(self, path):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+    def get(self, url, fields=None):
+        """Returns a (found, data) tuple for the resource at url.
+
+        If fields is provided, an entry holding only some fields of the
+        resource is acceptable, so long as it holds all the given fields.
+        """
+        path = self.path(url)
+        entry = self.load(path)
+        if not entry or entry.get("url") != url:
+            return (False, None)
+
+        now = time.time()
+        if entry["expires"] <= now:
+            self.remove(path)
+            return (False, None)
+
+        entry_fields = entry.get("fields")
+        if entry_fields is not None and (
+            fields is None or not set(fields).issubset(entry_fields)
+        ):
+            return (False, None)
+
+        # Mark as recently used. The entry may have been removed meanwhile,
+        # in which case it's still fine to use this once.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path, (now, now))
+
+        return (True, entry["data"])
+
+    def put(self, url, data, fields=None):
+        """Stores data for the resource at url.
+
+        fields should be provided if data holds only some fields of the resource.
+        """
+        now = time.time()
+        if fields is not None:
+            fields = sorted(fields)
+        entry = dict(url=url, data=data, fields=fields, expires=now + self.ttl)
+
+        # Write atomically, so readers never see a partial file.
+        with NamedTemporaryFile(
+            "w", dir=self.directory, prefix=".", suffix=".tmp", delete=False
+        ) as f:
+            json.dump(entry, f)
+        os.utime(f.name, (now, now))
+        os.replace(f.name, self.path(url))
+
+        self.evict()
+
+    def evict(self):
+        # Removes the least recently used entries beyond max_entries.
+        used = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                # Entries may be removed concurrently.
+                with contextlib.suppress(FileNotFoundError):
+                    used.append((entry.stat().st_mtime, entry.path))
+
+        used.sort()
+        for (_, path) in used[: len(used) - self.max_entries]:
+            self.remove(path)
+
+    def invalidate(self, urls):
+        # Entries for any identity are removed, so all entries are scanned.
+        digests = {digest(url): url for url in urls}
+
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                url = digests.get(entry.name.split("-", 1)[0])
+                if url and entry.name.endswith(".json"):
+                    self.remove(entry.path)
+                    LOG.info("Invalidated cached %s", url)
@@ -0,0 +1,87 @@
+import contextlib
+import logging
+import threading
+import time
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+
+class AdaptiveLimiter:
+    """Limits the number of requests in flight to Pulp, adapting to load.
+
+    The limit is adjusted by AIMD (additive increase, multiplicative decrease):
+    it grows slowly while requests succeed with low latency, and is halved
+    when Pulp appears to be overloaded. It only grows up to one more than the
+    most requests actually in flight, so that a single halving always reduces
+    concurrency. When Pulp asks clients to retry later,
+    no requests are started until then.
+
+    The limiter is shared by all threads making requests during a module run.
+    Concurrency is still bounded by the caller, e.g. by max_workers; this only
+    ensures that concurrency doesn't exceed what Pulp can currently handle.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, target_latency=2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        self.stats = dict(max_in_flight=0, overloaded=0)
+
+    @contextlib.contextmanager
+    def slot(self):
+        # A context manager to hold one of the permitted in-flight requests.
+        with self.cond:
+            while True:
+                delay = self.resume_at - time.monotonic()
+                if delay > 0:
+                    self.cond.wait(delay)
+                elif self.in_flight >= int(self.limit):
+                    self.cond.wait()
+                else:
+                    break
+
+            self.in_flight += 1
+            self.stats["max_in_flight"] = max(
+                self.stats["max_in_flight"], self.in_flight
+            )
+
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+
+    def succeeded(self, latency):
+        """Record a request which completed normally, with given latency."""
+        with self.cond:
+            # A limit above what's been used isn't known to be handled by Pulp.
+            ceiling = min(self.maximum, self.stats["max_in_flight"] + 1)
+            if latency <= self.target_latency and self.limit < ceiling:
+                # Grows by roughly one for each 'limit' requests.
+                self.limit = min(ceiling, self.limit + 1.0 / self.limit)
+                self.cond.notify_all()
+
+    def overloaded(self, delay=0):
+        """Record a request indicating that Pulp is overloaded.
+
+        No further requests are started for the given delay, in seconds.
+        """
+        with self.cond:
+            now = time.monotonic()
+            self.stats["overloaded"] += 1
+
+            # Many requests in flight may fail at once; that should count as a
+            # single signal to decrease the limit.
+            if now - self.last_decrease > self.target_latency:
+                self.limit = max(self.minimum, self.limit / 2)
+                self.last_decrease = now
+                LOG.info("Pulp is overloaded, limiting to %d request(s)", self.limit)
+
+            self.resume_at = max(self.resume_at, now + delay)
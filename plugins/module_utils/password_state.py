@@ -0,0 +1,77 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from tempfile import NamedTemporaryFile
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+# Parameters of the hash used for fingerprints. The hash is deliberately slow,
+# since a fingerprint could otherwise be used to cheaply guess a password.
+HASH_NAME = "sha256"
+HASH_ITERATIONS = 100000
+
+
+class PasswordStateStore:
+    """Records fingerprints of passwords last applied to Pulp users.
+
+    Pulp doesn't allow reading back a user's password, so without this, a
+    password must be updated every time it's managed. With this, a password
+    only needs to be updated if it differs from the one last applied.
+
+    Each fingerprint is a salted, slow hash of the password, stored in a file
+    per pulp_url and login.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def path(self, pulp_url, login):
+        key = json.dumps([pulp_url.rstrip("/"), login])
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    @staticmethod
+    def fingerprint(password, salt, iterations):
+        return hashlib.pbkdf2_hmac(
+            HASH_NAME, password.encode("utf-8"), bytes.fromhex(salt), iterations
+        ).hex()
+
+    def matches(self, pulp_url, login, password):
+        """Returns True if password is known to be the last applied password."""
+        try:
+            with open(self.path(pulp_url, login)) as f:
+                state = json.load(f)
+            expected = state["fingerprint"]
+            actual = self.fingerprint(password, state["salt"], state["iterations"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        return hmac.compare_digest(expected, actual)
+
+    def record(self, pulp_url, login, password):
+        """Records password as the last applied password."""
+        salt = secrets.token_hex(16)
+        state = dict(
+            salt=salt,
+            iterations=HASH_ITERATIONS,
+            fingerprint=self.fingerprint(password, salt, HASH_ITERATIONS),
+        )
+
+        # Write atomically, so readers never see a partial file.
+        with NamedTemporaryFile("w", dir=self.directory, delete=False) as f:
+            json.dump(state, f)
+        os.replace(f.name, self.path(pulp_url, login))
+
+        LOG.info("Recorded password fingerprint for %s", login)
+
+    def forget(self, pulp_url, login):
+        """Forgets any password recorded for a user, e.g. once deleted."""
+        try:
+            os.unlink(self.path(pulp_url, login))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,333 @@
+import base64
+import hashlib
+import http.client
+import io
+import logging
+import ssl
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+from ansible.module_utils.parsing.convert_bool import boolean
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+# Errors which may occur when a server has closed a keep-alive connection
+# which we still considered usable.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+MAX_REDIRECTS = 10
+
+# SSL contexts shared by all pools in this process, keyed by the contents of
+# the client certificate and key, so that they're only loaded once.
+SSL_CONTEXTS = {}
+SSL_CONTEXTS_LOCK = threading.Lock()
+
+
+def file_digest(path):
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def shared_ssl_context(validate_certs, client_cert, client_key):
+    """Returns an SSL context for the given settings.
+
+    Contexts are created once and then reused for the lifetime of the process.
+    """
+    key = (bool(validate_certs), file_digest(client_cert), file_digest(client_key))
+
+    with SSL_CONTEXTS_LOCK:
+        context = SSL_CONTEXTS.get(key)
+        if context is None:
+            context = ssl.create_default_context()
+
+            if not validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+
+            if client_cert:
+                LOG.debug("Loading client certificate %s", client_cert)
+                context.load_cert_chain(client_cert, client_key)
+
+            SSL_CONTEXTS[key] = context
+
+        return context
+
+
+def tls_settings(params):
+    # Settings from URL_ARGUMENTS which determine the SSL context, as
+    # accepted by shared_ssl_context.
+    return (
+        params.get("validate_certs", True),
+        params.get("client_cert"),
+        params.get("client_key"),
+    )
+
+
+class TLSConnection(http.client.HTTPSConnection):
+    """An HTTPS connection which may resume a TLS session.
+
+    If session is set, the session is resumed (where the server permits).
+    on_handshake is called with the connection after each TLS handshake.
+    """
+
+    def __init__(self, *args, session=None, on_handshake=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session
+        self.on_handshake = on_handshake
+        self.handshake_seconds = None
+        self.tls_sock = None
+
+    def connect(self):
+        # As the base class, but with a session and timing of the handshake.
+        http.client.HTTPConnection.connect(self)
+
+        server_hostname = self._tunnel_host or self.host
+
+        start = time.monotonic()
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=server_hostname, session=self.session
+        )
+        self.handshake_seconds = time.monotonic() - start
+
+        # The base class drops its socket as soon as a response indicates the
+        # connection will close, but the session may be needed after that.
+        self.tls_sock = self.sock
+
+        if self.on_handshake:
+            self.on_handshake(self)
+
+
+class ConnectionPool:
+    """A pool of persistent HTTP/1.1 connections.
+
+    Connections are kept alive and reused for the lifetime of the pool, keyed
+    by (scheme, host, port). The pool may be used from multiple threads
+    concurrently; each request checks out a connection for its exclusive use.
+
+    The pool's fetch_url method is a stand-in for module_utils.urls.fetch_url,
+    honoring the same URL_ARGUMENTS (validate_certs, client_cert, client_key,
+    url_username, url_password, force_basic_auth, follow_redirects, http_agent).
+    These may be overridden for a single request, e.g. to authenticate as
+    another user. Proxies are not supported.
+    """
+
+    def __init__(self, params, timeout=10):
+        self.params = params
+        self.timeout = timeout
+        self.stats = dict(requests=0, connections_opened=0, connections_reused=0)
+        self.tls_stats = dict(handshakes=0, sessions_resumed=0, handshake_seconds=0.0)
+        self._idle = {}
+        self._tls_sessions = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    @property
+    def ssl_context(self):
+        with self._lock:
+            if self._ssl_context is None:
+                self._ssl_context = shared_ssl_context(*tls_settings(self.params))
+            return self._ssl_context
+
+    def _context_for(self, settings):
+        # The pool's own context is cached, avoiding reading certificates for
+        # every connection; others are only used by overridden requests.
+        if settings == tls_settings(self.params):
+            return self.ssl_context
+        return shared_ssl_context(*settings)
+
+    def _on_handshake(self, conn):
+        resumed = conn.sock.session_reused
+
+        with self._lock:
+            self.tls_stats["handshakes"] += 1
+            self.tls_stats["handshake_seconds"] += conn.handshake_seconds
+            if resumed:
+                self.tls_stats["sessions_resumed"] += 1
+
+        LOG.debug(
+            "TLS handshake with %s:%s in %.3fs (%s, session %s)",
+            conn.host,
+            conn.port,
+            conn.handshake_seconds,
+            conn.sock.version(),
+            "resumed" if resumed else "new",
+        )
+
+    def _save_session(self, key, conn):
+        # Keep the latest TLS session for a server, to be resumed by any
+        # further connections. With TLS 1.3, sessions are only available once
+        # some data has been received, so this is done after each response.
+        session = conn.tls_sock.session if conn.tls_sock else None
+        if session:
+            with self._lock:
+                self._tls_sessions[key] = session
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.stats["connections_reused"] += 1
+                return (idle.pop(), True)
+            self.stats["connections_opened"] += 1
+
+        (scheme, host, port, settings) = key
+        LOG.debug("Opening connection to %s://%s:%s", scheme, host, port)
+
+        if scheme == "https":
+            conn = TLSConnection(
+                host,
+                port,
+                timeout=self.timeout,
+                context=self._context_for(settings),
+                session=self._tls_sessions.get(key),
+                on_handshake=self._on_handshake,
+            )
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        return (conn, False)
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+        if self.tls_stats["handshakes"]:
+            LOG.debug("TLS stats: %s", self.tls_stats)
+
+    def _auth_header(self, params):
+        username = params.get("url_username")
+        if not username:
+            return None
+
+        password = params.get("url_password") or ""
+        token = base64.b64encode(f"{username}:{password}".encode("utf8"))
+        return "Basic " + token.decode("ascii")
+
+    def _should_redirect(self, method, params):
+        follow = str(params.get("follow_redirects") or "urllib2").lower()
+        if follow in ("all", "yes", "true"):
+            return True
+        if follow in ("none", "no", "false"):
+            return False
+        # "urllib2", "safe": only redirect methods without side effects.
+        return method in ("GET", "HEAD")
+
+    def _request_once(self, url, method, data, headers, params):
+        parsed = urlsplit(url)
+        scheme = parsed.scheme
+        port = parsed.port or (443 if scheme == "https" else 80)
+
+        # Connections are only reused for requests with the same TLS settings,
+        # e.g. so that a client certificate isn't used where not requested.
+        settings = tls_settings(params) if scheme == "https" else None
+        key = (scheme, parsed.hostname, port, settings)
+
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+
+        body = data.encode("utf8") if isinstance(data, str) else data
+
+        while True:
+            (conn, reused) = self._checkout(key)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                if isinstance(conn, TLSConnection):
+                    self._save_session(key, conn)
+                content = response.read()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    # The server closed an idle connection; try a new one.
+                    LOG.debug("Connection to %s was closed, reconnecting", key)
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+
+            return (response, content)
+
+    def fetch_url(self, url, data=None, headers=None, method="GET", params=None):
+        """Perform a request, with an interface as for module_utils.urls.fetch_url.
+
+        If provided, params overrides the pool's URL_ARGUMENTS for this request.
+
+        Returns a (response, info) tuple. The response body is fully read,
+        so that the underlying connection can be reused.
+        """
+        params = dict(self.params, **params) if params else self.params
+        method = method.upper()
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", params.get("http_agent") or "")
+
+        auth = self._auth_header(params)
+        if auth and boolean(params.get("force_basic_auth") or False, strict=False):
+            headers["Authorization"] = auth
+
+        with self._lock:
+            self.stats["requests"] += 1
+
+        redirects = 0
+        while True:
+            try:
+                (response, content) = self._request_once(
+                    url, method, data, headers, params
+                )
+            except (OSError, http.client.HTTPException) as error:
+                LOG.warning("Request to %s failed: %s", url, error)
+                return (None, dict(status=-1, msg=f"Request failed: {error}", url=url))
+
+            status = response.status
+
+            if status == 401 and auth and "Authorization" not in headers:
+                # Authenticate in response to a challenge, as urllib would.
+                headers["Authorization"] = auth
+                continue
+
+            location = response.getheader("Location")
+            if (
+                status in REDIRECT_STATUSES
+                and location
+                and redirects < MAX_REDIRECTS
+                and self._should_redirect(method, params)
+            ):
+                redirects += 1
+                url = urljoin(url, location)
+                if status == 303:
+                    (method, data) = ("GET", None)
+                continue
+
+            if status < 400:
+                msg = f"OK ({len(content)} bytes)"
+            else:
+                msg = f"HTTP Error {status}: {response.reason}"
+
+            info = {key.lower(): value for (key, value) in response.getheaders()}
+            info.update(status=status, msg=msg, url=url)
+            return (io.BytesIO(content), info)
@@ -0,0 +1,130 @@
+import contextlib
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+# Number of frames recorded for each allocation traced by tracemalloc.
+TRACEMALLOC_FRAMES = 25
+
+# Since Python 3.12, cProfile includes calls made in all threads while a
+# profile is enabled, and only one profile may be enabled at a time.
+PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    """Profiles a module run with cProfile and/or tracemalloc.
+
+    Results are written to files in profile_dir (as pstats) and
+    tracemalloc_dir (as tracemalloc snapshots), either of which may be None
+    to disable that kind of profiling.
+
+    Before Python 3.12, cProfile only profiles the thread in which it's
+    enabled, so functions run in other threads must be wrapped with wrap()
+    to be included. Since then, one profile includes all threads.
+    """
+
+    def __init__(self, profile_dir=None, tracemalloc_dir=None):
+        self.profile_dir = profile_dir
+        self.tracemalloc_dir = tracemalloc_dir
+
+        self.profiles = []
+        self.active = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def enabled(self):
+        # A context manager to enable cProfile in the current thread. Before
+        # Python 3.12, each thread has its own profile, merged with the others
+        # when written.
+        if not self.profile_dir or getattr(self._local, "enabled", False):
+            yield
+            return
+
+        if PROFILE_ALL_THREADS and self.active:
+            # Already included in the profile enabled in another thread.
+            yield
+            return
+
+        profile = getattr(self._local, "profile", None)
+        new = profile is None
+        if new:
+            profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError as error:
+            # Since Python 3.12, this happens if another profiler is already
+            # active, e.g. if the module is itself being profiled.
+            LOG.warning("Could not enable profiling: %s", error)
+            yield
+            return
+
+        if new:
+            self._local.profile = profile
+            with self._lock:
+                self.profiles.append(profile)
+
+        self._local.enabled = True
+        self.active = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.enabled = False
+            self.active = False
+
+    def wrap(self, fn):
+        """Wraps fn such that calls from any thread are profiled."""
+
+        def wrapped(*args, **kwargs):
+            with self.enabled():
+                return fn(*args, **kwargs)
+
+        return wrapped
+
+    @contextlib.contextmanager
+    def profile(self, name):
+        """Profiles the enclosed code, then writes results to files named
+        after the given name.
+        """
+        if self.tracemalloc_dir:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+        try:
+            with self.enabled():
+                yield
+        finally:
+            filename = self.filename(name)
+
+            if self.tracemalloc_dir:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                path = self.path(self.tracemalloc_dir, filename + ".tracemalloc")
+                snapshot.dump(path)
+                LOG.info("Wrote allocation snapshot to %s", path)
+
+            if self.profile_dir and self.profiles:
+                path = self.path(self.profile_dir, filename + ".pstats")
+                pstats.Stats(*self.profiles).dump_stats(path)
+                LOG.info("Wrote profile to %s", path)
+
+    @staticmethod
+    def filename(name):
+        # Names are made unique per invocation, since the same module and
+        # resource could be processed several times on one host.
+        name = f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+    @staticmethod
+    def path(directory, filename):
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
@@ -0,0 +1,67 @@
+# Computes the changes needed to bring current state to desired state.
+#
+# State is normalized into sets before comparing, so the cost of a diff is
+# linear in the size of the state. This matters for roles with many thousands
+# of users or permissions.
+
+
+def normalize_permissions(permissions):
+    """Returns a dict of resource => frozenset of operations.
+
+    Resources with no operations are dropped, since they're equivalent to
+    resources not being present at all.
+    """
+    out = {}
+    for (resource, ops) in (permissions or {}).items():
+        if ops:
+            out[resource] = frozenset(ops)
+    return out
+
+
+def plan_permissions(current, desired):
+    """Returns the changes needed to turn current into desired permissions.
+
+    current and desired are dicts of resource => list of operations, as used
+    by Pulp's API.
+
+    Returns a tuple (to_revoke, to_grant), each of which is a list of
+    (resource, ops) tuples sorted by resource. The operations for each
+    resource keep the order in which they appeared in the input.
+    """
+    current_sets = normalize_permissions(current)
+    desired_sets = normalize_permissions(desired)
+    empty = frozenset()
+
+    to_revoke = []
+    for resource in sorted(current_sets):
+        wanted = desired_sets.get(resource, empty)
+        ops = unique(op for op in current[resource] if op not in wanted)
+        if ops:
+            to_revoke.append((resource, ops))
+
+    to_grant = []
+    for resource in sorted(desired_sets):
+        have = current_sets.get(resource, empty)
+        ops = unique(op for op in desired[resource] if op not in have)
+        if ops:
+            to_grant.append((resource, ops))
+
+    return (to_revoke, to_grant)
+
+
+def plan_members(current, desired):
+    """Returns the changes needed to turn current into desired members.
+
+    current and desired are iterables of members, e.g. user logins.
+
+    Returns a tuple (to_remove, to_add) of sorted lists.
+    """
+    current = frozenset(current or ())
+    desired = frozenset(desired or ())
+
+    return (sorted(current - desired), sorted(desired - current))
+
+
+def unique(items):
+    # Returns items as a list with duplicates removed, preserving order.
+    return list(dict.fromkeys(items))
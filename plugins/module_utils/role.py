@@ -0,0 +1,276 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+    LOG,
+    BaseModule,
+    LogValue,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.reconcile import (
+    plan_members,
+    plan_permissions,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.search import (
+    search_resources,
+)
+
+ROLE_ARGUMENTS = dict(
+    id=dict(required=True, type="str"),
+    display_name=dict(type="str"),
+    description=dict(type="str", default="deployed by ansible"),
+    permissions=dict(type=dict, default={}),
+    users=dict(type=list, default=None),
+    check_users=dict(type="bool", default=False),
+    parallelism=dict(type="int", default=1),
+    state=dict(type="str", default="present", choices=["present", "absent"]),
+)
+
+
+class RoleModule(BaseModule):
+    def __init__(self, module=None):
+        super().__init__(
+            module
+            or AnsibleModule(
+                argument_spec=dict(
+                    **ROLE_ARGUMENTS,
+                    **COMMON_ARGUMENTS,
+                ),
+                supports_check_mode=True,
+            )
+        )
+        self.errors = []
+
+    @property
+    def role_id(self):
+        return self.module.params["id"]
+
+    @property
+    def resource_id(self):
+        return self.role_id
+
+    @property
+    def role_url(self):
+        return f"roles/{self.role_id}/"
+
+    @property
+    def role_users(self):
+        return self.module.params.get("users")
+
+    @property
+    def display_name(self):
+        return self.module.params["display_name"] or self.role_id
+
+    @property
+    def description(self):
+        return self.module.params["description"]
+
+    @property
+    def check_users(self):
+        return self.module.params.get("check_users")
+
+    @property
+    def parallelism(self):
+        return self.module.params.get("parallelism") or 1
+
+    @property
+    def many_requests(self):
+        return self.parallelism > 1
+
+    def check_errors(self):
+        # Fail if any errors were collected while adjusting the role.
+        if not self.errors:
+            return
+
+        msg = str(self.errors[0])
+        if len(self.errors) > 1:
+            msg = f"{len(self.errors)} requests failed"
+
+        self.module.fail_json(
+            msg=msg,
+            changed=self.changed,
+            errors=[str(error) for error in self.errors],
+            **self.run_stats(),
+            **self.result,
+        )
+
+    def change_permissions(self, request):
+        (action_type, resource, ops) = request
+        body = dict(role_id=self.role_id, resource=resource, operations=ops)
+        LOG.debug("%s %s %s", action_type, resource, ops)
+        self.invalidate_cache(self.role_url)
+        self.update_resource(f"permissions/actions/{action_type}/", body)
+
+    def remove_user(self, username):
+        # The user's roles are also modified, so cached users are invalidated.
+        try:
+            self.delete_resource(f"{self.role_url}users/{username}/")
+        finally:
+            self.invalidate_cache(f"users/{username}/")
+
+    def add_user(self, username):
+        try:
+            self.update_resource(f"{self.role_url}users/", {"login": username})
+        finally:
+            self.invalidate_cache(f"users/{username}/")
+
+    def adjust_permissions(self, current_role):
+        current_perm = current_role.get("permissions") or {}
+        desired = self.module.params["permissions"]
+
+        LOG.debug(
+            "current perm %s, desired %s", LogValue(current_perm), LogValue(desired)
+        )
+
+        # Gather what we need to grant and revoke.
+        with self.phase("diff"):
+            (to_revoke, to_grant) = plan_permissions(current_perm, desired)
+
+        if not to_revoke and not to_grant:
+            return
+
+        self.changed = True
+
+        if (to_revoke or to_grant) and self.module.check_mode:
+            return self.exit_ok(
+                msg="would adjust permissions (check mode)",
+            )
+
+        # Requests for different resources are independent and may be done
+        # concurrently, but all revokes must complete before any grants start.
+        #
+        # Errors are collected rather than failing immediately, so that as much
+        # as possible is fixed in a single run.
+        for (actions, action_type) in [
+            (to_revoke, "revoke_from_role"),
+            (to_grant, "grant_to_role"),
+        ]:
+            requests = [(action_type, resource, ops) for (resource, ops) in actions]
+            failed = self.run_concurrently(
+                self.change_permissions, requests, self.parallelism
+            )
+            self.errors.extend(error for (_, error) in failed)
+
+    def adjust_users(self, current_role):
+        current_users = current_role.get("users") or []
+        desired = self.role_users
+
+        LOG.debug(
+            "current users %s, desired %s", LogValue(current_users), LogValue(desired)
+        )
+
+        if desired is None:
+            # Don't manage users in this case
+            return
+
+        # Gather who we need to add and remove.
+        with self.phase("diff"):
+            (to_remove, to_add) = plan_members(current_users, desired)
+
+        if not to_remove and not to_add:
+            return
+
+        self.changed = True
+
+        # Changes for each user are independent and may be done concurrently.
+        # The outcome for each user is included in the module's result.
+        outcome = dict(removed=[], added=[], failed=[])
+
+        if self.check_users and to_add:
+            # Look up all users to be added with one search, rather than
+            # letting each add fail on its own; this also works in check mode.
+            with self.phase("search"):
+                found = search_resources(self, "users", to_add, fields=[])
+            missing = [u for u in to_add if u not in found]
+            to_add = [u for u in to_add if u in found]
+
+            outcome["failed"].extend(sorted(missing))
+            self.errors.extend(f"user {u} does not exist" for u in missing)
+
+        if self.module.check_mode:
+            self.check_errors()
+            return self.exit_ok(msg="would adjust users (check mode)")
+
+        for (usernames, fn, key) in [
+            (to_remove, self.remove_user, "removed"),
+            (to_add, self.add_user, "added"),
+        ]:
+            failed = self.run_concurrently(fn, usernames, self.parallelism)
+            failed_users = set(username for (username, _) in failed)
+
+            outcome[key] = [u for u in usernames if u not in failed_users]
+            outcome["failed"].extend(sorted(failed_users))
+            self.errors.extend(error for (_, error) in failed)
+
+        self.result["user_changes"] = outcome
+
+    def handle_role_absent(self):
+        if self.module.params["state"] == "absent":
+            return
+
+        self.changed = True
+
+        if self.module.check_mode:
+            return self.exit_ok(msg="would create role (check mode)")
+
+        # Create the role now
+        self.update_resource(
+            "roles/",
+            {
+                "role_id": self.role_id,
+                "display_name": self.display_name,
+                "description": self.description,
+            },
+        )
+
+        # If we've just created a role, there are no permissions or users yet.
+        # Adjust them as needed.
+        current_role = {"permissions": {}, "users": []}
+        self.adjust_permissions(current_role)
+        self.adjust_users(current_role)
+
+    def delete_role(self):
+        self.changed = True
+
+        if self.module.check_mode:
+            return self.exit_ok(msg="would delete role (check mode)")
+
+        self.delete_resource(self.role_url)
+
+    def handle_role_present(self, current_role):
+        if self.module.params["state"] == "absent":
+            return self.delete_role()
+
+        delta = {}
+
+        if current_role.get("display_name") != self.display_name:
+            delta["display_name"] = self.display_name
+        if current_role.get("description") != self.description:
+            delta["description"] = self.description
+
+        if delta:
+            self.changed = True
+
+            if self.module.check_mode:
+                return self.exit_ok(msg="would update role (check mode)")
+
+            # Update it
+            self.update_resource(
+                f"roles/{self.role_id}/", dict(delta=delta), method="PUT"
+            )
+
+        self.adjust_permissions(current_role)
+        self.adjust_users(current_role)
+
+    def run_module(self):
+        with self.phase("get"):
+            # Not projected onto the fields used, since those include the only
+            # large fields of a role (permissions and users).
+            current_role = self.get_resource(self.role_url)
+        LOG.info("Role now: %s", LogValue(current_role))
+
+        if current_role is None:
+            self.handle_role_absent()
+        else:
+            self.handle_role_present(current_role)
+
+        self.check_errors()
+        self.exit_ok()
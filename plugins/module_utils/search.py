@@ -0,0 +1,46 @@
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    LOG,
+)
+
+# Collections which may be searched, and the field identifying each resource
+# within the collection.
+SEARCH_KEYS = {
+    "users": "login",
+    "roles": "id",
+}
+
+# Maximum number of resources looked up by a single search request.
+SEARCH_CHUNK_SIZE = 200
+
+
+def search_resources(module, collection, keys, fields=None, chunk_size=None):
+    """Look up many resources in a collection at once, e.g. users by login.
+
+    Resources are found using Pulp's search API, with one request per chunk
+    of keys rather than one request per resource.
+
+    If fields is provided, resources hold only those fields (along with the
+    key field).
+
+    Returns a dict of resources indexed by key. Keys of resources which
+    don't exist are absent from the dict.
+    """
+    key_field = SEARCH_KEYS[collection]
+    chunk_size = chunk_size or SEARCH_CHUNK_SIZE
+    keys = sorted(set(keys))
+
+    if fields is not None:
+        fields = sorted(set(fields) | {key_field})
+
+    out = {}
+    for i in range(0, len(keys), chunk_size):
+        criteria = dict(filters={key_field: {"$in": keys[i : i + chunk_size]}})
+        if fields is not None:
+            criteria["fields"] = fields
+
+        for resource in module.iter_resources(f"{collection}/search/", criteria):
+            out[resource[key_field]] = resource
+
+    LOG.info("Found %s of %s %s", len(out), len(keys), collection)
+
+    return out
@@ -0,0 +1,46 @@
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    LOG,
+)
+
+
+class Snapshot:
+    """A snapshot of entire collections of resources (e.g. all users) in Pulp.
+
+    Each collection is fetched with a single request to its list endpoint
+    and indexed by its key field. The snapshot can then answer lookups of
+    individual resources (e.g. "users/<login>/") without further requests.
+    """
+
+    # Collections which may be snapshotted, and the field identifying each
+    # resource within the collection.
+    KEYS = {
+        "users": "login",
+        "roles": "id",
+    }
+
+    def __init__(self):
+        self.collections = {}
+
+    def load(self, module, collection):
+        key = self.KEYS[collection]
+        index = {
+            resource[key]: resource
+            for resource in module.iter_resources(f"{collection}/")
+        }
+        self.collections[collection] = index
+
+        LOG.info("Snapshot of %s: %s item(s)", collection, len(index))
+
+    def lookup(self, rest):
+        """Look up a resource by path, e.g. "users/<login>/".
+
+        Returns a (found, resource) tuple. If found is False, the snapshot
+        cannot answer for this path. Otherwise, resource is the resource's
+        data, or None if it doesn't exist.
+        """
+        parts = rest.strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in self.collections:
+            return (False, None)
+
+        (collection, key) = parts
+        return (True, self.collections[collection].get(key))
@@ -0,0 +1,243 @@
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 65536
+
+WHITESPACE = " \t\n\r"
+
+# Characters which may follow a complete value.
+DELIMITERS = WHITESPACE + ",]}:"
+
+# Characters of interest when skipping over a structure or a string.
+STRUCTURE_CHARS = re.compile(r'["\[\]{}]')
+STRING_CHARS = re.compile(r'["\\]')
+
+# The body of a string, up to its closing quote or a trailing backslash.
+STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class JSONStreamError(ValueError):
+    """Raised when a stream does not contain the expected JSON."""
+
+
+class JSONStreamReader:
+    """Incrementally decodes JSON from a binary file-like object.
+
+    Only as much of the stream is read and held in memory as is needed to
+    decode the current scalar or string; arrays and objects are decoded an
+    element at a time.
+    """
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        if self.eof:
+            return False
+
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buf += self.text_decoder.decode(b"", final=True)
+            return False
+
+        # Discard consumed text from the buffer before growing it.
+        self.buf = self.buf[self.pos :] + self.text_decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # Returns the next non-whitespace character without consuming it,
+        # or None at end of stream.
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read_more():
+                return None
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise JSONStreamError(f"expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode and return the next JSON value in the stream.
+
+        Arrays and objects are decoded an element at a time and strings are
+        scanned as they're read, so no part of the stream is decoded twice.
+        """
+        char = self.peek()
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return list(self.array())
+
+        # Most values have already been fully read, and can be decoded at once.
+        try:
+            (value, end) = self.decoder.raw_decode(self.buf, self.pos)
+        except ValueError:
+            pass
+        else:
+            if end < len(self.buf) and self.buf[end] in DELIMITERS:
+                self.pos = end
+                return value
+
+        if char == '"':
+            return self.string()
+        return self.scalar()
+
+    def scalar(self):
+        # Decode a number, true, false or null. These are small, so are simply
+        # decoded again if not yet fully read.
+        while True:
+            try:
+                (value, end) = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                # Probably incomplete, but might be invalid.
+                if self.read_more():
+                    continue
+                raise
+
+            # A value not followed by a delimiter may be incomplete, e.g. a
+            # number whose remaining digits are not yet read.
+            if end == len(self.buf) or self.buf[end] not in DELIMITERS:
+                if self.read_more():
+                    continue
+
+            self.pos = end
+            return value
+
+    def string(self):
+        # Decode a string, first finding its end so that it's decoded once.
+        end = self.pos + 1
+        while True:
+            end = STRING_BODY.match(self.buf, end).end()
+            if end < len(self.buf) and self.buf[end] == '"':
+                break
+
+            # Need more of the string. Reading more discards text before
+            # self.pos, so adjust for that.
+            end -= self.pos
+            self.need_more()
+
+        (value, self.pos) = self.decoder.raw_decode(self.buf, self.pos)
+        return value
+
+    def need_more(self):
+        # Read more data where the current value is known to be incomplete.
+        if not self.read_more():
+            raise JSONStreamError("unexpected end of stream")
+
+    def skip_string(self):
+        # Skip the rest of a string, with the opening quote already consumed.
+        while True:
+            match = STRING_CHARS.search(self.buf, self.pos)
+            if not match:
+                self.pos = len(self.buf)
+                self.need_more()
+            elif match.group() == '"':
+                self.pos = match.end()
+                return
+            elif match.end() < len(self.buf):
+                # Skip the backslash and the escaped character.
+                self.pos = match.end() + 1
+            else:
+                # Backslash at end of buffer; need the escaped character.
+                self.pos = match.start()
+                self.need_more()
+
+    def skip_value(self):
+        """Skip over the next JSON value in the stream without decoding it.
+
+        Unlike value(), this does not need to hold the entire value in memory.
+        """
+        char = self.peek()
+        if char not in "[{":
+            if char == '"':
+                self.pos += 1
+                return self.skip_string()
+            # Scalars are small, so simply decode them.
+            self.value()
+            return
+
+        depth = 0
+        while True:
+            match = STRUCTURE_CHARS.search(self.buf, self.pos)
+            if not match:
+                self.pos = len(self.buf)
+                self.need_more()
+                continue
+
+            char = match.group()
+            self.pos = match.end()
+            if char == '"':
+                self.skip_string()
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def object(self, fields=None):
+        """Decode and return the JSON object next in the stream.
+
+        If fields is provided, only those fields are decoded and returned;
+        the values of any other fields are skipped.
+        """
+        self.expect("{")
+        out = {}
+
+        if self.peek() == "}":
+            self.pos += 1
+            return out
+
+        while True:
+            key = self.value()
+            self.expect(":")
+            if fields is None or key in fields:
+                out[key] = self.value()
+            else:
+                self.skip_value()
+            if self.expect(",}") == "}":
+                return out
+
+    def array(self):
+        """Yield each element of the JSON array next in the stream."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_array(fp, chunk_size=CHUNK_SIZE):
+    """Yield each element of a JSON array read incrementally from fp."""
+    return JSONStreamReader(fp, chunk_size).array()
+
+
+def load_json(fp, fields=None, chunk_size=CHUNK_SIZE):
+    """Decode a JSON value read incrementally from fp.
+
+    If the value is an object and fields is provided, only the given fields
+    are decoded and returned.
+    """
+    reader = JSONStreamReader(fp, chunk_size)
+    if fields is not None and reader.peek() == "{":
+        return reader.object(fields)
+    return reader.value()
@@ -0,0 +1,76 @@
+import contextlib
+import threading
+import time
+
+# Collections whose resources are identified by the path segment following
+# the collection's name, and the placeholder used for that segment.
+PATH_PLACEHOLDERS = {
+    "users": "{login}",
+    "roles": "{role_id}",
+}
+
+# Path segments which never identify a resource.
+PATH_KEYWORDS = ("search",)
+
+
+def path_template(rest):
+    """Returns a path with resource identifiers replaced by placeholders.
+
+    For example, "roles/admins/users/alice/" gives
+    "roles/{role_id}/users/{login}/". This allows timings of requests to be
+    grouped by kind.
+    """
+    parts = rest.split("/")
+    for i in range(1, len(parts)):
+        placeholder = PATH_PLACEHOLDERS.get(parts[i - 1])
+        if placeholder and parts[i] and parts[i] not in PATH_KEYWORDS:
+            parts[i] = placeholder
+    return "/".join(parts)
+
+
+class Timings:
+    """Records timings of HTTP requests and phases of a module run.
+
+    May be used from multiple threads concurrently. Time spent in a phase is
+    accumulated, e.g. a "writes" phase may be entered by many threads.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.requests = []
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add_request(self, record):
+        with self._lock:
+            self.requests.append(record)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def summary(self):
+        with self._lock:
+            requests = list(self.requests)
+            phases = dict(self.phases)
+
+        by_path = {}
+        for request in requests:
+            key = f"{request['method']} {request['path']}"
+            entry = by_path.setdefault(key, dict(count=0, seconds=0.0, bytes=0))
+            entry["count"] += 1
+            entry["seconds"] += request["seconds"]
+            entry["bytes"] += request["bytes"] or 0
+
+        return dict(
+            total_seconds=time.monotonic() - self.start,
+            phases=phases,
+            requests=requests,
+            request_summary=by_path,
+        )
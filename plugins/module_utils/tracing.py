@@ -0,0 +1,157 @@
+import contextlib
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+
+LOG = logging.getLogger("release_engineering.pulp2_api")
+
+SERVICE_NAME = "release_engineering.pulp2_api"
+
+# Values of enums from the OTLP protocol.
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+# A W3C trace context header, e.g. as found in $TRACEPARENT.
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def otlp_value(value):
+    # Returns an attribute value in OTLP-JSON form.
+    if isinstance(value, bool):
+        return dict(boolValue=value)
+    if isinstance(value, int):
+        return dict(intValue=str(value))
+    if isinstance(value, float):
+        return dict(doubleValue=value)
+    return dict(stringValue=str(value))
+
+
+def otlp_attributes(attributes):
+    return [
+        dict(key=key, value=otlp_value(value))
+        for (key, value) in attributes.items()
+        if value is not None
+    ]
+
+
+class Span:
+    """A span of a trace, i.e. a timed operation."""
+
+    def __init__(self, trace_id, name, parent_id=None, kind=SPAN_KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {}
+        self.error = False
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def traceparent(self):
+        # Value of a W3C traceparent header, making this span the parent of
+        # spans recorded by the recipient.
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def otlp(self):
+        out = dict(
+            traceId=self.trace_id,
+            spanId=self.span_id,
+            name=self.name,
+            kind=self.kind,
+            startTimeUnixNano=str(self.start_ns),
+            endTimeUnixNano=str(self.end_ns),
+            attributes=otlp_attributes(self.attributes),
+            status=dict(code=STATUS_CODE_ERROR if self.error else STATUS_CODE_OK),
+        )
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        return out
+
+
+class Tracer:
+    """Records spans of a module run, writing them to a file as OTLP-JSON.
+
+    The first span started is the root span; all others are its children.
+    When the root span ends, all spans are written to the file as a single
+    line, in the same form as accepted by an OTLP/HTTP collector.
+
+    If traceparent is provided (e.g. from $TRACEPARENT), spans join that
+    trace. This allows every task of a playbook run to be part of one trace.
+    """
+
+    def __init__(self, path, traceparent=None):
+        self.path = path
+        self.trace_id = secrets.token_hex(16)
+        self.parent_id = None
+
+        match = TRACEPARENT_RE.match(traceparent or "")
+        if match:
+            (self.trace_id, self.parent_id) = match.groups()
+
+        self.root = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, kind=SPAN_KIND_INTERNAL):
+        """A context manager recording a span, yielding the Span.
+
+        The span is marked as an error if an exception is raised, other than
+        a successful exit.
+        """
+        parent_id = self.root.span_id if self.root else self.parent_id
+        span = Span(self.trace_id, name, parent_id, kind)
+        if self.root is None:
+            self.root = span
+
+        try:
+            yield span
+        except SystemExit as error:
+            span.error = span.error or bool(error.code)
+            raise
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            with self._lock:
+                self.spans.append(span)
+            if span is self.root:
+                self.write()
+
+    def write(self):
+        with self._lock:
+            spans = [span.otlp() for span in self.spans]
+
+        line = json.dumps(
+            dict(
+                resourceSpans=[
+                    dict(
+                        resource=dict(
+                            attributes=otlp_attributes(
+                                {
+                                    "service.name": SERVICE_NAME,
+                                    "process.pid": os.getpid(),
+                                }
+                            )
+                        ),
+                        scopeSpans=[dict(scope=dict(name=SERVICE_NAME), spans=spans)],
+                    )
+                ]
+            )
+        )
+
+        # A single write in append mode, so that lines from concurrent tasks
+        # aren't interleaved.
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+        LOG.info("Wrote %s span(s) to %s", len(spans), self.path)
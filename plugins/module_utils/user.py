@@ -0,0 +1,241 @@
+import secrets
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+    LOG,
+    BaseModule,
+    LogValue,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.bulk import (
+    ItemExit,
+    ItemModule,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.password_state import (
+    PasswordStateStore,
+)
+
+USER_ARGUMENTS = dict(
+    login=dict(required=True, type="str"),
+    name=dict(type="str"),
+    password=dict(type="str", default="", no_log=True),
+    randomize_password=dict(type=bool, default=False, no_log=False),
+    state=dict(type="str", default="present", choices=["present", "absent"]),
+)
+
+# Arguments controlling how passwords are updated. In bulk modules, these
+# apply to all users rather than being set per user.
+PASSWORD_ARGUMENTS = dict(
+    password_state_dir=dict(type="path", no_log=False),
+    force_password_update=dict(type="bool", default=False, no_log=False),
+    password_update_mode=dict(
+        type="str", default="always", choices=["always", "verify"], no_log=False
+    ),
+)
+
+
+class UserModule(BaseModule):
+    def __init__(self, module=None):
+        super().__init__(
+            module
+            or AnsibleModule(
+                argument_spec=dict(
+                    **USER_ARGUMENTS,
+                    **PASSWORD_ARGUMENTS,
+                    **COMMON_ARGUMENTS,
+                ),
+                supports_check_mode=True,
+            )
+        )
+
+    @property
+    def login(self):
+        return self.module.params["login"]
+
+    @property
+    def resource_id(self):
+        return self.login
+
+    @property
+    def name(self):
+        return self.module.params.get("name") or self.login
+
+    @property
+    def password(self):
+        randomize = self.module.params["randomize_password"]
+        password = self.module.params["password"]
+        if randomize and password:
+            self.module.fail_json(
+                msg="usage error: cannot set both 'password' and 'randomize_password'"
+            )
+
+        if randomize:
+            return self.random_password()
+
+        return password or None
+
+    @property
+    def password_state(self):
+        # Store of applied password fingerprints, if enabled.
+        directory = self.root.module.params.get("password_state_dir")
+        if directory:
+            return PasswordStateStore(directory)
+
+    @property
+    def force_password_update(self):
+        return self.root.module.params.get("force_password_update")
+
+    @property
+    def password_update_mode(self):
+        return self.root.module.params.get("password_update_mode") or "always"
+
+    def password_applied(self, password):
+        # Returns True if password is known to be set for this user already.
+        state = self.password_state
+        if not state:
+            return False
+        return state.matches(self.module.params["pulp_url"], self.login, password)
+
+    def password_works(self, password):
+        # Returns True if password works for this user, by logging in as them.
+        #
+        # Client certificates are not used, since Pulp would then authenticate
+        # the certificate's owner regardless of the password.
+        params = dict(
+            self.module.params,
+            url_username=self.login,
+            url_password=password,
+            force_basic_auth="yes",
+            client_cert=None,
+            client_key=None,
+        )
+        module = ItemModule(params, tmpdir=self.module.tmpdir)
+        url = self.api_url("actions/login/")
+
+        LOG.info("Verifying password of %s", self.login)
+
+        try:
+            (_, info) = self.fetch_url(url, method="POST", module=module)
+        except ItemExit as item_exit:
+            LOG.warning("Could not verify password: %s", item_exit)
+            return False
+
+        status_code = info["status"]
+        LOG.info("%s => %s", url, status_code)
+
+        if status_code not in (200, 401):
+            LOG.warning("Unexpected response verifying password: %s", info)
+
+        return status_code == 200
+
+    def check_password(self, password):
+        # Returns a password_status for an existing user, given the desired
+        # password: "updated" if the password needs to be updated, or otherwise
+        # how the password was determined to be applied already.
+        if not self.module.params["password"] or self.force_password_update:
+            # A random or forced password is always updated.
+            return "updated"
+
+        if self.password_applied(password):
+            return "unchanged"
+
+        if self.password_update_mode == "verify" and self.password_works(password):
+            if not self.module.check_mode:
+                self.record_password(password)
+            return "verified"
+
+        return "updated"
+
+    def record_password(self, password):
+        state = self.password_state
+        if state:
+            state.record(self.module.params["pulp_url"], self.login, password)
+
+    def random_password(self):
+        LOG.info("Generating a random password for %s", self.login)
+        return secrets.token_urlsafe(64)
+
+    @property
+    def user_url(self):
+        return f"users/{self.login}/"
+
+    def handle_user_absent(self):
+        if self.module.params["state"] == "absent":
+            return
+
+        self.changed = True
+
+        if self.module.check_mode:
+            return self.exit_ok(msg="would create user (check mode)")
+
+        # When creating a user, we consider a password mandatory, because otherwise
+        # Pulp will default it to the literal string "None" (probably unintentional?)
+        #
+        # If caller asks for a new account and doesn't explicitly set a password, we
+        # use a random one to effectively disable password auth.
+        password = self.password or self.random_password()
+
+        body = {
+            "login": self.login,
+            "name": self.name,
+            "password": password,
+        }
+
+        # Create the user now
+        self.update_resource("users/", body)
+        self.result["password_status"] = "updated"
+
+        if self.module.params["password"]:
+            self.record_password(password)
+
+    def delete_user(self):
+        self.changed = True
+
+        if self.module.check_mode:
+            return self.exit_ok(msg="would delete user (check mode)")
+
+        self.delete_resource(self.user_url)
+
+        state = self.password_state
+        if state:
+            state.forget(self.module.params["pulp_url"], self.login)
+
+    def handle_user_present(self, current_user):
+        if self.module.params["state"] == "absent":
+            return self.delete_user()
+
+        delta = {}
+
+        if current_user.get("name") != self.name:
+            delta["name"] = self.name
+
+        password = self.password
+        if password is not None:
+            with self.phase("diff"):
+                self.result["password_status"] = self.check_password(password)
+            if self.result["password_status"] == "updated":
+                delta["password"] = password
+
+        if delta:
+            self.changed = True
+
+            if self.module.check_mode:
+                return self.exit_ok(msg="would update user (check mode)")
+
+            # Update it
+            self.update_resource(self.user_url, dict(delta=delta), method="PUT")
+
+            if "password" in delta and self.module.params["password"]:
+                self.record_password(password)
+
+    def run_module(self):
+        with self.phase("get"):
+            current_user = self.get_resource(self.user_url)
+        LOG.info("User now: %s", LogValue(current_user))
+
+        if current_user is None:
+            self.handle_user_absent()
+        else:
+            self.handle_user_present(current_user)
+
+        self.exit_ok()
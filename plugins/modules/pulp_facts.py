@@ -0,0 +1,151 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2021, Red Hat, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = """
+---
+module: pulp_facts
+short_description: Gather users, roles and permissions from Pulp 2.x
+description:
+- Gathers the role-based access control state of Pulp 2.x as facts.
+- Uses one request per gathered collection, regardless of the number of
+  users or roles. Responses are parsed incrementally, so large collections
+  can be gathered with bounded memory usage.
+- Uses Pulp's API.
+
+options:
+    gather:
+        type: list
+        elements: str
+        choices:
+        - users
+        - roles
+        default: [users, roles]
+        description:
+        - Collections to be gathered.
+        - Roles include permissions and users associated with each role.
+
+version_added: 0.4.0
+author: Rohan McGovern (@rohanpm)
+extends_documentation_fragment: release_engineering.pulp2_api.base_options
+"""
+
+RETURN = """
+ansible_facts:
+    description: Facts gathered from Pulp.
+    returned: always
+    type: dict
+    contains:
+        pulp_rbac:
+            description: The RBAC state of Pulp.
+            type: dict
+            contains:
+                users:
+                    description: Users, indexed by login.
+                    type: dict
+                    sample: {"alice": {"name": "Alice", "roles": ["readers"]}}
+                roles:
+                    description: Roles, indexed by role ID.
+                    type: dict
+                    sample:
+                        readers:
+                            display_name: Readers
+                            description: Can read everything
+                            permissions: {"/": ["READ"]}
+                            users: ["alice"]
+                user_roles:
+                    description: Role IDs associated with each user, indexed by login.
+                    type: dict
+                    sample: {"alice": ["readers"]}
+                resource_roles:
+                    description: >
+                        Permissions granted to roles on each resource,
+                        indexed by resource and then by role ID.
+                    type: dict
+                    sample: {"/": {"readers": ["READ"]}}
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+    BaseModule,
+)
+
+
+class FactsModule(BaseModule):
+    def __init__(self):
+        super().__init__(
+            AnsibleModule(
+                argument_spec=dict(
+                    gather=dict(
+                        type="list",
+                        elements="str",
+                        choices=["users", "roles"],
+                        default=["users", "roles"],
+                    ),
+                    **COMMON_ARGUMENTS,
+                ),
+                supports_check_mode=True,
+            )
+        )
+
+    @property
+    def gather(self):
+        return self.module.params["gather"]
+
+    def gather_users(self, facts):
+        users = facts.setdefault("users", {})
+        user_roles = facts.setdefault("user_roles", {})
+
+        for user in self.iter_resources("users/"):
+            login = user["login"]
+            roles = sorted(user.get("roles") or [])
+            users[login] = dict(name=user.get("name"), roles=roles)
+            user_roles[login] = roles
+
+    def gather_roles(self, facts):
+        roles = facts.setdefault("roles", {})
+        resource_roles = facts.setdefault("resource_roles", {})
+        user_roles = {}
+
+        for role in self.iter_resources("roles/"):
+            role_id = role["id"]
+            permissions = role.get("permissions") or {}
+            users = sorted(role.get("users") or [])
+
+            roles[role_id] = dict(
+                display_name=role.get("display_name"),
+                description=role.get("description"),
+                permissions=permissions,
+                users=users,
+            )
+
+            for (resource, ops) in permissions.items():
+                resource_roles.setdefault(resource, {})[role_id] = ops
+
+            for login in users:
+                user_roles.setdefault(login, []).append(role_id)
+
+        # Roles are the authoritative source of memberships.
+        memberships = facts.setdefault("user_roles", {})
+        for login in memberships:
+            memberships[login] = []
+        for (login, role_ids) in user_roles.items():
+            memberships[login] = sorted(role_ids)
+
+    def run_module(self):
+        facts = {}
+
+        if "users" in self.gather:
+            self.gather_users(facts)
+
+        if "roles" in self.gather:
+            self.gather_roles(facts)
+
+        self.exit_ok(ansible_facts=dict(pulp_rbac=facts))
+
+
+if __name__ == "__main__":
+    FactsModule().run()  # pragma: no cover
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2021, Red Hat, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = """
+---
+module: pulp_roles
+short_description: Manage many roles in Pulp 2.x
+description:
+- Creates, updates or deletes any number of roles in Pulp 2.x.
+- Each role is handled with the same rules as the C(pulp_role) module.
+- Roles are processed concurrently, which is much faster than using
+  C(pulp_role) in a loop. Changes to any single role are still applied in
+  order (create, update, revoke permissions, grant permissions, adjust users).
+- When managing many roles, the current state of all roles is fetched with
+  a single request rather than one request per role.
+- Uses Pulp's API.
+
+options:
+    roles:
+        required: true
+        type: list
+        elements: dict
+        description:
+        - List of roles to manage.
+        suboptions:
+            id:
+                required: true
+                type: str
+                description:
+                - Unique identifier for the role.
+
+            display_name:
+                type: str
+                description:
+                - Arbitrary user-oriented name for the role.
+
+            description:
+                type: str
+                description:
+                - A brief description of this role.
+
+            state:
+                type: str
+                choices:
+                - absent
+                - present
+                description:
+                - Defines whether this role should exist.
+                default: present
+
+            permissions:
+                type: dict
+                description:
+                - A resource => permission mapping associated with the role.
+                default: '{}'
+
+            users:
+                type: list
+                elements: str
+                description:
+                - List of all users associated with this role.
+                - If omitted, users per role will not be managed.
+
+            check_users:
+                type: bool
+                default: false
+                description:
+                - >
+                    If true, check that all users to be added to this role
+                    exist before adding any, using a single search request.
+
+            parallelism:
+                type: int
+                default: 1
+                description:
+                - Maximum number of permission or user changes to be made
+                  concurrently for this role.
+
+    max_workers:
+        type: int
+        default: 8
+        description:
+        - Maximum number of roles to be processed concurrently.
+        - >
+            Concurrent requests are only effective with C(persistent_connections),
+            which is enabled by default for this module.
+
+version_added: 0.4.0
+author: Rohan McGovern (@rohanpm)
+extends_documentation_fragment: release_engineering.pulp2_api.base_options
+"""
+
+RETURN = """
+roles:
+    description: Outcome for each role, in the same order as the C(roles) option.
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        id:
+            description: Identifier of the role.
+            type: str
+        changed:
+            description: Whether this role was (or would be) changed.
+            type: bool
+        failed:
+            description: Whether processing this role failed.
+            type: bool
+        msg:
+            description: A message relating to this role, if any.
+            type: str
+        user_changes:
+            description: As for the C(pulp_role) module.
+            type: dict
+            returned: when users of this role were adjusted
+        errors:
+            description: >
+                Errors from each failed permission or user change of this role.
+            type: list
+            elements: str
+            returned: when any permission or user changes of this role failed
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.bulk import (
+    BULK_ARGUMENTS,
+    BulkModule,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.role import (
+    ROLE_ARGUMENTS,
+    RoleModule,
+)
+
+
+class RolesModule(BulkModule):
+    ITEM_CLASS = RoleModule
+    ITEMS_PARAM = "roles"
+    ITEM_KEY = "id"
+    ITEM_RESULT_KEYS = ("user_changes", "errors")
+
+    def __init__(self):
+        super().__init__(
+            AnsibleModule(
+                argument_spec=dict(
+                    roles=dict(
+                        type="list",
+                        elements="dict",
+                        required=True,
+                        options=ROLE_ARGUMENTS,
+                    ),
+                    **BULK_ARGUMENTS,
+                    **COMMON_ARGUMENTS,
+                ),
+                supports_check_mode=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    RolesModule().run()  # pragma: no cover
@@ -32,7 +32,8 @@ options:
         - If unset or blank, the password is not managed.
         - >
             If set, the user account will always be updated, since it is not
-            possible for ansible to determine the current password.
+            possible for ansible to determine the current password, unless
+            C(password_state_dir) is set or C(password_update_mode=verify).
 
     randomize_password:
         type: bool
@@ -44,6 +45,49 @@ options:
             disables password authentication for the account.
         - Conflicts with a non-blank C(password).
 
+    password_state_dir:
+        type: path
+        description:
+        - >
+            If set, fingerprints of passwords applied to users are stored in
+            this directory, on the host where the module runs.
+        - >
+            The password of a user is then only updated if it differs from the
+            password last applied via this directory.
+        - >
+            Each fingerprint is a salted, slow hash of the password. Nonetheless,
+            the directory should not be readable by untrusted users.
+        - >
+            Passwords changed by other means than this collection will not be
+            detected.
+        version_added: 0.4.0
+
+    force_password_update:
+        type: bool
+        default: false
+        description:
+        - >
+            If true, the password is updated even if it's known to be applied
+            already according to C(password_state_dir) or
+            C(password_update_mode).
+        version_added: 0.4.0
+
+    password_update_mode:
+        type: str
+        choices:
+        - always
+        - verify
+        default: always
+        description:
+        - How to determine whether the password of an existing user must be updated.
+        - C(always) updates the password, unless known to be applied already
+          according to C(password_state_dir).
+        - >
+            C(verify) additionally attempts to log in to Pulp as the user with
+            the password, and only updates the password if that fails.
+            This costs one request per user, but avoids writes.
+        version_added: 0.4.0
+
     state:
         type: str
         choices:
@@ -58,130 +102,22 @@ author: Rohan McGovern (@rohanpm)
 extends_documentation_fragment: release_engineering.pulp2_api.base_options
 """
 
-import secrets
+RETURN = """
+password_status:
+    description:
+    - How the password of the user was handled.
+    - C(updated) if the password was (or would be) set.
+    - C(unchanged) if the password was known to be applied already according to
+      C(password_state_dir).
+    - C(verified) if the password was verified to work by logging in as the user.
+    returned: when a password was requested for an existing or created user
+    type: str
+    sample: verified
+"""
 
-from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
-    COMMON_ARGUMENTS,
-    LOG,
-    BaseModule,
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.user import (
+    UserModule,
 )
 
-
-class UserModule(BaseModule):
-    def __init__(self):
-        super().__init__(
-            AnsibleModule(
-                argument_spec=dict(
-                    login=dict(required=True, type="str"),
-                    name=dict(type="str"),
-                    password=dict(type="str", default="", no_log=True),
-                    randomize_password=dict(type=bool, default=False, no_log=False),
-                    state=dict(
-                        type="str", default="present", choices=["present", "absent"]
-                    ),
-                    **COMMON_ARGUMENTS,
-                ),
-                supports_check_mode=True,
-            )
-        )
-
-    @property
-    def login(self):
-        return self.module.params["login"]
-
-    @property
-    def name(self):
-        return self.module.params.get("name") or self.login
-
-    @property
-    def password(self):
-        randomize = self.module.params["randomize_password"]
-        password = self.module.params["password"]
-        if randomize and password:
-            self.module.fail_json(
-                msg="usage error: cannot set both 'password' and 'randomize_password'"
-            )
-
-        if randomize:
-            return self.random_password()
-
-        return password or None
-
-    def random_password(self):
-        LOG.info("Generating a random password for %s", self.login)
-        return secrets.token_urlsafe(64)
-
-    @property
-    def user_url(self):
-        return f"users/{self.login}/"
-
-    def handle_user_absent(self):
-        if self.module.params["state"] == "absent":
-            return
-
-        self.changed = True
-
-        if self.module.check_mode:
-            return self.exit_ok(msg="would create user (check mode)")
-
-        # When creating a user, we consider a password mandatory, because otherwise
-        # Pulp will default it to the literal string "None" (probably unintentional?)
-        #
-        # If caller asks for a new account and doesn't explicitly set a password, we
-        # use a random one to effectively disable password auth.
-        password = self.password or self.random_password()
-
-        body = {
-            "login": self.login,
-            "name": self.name,
-            "password": password,
-        }
-
-        # Create the user now
-        self.update_resource("users/", body)
-
-    def delete_user(self):
-        self.changed = True
-
-        if self.module.check_mode:
-            return self.exit_ok(msg="would delete user (check mode)")
-
-        self.delete_resource(self.user_url)
-
-    def handle_user_present(self, current_user):
-        if self.module.params["state"] == "absent":
-            return self.delete_user()
-
-        delta = {}
-
-        if current_user.get("name") != self.name:
-            delta["name"] = self.name
-
-        password = self.password
-        if password is not None:
-            delta["password"] = password
-
-        if delta:
-            self.changed = True
-
-            if self.module.check_mode:
-                return self.exit_ok(msg="would update user (check mode)")
-
-            # Update it
-            self.update_resource(self.user_url, dict(delta=delta), method="PUT")
-
-    def run_module(self):
-        current_user = self.get_resource(self.user_url)
-        LOG.info("User now: %s", current_user)
-
-        if current_user is None:
-            self.handle_user_absent()
-        else:
-            self.handle_user_present(current_user)
-
-        self.exit_ok()
-
-
 if __name__ == "__main__":
     UserModule().run()  # pragma: no cover
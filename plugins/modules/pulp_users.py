@@ -0,0 +1,165 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2021, Red Hat, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = """
+---
+module: pulp_users
+short_description: Manage many users in Pulp 2.x
+description:
+- Creates, updates or deletes any number of users in Pulp 2.x.
+- Each user is handled with the same rules as the C(pulp_user) module.
+- Users are processed concurrently, which is much faster than using
+  C(pulp_user) in a loop.
+- When managing many users, the current state of all users is fetched with
+  a single request rather than one request per user.
+- Uses Pulp's API.
+
+options:
+    users:
+        required: true
+        type: list
+        elements: dict
+        description:
+        - List of users to manage.
+        suboptions:
+            login:
+                required: true
+                type: str
+                description:
+                - Unique login for the user.
+
+            name:
+                type: str
+                description:
+                - Arbitrary user-oriented name for the account.
+
+            password:
+                type: str
+                description:
+                - Password for the account.
+                - If unset or blank, the password is not managed.
+                - >
+                    If set, the user account will always be updated, since it is not
+                    possible for ansible to determine the current password, unless
+                    C(password_state_dir) is set.
+
+            randomize_password:
+                type: bool
+                default: false
+                description:
+                - If true, a strong random password will be set.
+                - Conflicts with a non-blank C(password).
+
+            state:
+                type: str
+                choices:
+                - absent
+                - present
+                description:
+                - Defines whether this user should exist.
+                default: present
+
+    password_state_dir:
+        type: path
+        description:
+        - As for the C(pulp_user) module, applied to all users.
+
+    force_password_update:
+        type: bool
+        default: false
+        description:
+        - As for the C(pulp_user) module, applied to all users.
+
+    password_update_mode:
+        type: str
+        choices:
+        - always
+        - verify
+        default: always
+        description:
+        - As for the C(pulp_user) module, applied to all users.
+
+    max_workers:
+        type: int
+        default: 8
+        description:
+        - Maximum number of users to be processed concurrently.
+        - >
+            Concurrent requests are only effective with C(persistent_connections),
+            which is enabled by default for this module.
+
+version_added: 0.4.0
+author: Rohan McGovern (@rohanpm)
+extends_documentation_fragment: release_engineering.pulp2_api.base_options
+"""
+
+RETURN = """
+users:
+    description: Outcome for each user, in the same order as the C(users) option.
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        login:
+            description: Login of the user.
+            type: str
+        changed:
+            description: Whether this user was (or would be) changed.
+            type: bool
+        failed:
+            description: Whether processing this user failed.
+            type: bool
+        msg:
+            description: A message relating to this user, if any.
+            type: str
+        password_status:
+            description: As for the C(pulp_user) module.
+            type: str
+            returned: when a password was requested for an existing or created user
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.bulk import (
+    BULK_ARGUMENTS,
+    BulkModule,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.user import (
+    PASSWORD_ARGUMENTS,
+    USER_ARGUMENTS,
+    UserModule,
+)
+
+
+class UsersModule(BulkModule):
+    ITEM_CLASS = UserModule
+    ITEMS_PARAM = "users"
+    ITEM_KEY = "login"
+    ITEM_RESULT_KEYS = ("password_status",)
+
+    def __init__(self):
+        super().__init__(
+            AnsibleModule(
+                argument_spec=dict(
+                    users=dict(
+                        type="list",
+                        elements="dict",
+                        required=True,
+                        options=USER_ARGUMENTS,
+                    ),
+                    **PASSWORD_ARGUMENTS,
+                    **BULK_ARGUMENTS,
+                    **COMMON_ARGUMENTS,
+                ),
+                supports_check_mode=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    UsersModule().run()  # pragma: no cover
@@ -0,0 +1,87 @@
+import contextlib
+import os
+
+from ansible.module_utils.common.parameters import remove_values
+from ansible.plugins.action import ActionBase
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.base import (
+    COMMON_ARGUMENTS,
+)
+from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.bulk import (
+    ItemExit,
+    ItemModule,
+)
+
+
+@contextlib.contextmanager
+def environment(env):
+    # A context manager applying env to os.environ, restoring the original
+    # values on exit.
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update({key: str(value) for (key, value) in env.items()})
+    try:
+        yield
+    finally:
+        for (key, value) in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class ControllerAction(ActionBase):
+    """A base class for action plugins running a module on the controller.
+
+    Modules in this collection only make HTTP requests to pulp_url, so when a
+    task would anyway run on the controller (i.e. with a local connection),
+    the module's logic can be executed directly within the controller process.
+    This avoids the overhead of packaging, transferring and starting a module.
+
+    For any other connection, the module is executed as usual.
+
+    The task's environment (e.g. PULP2_API_LOG) is applied to the controller
+    process while the module runs, as it would be to a module's process.
+
+    Subclasses must set:
+
+    MODULE_CLASS: the BaseModule subclass implementing the module.
+    ARGUMENT_SPEC: the module's argument spec, excluding COMMON_ARGUMENTS.
+    """
+
+    MODULE_CLASS = None
+    ARGUMENT_SPEC = None
+
+    _supports_check_mode = True
+    _supports_async = False
+
+    def run_on_controller(self):
+        return self._connection.transport == "local"
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        if not self.run_on_controller():
+            result.update(self._execute_module(task_vars=task_vars))
+            return result
+
+        (validation, params) = self.validate_argument_spec(
+            argument_spec=dict(**self.ARGUMENT_SPEC, **COMMON_ARGUMENTS)
+        )
+
+        module = ItemModule(params, check_mode=self._task.check_mode)
+
+        # Templated and merged in the same way as for an executed module.
+        env = {}
+        self._compute_environment_string(env)
+
+        try:
+            with environment(env):
+                self.MODULE_CLASS(module).run()
+        except ItemExit as item_exit:
+            result.update(item_exit.result)
+
+        # As AnsibleModule would, return the module arguments minus secrets.
+        no_log_values = validation._no_log_values
+        result["invocation"] = dict(module_args=remove_values(params, no_log_values))
+
+        return result
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+from unittest import mock
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+def make_action(name, args, transport="local", check_mode=False, environment=None):
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.template import Templar
+
+    module = __import__(
+        "ansible_collections.release_engineering.pulp2_api.plugins.action." + name,
+        fromlist=["ActionModule"],
+    )
+
+    task = mock.Mock(
+        args=args, async_val=0, check_mode=check_mode, environment=environment
+    )
+    connection = mock.Mock(transport=transport)
+    loader = DataLoader()
+
+    return module.ActionModule(
+        task=task,
+        connection=connection,
+        play_context=mock.Mock(),
+        loader=loader,
+        templar=Templar(loader=loader),
+    )
+
+
+def test_user_on_controller(fetch_url, fetch_url_calls):
+    action = make_action(
+        "pulp_user",
+        dict(
+            login="my-great-user",
+            password="secret-password",
+            pulp_url="https://pulp.example.com/pulp",
+        ),
+    )
+
+    fetch_url.side_effect = [
+        (Response(login="my-great-user", name="my-great-user"), {"status": 200}),
+        (object(), {"status": 200}),
+    ]
+
+    result = action.run(task_vars={})
+
+    # It should have made the same requests as the module
+    assert fetch_url_calls() == [
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/my-great-user/"},
+        {
+            "data": {"delta": {"password": "secret-password"}},
+            "headers": {"Content-Type": "application/json"},
+            "method": "PUT",
+            "url": "https://pulp.example.com/pulp/users/my-great-user/",
+        },
+    ]
+
+    # It should return the same result as the module
+    assert result["changed"]
+    assert not result.get("failed")
+
+    # The password should not be leaked in the result
+    assert "secret-password" not in json.dumps(result)
+    assert result["invocation"]["module_args"]["login"] == "my-great-user"
+
+
+def test_environment_on_controller(fetch_url, monkeypatch):
+    monkeypatch.delenv("PULP2_API_LOG", raising=False)
+
+    action = make_action(
+        "pulp_role",
+        dict(id="my-great-role", pulp_url="https://pulp.example.com/pulp"),
+        check_mode=True,
+        environment=[{"PULP2_API_LOG": "/some/log/file"}],
+    )
+
+    environ = []
+
+    def fake_fetch_url(*args, **kwargs):
+        environ.append(dict(os.environ))
+        return (object(), {"status": 404})
+
+    fetch_url.side_effect = fake_fetch_url
+
+    result = action.run(task_vars={})
+    assert result["changed"]
+
+    # The task's environment should have applied while the module ran
+    assert environ[0]["PULP2_API_LOG"] == "/some/log/file"
+
+    # But should no longer apply to the controller process
+    assert "PULP2_API_LOG" not in os.environ
+
+
+def test_role_on_controller_check_mode(fetch_url, fetch_url_calls):
+    action = make_action(
+        "pulp_role",
+        dict(id="my-great-role", pulp_url="https://pulp.example.com/pulp"),
+        check_mode=True,
+    )
+
+    fetch_url.side_effect = [(object(), {"status": 404})]
+
+    result = action.run(task_vars={})
+
+    # It should tell us what would happen
+    assert result["changed"]
+    assert result["msg"] == "would create role (check mode)"
+
+    # And only have looked up the role
+    assert fetch_url_calls() == [
+        {"method": "GET", "url": "https://pulp.example.com/pulp/roles/my-great-role/"},
+    ]
+
+
+def test_role_on_controller_fails(fetch_url):
+    action = make_action(
+        "pulp_role",
+        dict(id="my-great-role", pulp_url="https://pulp.example.com/pulp"),
+    )
+
+    fetch_url.side_effect = [(None, {"status": 500})]
+
+    result = action.run(task_vars={})
+
+    # It should fail in the same way as the module
+    assert result["failed"]
+    assert (
+        result["msg"] == "unexpected status 500 from URL "
+        "https://pulp.example.com/pulp/roles/my-great-role/"
+    )
+
+
+def test_invalid_args(fetch_url):
+    from ansible.errors import AnsibleActionFail
+
+    action = make_action("pulp_user", dict(pulp_url="https://pulp.example.com/pulp"))
+
+    # It should fail due to missing 'login'
+    with pytest.raises(AnsibleActionFail) as excinfo:
+        action.run(task_vars={})
+
+    assert "login" in str(excinfo.value)
+
+
+def test_remote_executes_module(fetch_url):
+    action = make_action(
+        "pulp_user",
+        dict(login="my-great-user", pulp_url="https://pulp.example.com/pulp"),
+        transport="ssh",
+    )
+
+    with mock.patch.object(action, "_execute_module") as execute_module:
+        execute_module.return_value = {"changed": False}
+        result = action.run(task_vars={"some": "var"})
+
+    # It should have executed the module on the remote host as usual
+    execute_module.assert_called_once_with(task_vars={"some": "var"})
+    assert result == {"changed": False}
+
+    # And made no requests itself
+    fetch_url.assert_not_called()
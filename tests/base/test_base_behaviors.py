@@ -1,4 +1,5 @@
 import io
+import json
 import logging
 import os
 from unittest import mock
@@ -28,10 +29,11 @@ def test_enables_logs(module_utils_base, set_module_params, monkeypatch):
     # It should succeed
     assert excinfo.value.code == 0
 
-    # It should have configured loggers
-    mock_basicConfig.assert_called_once_with(
-        level=logging.INFO, filename="/some/log/file"
-    )
+    # It should have configured loggers, to write JSON to the file
+    mock_basicConfig.assert_called_once_with(level=logging.INFO, handlers=mock.ANY)
+    (handler,) = mock_basicConfig.mock_calls[0].kwargs["handlers"]
+    assert handler.baseFilename == "/some/log/file"
+    assert isinstance(handler.formatter, module_utils_base.JSONFormatter)
 
 
 def test_is_abc(module_utils_base):
@@ -39,3 +41,40 @@ def test_is_abc(module_utils_base):
 
     with pytest.raises(NotImplementedError):
         module.run()
+
+
+def test_get_resource_fields(module_utils_base, set_module_params, fetch_url, caplog):
+    role = dict(
+        id="big-role",
+        display_name="Big role",
+        users=["user-%s" % i for i in range(10000)],
+    )
+    got = []
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            got.append(self.get_resource("roles/big-role/", fields=["display_name"]))
+            got.append(self.get_resource("roles/big-role/"))
+
+    set_module_params(pulp_url="https://pulp.example.com/")
+    fetch_url.side_effect = lambda *_, **__: (
+        io.BytesIO(json.dumps(role).encode()),
+        {"status": 200},
+    )
+
+    # It should run and exit
+    with caplog.at_level(logging.INFO, "release_engineering.pulp2_api"):
+        with pytest.raises(SystemExit) as excinfo:
+            MyModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should have returned only the requested fields, or everything
+    assert got == [{"display_name": "Big role"}, role]
+
+    # Logged resources should have been truncated
+    assert caplog.records
+    assert max(len(r.getMessage()) for r in caplog.records) < 1000
@@ -0,0 +1,279 @@
+import json
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from ansible.module_utils.basic import AnsibleModule
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server.requests.append(
+            (
+                self.command,
+                self.path,
+                self.client_address,
+                self.headers.get("Authorization"),
+                self.headers.get("User-Agent"),
+            )
+        )
+
+        if self.path == "/redirect":
+            return self.respond(302, headers={"Location": "/hello"})
+
+        if self.path == "/secret" and not self.headers.get("Authorization"):
+            return self.respond(401, headers={"WWW-Authenticate": 'Basic realm="pulp"'})
+
+        if self.path == "/close":
+            self.respond(200, b"closed", headers={"Connection": "close"})
+            self.close_connection = True
+            return
+
+        if self.path == "/drop":
+            # Claim keep-alive, but close the connection anyway.
+            self.respond(200, b"dropped")
+            self.close_connection = True
+            return
+
+        self.respond(200, json.dumps({"path": self.path}).encode())
+
+    do_PUT = do_GET
+    do_POST = do_GET
+    do_DELETE = do_GET
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True
+    )
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def tls_server(tls_files):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(tls_files["server_cert"], tls_files["server_key"])
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
+    httpd.requests = []
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True
+    )
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def base_url(server):
+    return "http://127.0.0.1:%s" % server.server_address[1]
+
+
+@pytest.fixture
+def pool_module(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        pool,
+    )
+
+    yield pool
+
+
+def test_reuses_connections(pool_module, server, base_url):
+    pool = pool_module.ConnectionPool({"http_agent": "test-agent"})
+
+    for i in range(3):
+        (response, info) = pool.fetch_url(f"{base_url}/item/{i}", method="GET")
+        assert info["status"] == 200
+        assert json.load(response) == {"path": f"/item/{i}"}
+
+    pool.close()
+
+    # It should have only opened a single connection
+    assert pool.stats == dict(requests=3, connections_opened=1, connections_reused=2)
+
+    # Server should agree that all requests came over one connection
+    assert len(set(req[2] for req in server.requests)) == 1
+
+    # And it should have passed the user agent
+    assert set(req[4] for req in server.requests) == {"test-agent"}
+
+
+def test_reconnects_dropped(pool_module, server, base_url):
+    pool = pool_module.ConnectionPool({})
+
+    (_, info) = pool.fetch_url(f"{base_url}/drop", method="GET")
+    assert info["status"] == 200
+
+    # The next request should transparently reconnect
+    (response, info) = pool.fetch_url(f"{base_url}/after-drop", method="PUT")
+    assert info["status"] == 200
+    assert json.load(response) == {"path": "/after-drop"}
+
+    assert pool.stats["connections_opened"] == 2
+
+
+def test_follows_redirects(pool_module, server, base_url):
+    pool = pool_module.ConnectionPool({})
+
+    (response, info) = pool.fetch_url(f"{base_url}/redirect", method="GET")
+
+    # It should have followed the redirect
+    assert info["status"] == 200
+    assert info["url"] == f"{base_url}/hello"
+    assert json.load(response) == {"path": "/hello"}
+
+    # But not for a POST
+    (_, info) = pool.fetch_url(f"{base_url}/redirect", method="POST", data="{}")
+    assert info["status"] == 302
+
+
+@pytest.mark.parametrize("force_basic_auth", ["yes", None])
+def test_basic_auth(pool_module, server, base_url, force_basic_auth):
+    pool = pool_module.ConnectionPool(
+        dict(
+            url_username="admin",
+            url_password="secret",
+            force_basic_auth=force_basic_auth,
+        )
+    )
+
+    (_, info) = pool.fetch_url(f"{base_url}/secret", method="GET")
+
+    # It should be able to authenticate, with or without a challenge
+    assert info["status"] == 200
+    assert server.requests[-1][3] == "Basic YWRtaW46c2VjcmV0"
+    assert len(server.requests) == (1 if force_basic_auth else 2)
+
+
+def test_tls_session_resumption(pool_module, tls_server):
+    base_url = "https://127.0.0.1:%s" % tls_server.server_address[1]
+    pool = pool_module.ConnectionPool({"validate_certs": False})
+
+    # The server closes the connection after each request
+    for _ in range(3):
+        (response, info) = pool.fetch_url(f"{base_url}/close", method="GET")
+        assert info["status"] == 200
+        assert response.read() == b"closed"
+
+    pool.close()
+
+    # It should have made a handshake per connection, but resumed the session
+    # of the first connection for the others
+    assert pool.stats["connections_opened"] == 3
+    assert pool.tls_stats["handshakes"] == 3
+    assert pool.tls_stats["sessions_resumed"] == 2
+    assert pool.tls_stats["handshake_seconds"] > 0
+
+    # Another pool with the same settings should share the SSL context
+    other = pool_module.ConnectionPool({"validate_certs": False})
+    assert other.ssl_context is pool.ssl_context
+
+
+def test_connection_error(pool_module):
+    pool = pool_module.ConnectionPool({})
+
+    # Connecting to a port where nothing is listening
+    (response, info) = pool.fetch_url("http://127.0.0.1:1/", method="GET")
+
+    # It should give an error in the same style as fetch_url
+    assert response is None
+    assert info["status"] == -1
+    assert info["msg"].startswith("Request failed:")
+
+
+def test_module_uses_pool(
+    module_utils_base, set_module_params, server, base_url, fetch_url, out_reader
+):
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            for i in range(5):
+                assert self.get_resource(f"item/{i}") == {"path": f"/item/{i}"}
+            self.update_resource("item/0", {})
+            self.delete_resource("item/0")
+
+    set_module_params(pulp_url=base_url, persistent_connections=True)
+
+    # It should run and exit
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should not have used fetch_url
+    fetch_url.assert_not_called()
+
+    # It should tell us how the connections were used
+    assert out_reader()["connection_stats"] == dict(
+        requests=7, connections_opened=1, connections_reused=6
+    )
+
+
+@pytest.mark.parametrize(
+    "many_requests,proxy,expected",
+    [(False, None, False), (True, None, True), (True, "http://proxy:3128", False)],
+)
+def test_pool_by_default(
+    module_utils_base,
+    set_module_params,
+    server,
+    base_url,
+    fetch_url,
+    out_reader,
+    monkeypatch,
+    many_requests,
+    proxy,
+    expected,
+):
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        @property
+        def many_requests(self):
+            return many_requests
+
+        def run_module(self):
+            self.result["pool"] = self.pool is not None
+
+    for var in ("http_proxy", "HTTP_PROXY", "no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(var, raising=False)
+    if proxy:
+        monkeypatch.setenv("http_proxy", proxy)
+
+    set_module_params(pulp_url=base_url)
+
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    assert excinfo.value.code == 0
+
+    # The pool should be used for modules making many requests, unless a
+    # proxy is configured
+    assert out_reader()["pool"] == expected
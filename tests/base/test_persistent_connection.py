@@ -0,0 +1,116 @@
+import json
+from unittest import mock
+
+import pytest
+from ansible.module_utils import connection
+from ansible.module_utils.basic import AnsibleModule
+
+
+@pytest.fixture
+def mock_connection():
+    with mock.patch("ansible.module_utils.connection.Connection") as mock_class:
+        yield mock_class
+
+
+def test_uses_persistent_connection(
+    module_utils_base, set_module_params, fetch_url, mock_connection, out_reader
+):
+    got = []
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(dict(pulp_url=dict(type=str))))
+
+        def run_module(self):
+            got.append(self.get_resource("foo/bar/?x=y"))
+            self.update_resource("foo/bar/", {"some": "data"}, method="PUT")
+            self.delete_resource("foo/baz/")
+
+    set_module_params(
+        pulp_url="https://pulp2.example.com/pulp/api/v2/",
+        _ansible_socket="/some/socket",
+    )
+
+    send_request = mock_connection.return_value.send_request
+    send_request.side_effect = [
+        (200, json.dumps({"hello": "world"})),
+        (201, ""),
+        (404, "not found"),
+    ]
+
+    # It should run and exit
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    # It should succeed
+    assert excinfo.value.code == 0
+
+    # It should have parsed the response
+    assert got == [{"hello": "world"}]
+
+    # It should not have used fetch_url at all
+    fetch_url.assert_not_called()
+
+    # It should have sent all requests over the persistent connection
+    mock_connection.assert_called_with("/some/socket")
+    assert send_request.mock_calls == [
+        mock.call("/pulp/api/v2/foo/bar/?x=y", method="GET", data=None, headers=None),
+        mock.call(
+            "/pulp/api/v2/foo/bar/",
+            method="PUT",
+            data='{"some": "data"}',
+            headers={"Content-Type": "application/json"},
+        ),
+        mock.call("/pulp/api/v2/foo/baz/", method="DELETE", data=None, headers=None),
+    ]
+
+
+def test_persistent_connection_error(
+    module_utils_base, set_module_params, mock_connection, out_reader
+):
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(dict(pulp_url=dict(type=str))))
+
+        def run_module(self):
+            self.get_resource("foo/bar/")
+
+    set_module_params(
+        pulp_url="https://pulp2.example.com/",
+        _ansible_socket="/some/socket",
+    )
+
+    mock_connection.return_value.send_request.side_effect = connection.ConnectionError(
+        "socket is gone"
+    )
+
+    # It should run and exit
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    # It should have failed
+    assert excinfo.value.code != 0
+    assert (
+        out_reader()["msg"]
+        == "unexpected status -1 from URL https://pulp2.example.com/foo/bar/"
+    )
+
+
+def test_httpapi_plugin():
+    pytest.importorskip("ansible_collections.ansible.netcommon")
+
+    from ansible.module_utils.six.moves.urllib.error import HTTPError
+    from ansible_collections.release_engineering.pulp2_api.plugins.httpapi import (
+        pulp2,
+    )
+
+    conn = mock.Mock()
+    plugin = pulp2.HttpApi(conn)
+
+    # Error responses should be passed through rather than raised
+    error = HTTPError("https://pulp.example.com/x", 404, "Not Found", {}, None)
+    assert plugin.handle_httperror(error) is error
+
+    conn.send.return_value = (error, mock.Mock(getvalue=lambda: b"missing"))
+    assert plugin.send_request("/x") == (404, "missing")
+    conn.send.assert_called_once_with("/x", None, method="GET", headers={})
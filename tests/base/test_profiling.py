@@ -0,0 +1,120 @@
+import io
+import json
+import pstats
+import sys
+import tracemalloc
+
+import pytest
+
+
+def fake_fetch_url(module, url, method, **kwargs):
+    if method == "GET":
+        body = json.dumps(dict(id="my-role", display_name="my-role"))
+        return (io.BytesIO(body.encode()), {"status": 200})
+    return (io.BytesIO(b"null"), {"status": 200})
+
+
+def test_profile(pulp_role, set_module_params, fetch_url, tmp_path, monkeypatch):
+    monkeypatch.setenv("PULP2_API_PROFILE", str(tmp_path / "profile"))
+    monkeypatch.setenv("PULP2_API_TRACEMALLOC", str(tmp_path / "tracemalloc"))
+
+    set_module_params(
+        id="my-role",
+        pulp_url="https://pulp.example.com/pulp/",
+        persistent_connections=False,
+        users=["alice", "bob", "carol"],
+        parallelism=3,
+    )
+    fetch_url.side_effect = fake_fetch_url
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should have written one profile, named by module and role
+    [profile] = list((tmp_path / "profile").iterdir())
+    assert profile.name.startswith("RoleModule-my-role-")
+    assert profile.name.endswith(".pstats")
+
+    # The profile should include functions called in the main thread and in
+    # other threads
+    functions = {name for (_, _, name) in pstats.Stats(str(profile)).stats}
+    assert "run_module" in functions
+    assert "add_user" in functions
+
+    # It should have written one allocation snapshot
+    [snapshot] = list((tmp_path / "tracemalloc").iterdir())
+    assert snapshot.name.startswith("RoleModule-my-role-")
+    assert tracemalloc.Snapshot.load(str(snapshot)).traces
+
+    # Tracing should have stopped
+    assert not tracemalloc.is_tracing()
+
+
+def test_no_profile(pulp_role, set_module_params, fetch_url, monkeypatch):
+    monkeypatch.delenv("PULP2_API_PROFILE", raising=False)
+    monkeypatch.delenv("PULP2_API_TRACEMALLOC", raising=False)
+
+    set_module_params(id="my-role", pulp_url="https://pulp.example.com/pulp/")
+    fetch_url.side_effect = fake_fetch_url
+
+    module = pulp_role.RoleModule()
+    with pytest.raises(SystemExit) as excinfo:
+        module.run()
+
+    assert excinfo.value.code == 0
+
+    # Module should not have been profiled
+    assert module.profiler is None
+
+
+def test_profile_threads(module_utils_base, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.profiling import (
+        Profiler,
+    )
+
+    def in_thread(x):
+        return x * 2
+
+    profiler = Profiler(str(tmp_path))
+
+    # It should be possible to profile calls in many threads at once (which
+    # is not possible with one profile per thread since Python 3.12)
+    with profiler.profile("threads"):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(profiler.wrap(in_thread), range(8))) == list(
+                range(0, 16, 2)
+            )
+
+    # Calls from the threads should have been included in the profile
+    [profile] = list(tmp_path.iterdir())
+    functions = {name for (_, _, name) in pstats.Stats(str(profile)).stats}
+    assert "in_thread" in functions
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="needs Python 3.12+")
+def test_profile_already_active(module_utils_base, tmp_path):
+    import cProfile
+
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils.profiling import (
+        Profiler,
+    )
+
+    profiler = Profiler(str(tmp_path))
+    outer = cProfile.Profile()
+
+    # If another profiler is already active, the code should still run,
+    # unprofiled
+    outer.enable()
+    try:
+        with profiler.profile("nested"):
+            ran = True
+    finally:
+        outer.disable()
+
+    assert ran
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+def reconcile(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        reconcile,
+    )
+
+    yield reconcile
+
+
+def test_plan_permissions(reconcile):
+    current = {
+        "/same/": ["READ"],
+        "/changed/": ["READ", "UPDATE", "DELETE"],
+        "/removed/": ["READ", "READ"],
+        "/empty/": [],
+    }
+    desired = {
+        "/same/": ["READ"],
+        "/changed/": ["EXECUTE", "READ", "CREATE"],
+        "/added/": ["READ"],
+        "/empty/": [],
+    }
+
+    (to_revoke, to_grant) = reconcile.plan_permissions(current, desired)
+
+    # It should give minimal changes, ordered by resource, with ops in input order
+    assert to_revoke == [("/changed/", ["UPDATE", "DELETE"]), ("/removed/", ["READ"])]
+    assert to_grant == [("/added/", ["READ"]), ("/changed/", ["EXECUTE", "CREATE"])]
+
+
+def test_plan_permissions_noop(reconcile):
+    perms = {"/a/": ["READ", "UPDATE"]}
+
+    assert reconcile.plan_permissions(perms, {"/a/": ["UPDATE", "READ"]}) == ([], [])
+    assert reconcile.plan_permissions(None, {}) == ([], [])
+
+
+def test_plan_members(reconcile):
+    (to_remove, to_add) = reconcile.plan_members(
+        ["carol", "alice", "bob", "alice"], ["dave", "bob", "alice", "eve"]
+    )
+
+    # It should give sorted, minimal changes
+    assert to_remove == ["carol"]
+    assert to_add == ["dave", "eve"]
+
+
+def test_plan_members_large(reconcile):
+    current = [f"user-{i}" for i in range(100000)]
+    desired = [f"user-{i}" for i in range(1000, 101000)]
+
+    (to_remove, to_add) = reconcile.plan_members(current, desired)
+
+    assert to_remove == sorted(f"user-{i}" for i in range(1000))
+    assert to_add == sorted(f"user-{i}" for i in range(100000, 101000))
@@ -0,0 +1,304 @@
+import io
+import json
+import time
+
+import pytest
+from ansible.module_utils.basic import AnsibleModule
+
+
+@pytest.fixture
+def cache_module(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        cache,
+    )
+
+    yield cache
+
+
+def test_cache_expiry(cache_module, tmp_path, monkeypatch):
+    cache = cache_module.ResourceCache(str(tmp_path), ttl=10)
+
+    cache.put("https://pulp.example.com/users/a/", {"login": "a"})
+
+    # It should be able to get the value back
+    assert cache.get("https://pulp.example.com/users/a/") == (True, {"login": "a"})
+    assert cache.get("https://pulp.example.com/users/b/") == (False, None)
+
+    # Another instance using the same directory should see the same value
+    other = cache_module.ResourceCache(str(tmp_path), ttl=10)
+    assert other.get("https://pulp.example.com/users/a/") == (True, {"login": "a"})
+
+    # After the TTL, the value should be gone
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("https://pulp.example.com/users/a/") == (False, None)
+
+
+def test_cache_lru(cache_module, tmp_path, monkeypatch):
+    cache = cache_module.ResourceCache(str(tmp_path), ttl=100, max_entries=2)
+
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    def tick():
+        clock[0] += 1
+
+    cache.put("a", 1)
+    tick()
+    cache.put("b", 2)
+    tick()
+
+    # Use 'a', so 'b' is least recently used
+    assert cache.get("a") == (True, 1)
+    tick()
+
+    cache.put("c", 3)
+
+    # 'b' should have been evicted
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+
+
+def test_cache_get_no_rewrite(cache_module, tmp_path):
+    cache = cache_module.ResourceCache(str(tmp_path), ttl=10)
+
+    cache.put("https://pulp.example.com/users/a/", {"login": "a"})
+
+    # Each entry should be held in its own file
+    [path] = tmp_path.glob("*.json")
+    before = path.stat()
+
+    # Getting an entry should not rewrite its file
+    assert cache.get("https://pulp.example.com/users/a/") == (True, {"login": "a"})
+    after = path.stat()
+    assert after.st_ino == before.st_ino
+    assert after.st_size == before.st_size
+
+
+def test_cache_fields(cache_module, tmp_path):
+    cache = cache_module.ResourceCache(str(tmp_path), ttl=10)
+
+    cache.put("roles/a/", {"users": []}, fields=["users"])
+    cache.put("roles/b/", {"users": [], "id": "b"})
+
+    # A partial entry should only be used where it has all requested fields
+    assert cache.get("roles/a/", ["users"]) == (True, {"users": []})
+    assert cache.get("roles/a/", ["users", "id"]) == (False, None)
+    assert cache.get("roles/a/") == (False, None)
+
+    # A complete entry can be used for any fields
+    assert cache.get("roles/b/", ["users"]) == (True, {"users": [], "id": "b"})
+    assert cache.get("roles/b/") == (True, {"users": [], "id": "b"})
+
+
+def test_module_cache(
+    module_utils_base,
+    set_module_params,
+    fetch_url,
+    fetch_url_calls,
+    tmp_path,
+    monkeypatch,
+):
+    got = []
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            got.append(self.get_resource("roles/my-role/"))
+            if self.module.params["http_agent"] == "writer":
+                self.update_resource("roles/my-role/users/", {"login": "a"})
+
+    monkeypatch.setenv("PULP2_API_CACHE_DIR", str(tmp_path))
+
+    def fn(module, url, method, **kwargs):
+        if method == "GET":
+            return (io.BytesIO(json.dumps({"id": "my-role"}).encode()), {"status": 200})
+        return (object(), {"status": 200})
+
+    fetch_url.side_effect = fn
+
+    def run(**kwargs):
+        set_module_params(
+            pulp_url="https://pulp.example.com/pulp/", cache_ttl=60, **kwargs
+        )
+        with pytest.raises(SystemExit) as excinfo:
+            MyModule().run()
+        assert excinfo.value.code == 0
+
+    # Run the module several times
+    run()
+    run()
+    run(http_agent="writer")
+    run()
+
+    # It should have returned the same data every time
+    assert got == [{"id": "my-role"}] * 4
+
+    # It should have fetched the role only on first run, then again
+    # after it was modified by a user being added.
+    assert [(c["method"], c["url"]) for c in fetch_url_calls()] == [
+        ("GET", "https://pulp.example.com/pulp/roles/my-role/"),
+        ("POST", "https://pulp.example.com/pulp/roles/my-role/users/"),
+        ("GET", "https://pulp.example.com/pulp/roles/my-role/"),
+    ]
+
+
+def test_module_cache_invalidate_after_write(
+    module_utils_base,
+    set_module_params,
+    fetch_url,
+    fetch_url_calls,
+    tmp_path,
+    monkeypatch,
+):
+    got = []
+    modules = []
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            modules.append(self)
+            got.append(self.get_resource("roles/my-role/"))
+            if self.module.params["http_agent"] == "writer":
+                self.update_resource("roles/my-role/users/", {"login": "a"})
+
+    monkeypatch.setenv("PULP2_API_CACHE_DIR", str(tmp_path))
+
+    def fn(module, url, method, **kwargs):
+        if method == "GET":
+            return (io.BytesIO(json.dumps({"id": "my-role"}).encode()), {"status": 200})
+
+        # Simulate another task caching the role while it's being modified
+        modules[-1].cache.put(
+            "https://pulp.example.com/pulp/roles/my-role/", {"id": "stale"}
+        )
+        return (object(), {"status": 200})
+
+    fetch_url.side_effect = fn
+
+    def run(**kwargs):
+        set_module_params(
+            pulp_url="https://pulp.example.com/pulp/", cache_ttl=60, **kwargs
+        )
+        with pytest.raises(SystemExit) as excinfo:
+            MyModule().run()
+        assert excinfo.value.code == 0
+
+    run(http_agent="writer")
+    run()
+
+    # It should not have used the data cached during the write
+    assert got == [{"id": "my-role"}] * 2
+    assert [(c["method"], c["url"]) for c in fetch_url_calls()] == [
+        ("GET", "https://pulp.example.com/pulp/roles/my-role/"),
+        ("POST", "https://pulp.example.com/pulp/roles/my-role/users/"),
+        ("GET", "https://pulp.example.com/pulp/roles/my-role/"),
+    ]
+
+
+def test_module_cache_identity(
+    module_utils_base,
+    set_module_params,
+    fetch_url,
+    fetch_url_calls,
+    tmp_path,
+    monkeypatch,
+):
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            self.get_resource("roles/my-role/")
+            if self.module.params["http_agent"] == "writer":
+                self.update_resource("roles/my-role/users/", {"login": "a"})
+
+    monkeypatch.setenv("PULP2_API_CACHE_DIR", str(tmp_path))
+
+    def fn(module, url, method, **kwargs):
+        if method == "GET":
+            return (io.BytesIO(json.dumps({"id": "my-role"}).encode()), {"status": 200})
+        return (object(), {"status": 200})
+
+    fetch_url.side_effect = fn
+
+    def run(**kwargs):
+        set_module_params(
+            pulp_url="https://pulp.example.com/pulp/", cache_ttl=60, **kwargs
+        )
+        with pytest.raises(SystemExit) as excinfo:
+            MyModule().run()
+        assert excinfo.value.code == 0
+
+    def gets():
+        return [c["method"] for c in fetch_url_calls()].count("GET")
+
+    # Data cached for one user should not be used for others
+    run(url_username="admin", url_password="secret")
+    run(url_username="alice", url_password="secret")
+    run(url_username="admin", url_password="wrong")
+    run(client_cert="/some/cert.pem")
+    assert gets() == 4
+
+    # But should be used for the same user
+    run(url_username="alice", url_password="secret")
+    assert gets() == 4
+
+    # A write by any user should invalidate data cached for all users
+    run(url_username="admin", url_password="secret", http_agent="writer")
+    run(url_username="alice", url_password="secret")
+    assert gets() == 5
+
+
+def test_role_user_invalidates_user(
+    module_utils_base,
+    pulp_role,
+    set_module_params,
+    fetch_url,
+    fetch_url_calls,
+    tmp_path,
+    monkeypatch,
+):
+    class GetUser(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            self.get_resource("users/alice/")
+
+    monkeypatch.setenv("PULP2_API_CACHE_DIR", str(tmp_path))
+
+    def fn(module, url, method, **kwargs):
+        if url.endswith("/users/alice/"):
+            return (
+                io.BytesIO(json.dumps({"login": "alice"}).encode()),
+                {"status": 200},
+            )
+        if method == "GET":
+            role = dict(id="my-role", description="deployed by ansible", users=[])
+            return (io.BytesIO(json.dumps(role).encode()), {"status": 200})
+        return (object(), {"status": 200})
+
+    fetch_url.side_effect = fn
+
+    def run(module_class, **kwargs):
+        set_module_params(
+            pulp_url="https://pulp.example.com/pulp/", cache_ttl=60, **kwargs
+        )
+        with pytest.raises(SystemExit) as excinfo:
+            module_class().run()
+        assert excinfo.value.code == 0
+
+    run(GetUser)
+    run(pulp_role.RoleModule, id="my-role", users=["alice"])
+    run(GetUser)
+
+    # The user should have been fetched again, since adding them to a role
+    # modifies their roles
+    user_gets = [c for c in fetch_url_calls() if c["url"].endswith("/users/alice/")]
+    assert len(user_gets) == 2
@@ -0,0 +1,195 @@
+import io
+import threading
+import time
+
+import pytest
+from ansible.module_utils.basic import AnsibleModule
+
+
+@pytest.fixture
+def limiter_module(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        limiter,
+    )
+
+    yield limiter
+
+
+@pytest.fixture(autouse=True)
+def no_delay(module_utils_base, monkeypatch):
+    monkeypatch.setattr(module_utils_base, "RETRY_DELAY", 0.0)
+
+
+def run_request(module_utils_base, request_fn):
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            request_fn(self)
+
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    return excinfo.value.code
+
+
+def test_retry_after(module_utils_base, set_module_params, fetch_url):
+    set_module_params(pulp_url="https://pulp.example.com/")
+
+    fetch_url.side_effect = [
+        (io.BytesIO(b"busy"), {"status": 503, "retry-after": "0"}),
+        (io.BytesIO(b"busy"), {"status": 429}),
+        (io.BytesIO(b'{"id": "x"}'), {"status": 200}),
+    ]
+    got = []
+
+    # It should retry and eventually succeed
+    assert (
+        run_request(
+            module_utils_base, lambda self: got.append(self.get_resource("roles/x/"))
+        )
+        == 0
+    )
+    assert got == [{"id": "x"}]
+    assert fetch_url.call_count == 3
+
+
+def test_retry_limit(module_utils_base, set_module_params, fetch_url, out_reader):
+    set_module_params(pulp_url="https://pulp.example.com/", max_retries=2)
+
+    fetch_url.side_effect = None
+    fetch_url.return_value = (io.BytesIO(b"busy"), {"status": 429})
+
+    # It should give up after the configured number of retries
+    assert run_request(module_utils_base, lambda self: self.get_resource("x/")) == 1
+    assert fetch_url.call_count == 3
+    assert (
+        out_reader()["msg"]
+        == "unexpected status 429 from URL https://pulp.example.com/x/"
+    )
+
+
+@pytest.mark.parametrize(
+    "request_fn,expected_calls",
+    [
+        (lambda self: self.update_resource("x/", {}), 1),
+        (lambda self: self.update_resource("x/", {}, method="PUT"), 4),
+        (lambda self: self.delete_resource("x/"), 4),
+    ],
+    ids=["post", "put", "delete"],
+)
+def test_retry_idempotent(
+    module_utils_base, set_module_params, fetch_url, request_fn, expected_calls
+):
+    set_module_params(pulp_url="https://pulp.example.com/")
+
+    fetch_url.side_effect = None
+    fetch_url.return_value = (io.BytesIO(b"bad gateway"), {"status": 502})
+
+    # It should only retry requests which are safe to repeat
+    assert run_request(module_utils_base, request_fn) == 1
+    assert fetch_url.call_count == expected_calls
+
+
+def test_retry_delay(module_utils_base, monkeypatch):
+    monkeypatch.setattr(module_utils_base, "RETRY_DELAY", 1.0)
+    monkeypatch.setattr(time, "time", lambda: 1445412480.0)
+
+    retry_delay = module_utils_base.retry_delay
+
+    # It should back off exponentially, up to a limit
+    assert [retry_delay({}, attempt) for attempt in range(8)] == [
+        1.0,
+        2.0,
+        4.0,
+        8.0,
+        16.0,
+        32.0,
+        60.0,
+        60.0,
+    ]
+
+    # It should honor Retry-After in either format
+    assert retry_delay({"retry-after": "5"}, 3) == 5.0
+    assert retry_delay({"retry-after": "Wed, 21 Oct 2015 07:28:10 GMT"}, 0) == 10.0
+    assert retry_delay({"retry-after": "garbage"}, 0) == 1.0
+
+
+def test_limiter_aimd(limiter_module):
+    limiter = limiter_module.AdaptiveLimiter(initial=2, maximum=4, target_latency=1.0)
+
+    with limiter.slot(), limiter.slot():
+        # It should not grow while requests are slow
+        limiter.succeeded(5.0)
+        assert limiter.limit == 2
+
+        # It should grow while requests are fast, but not beyond one more than
+        # the requests in flight
+        for _ in range(4):
+            limiter.succeeded(0.1)
+        assert limiter.limit == 3
+
+    # It should not exceed the maximum
+    with limiter.slot(), limiter.slot(), limiter.slot():
+        for _ in range(100):
+            limiter.succeeded(0.1)
+    assert limiter.limit == 4
+
+    # It should halve on overload, once for a burst of signals
+    for _ in range(3):
+        limiter.overloaded()
+    assert limiter.limit == 2
+    assert limiter.stats["overloaded"] == 3
+
+
+def test_limiter_backoff_after_idle(limiter_module):
+    limiter = limiter_module.AdaptiveLimiter(initial=4, target_latency=1.0)
+
+    # Many fast requests, made one at a time
+    for _ in range(1000):
+        with limiter.slot():
+            pass
+        limiter.succeeded(0.1)
+
+    # The limit should not have grown, since it was never reached
+    assert limiter.limit == 4
+
+    # A single overload signal should then reduce concurrency
+    limiter.overloaded()
+    assert limiter.limit == 2
+
+    barrier = threading.Barrier(8)
+
+    def request():
+        barrier.wait(timeout=5)
+        with limiter.slot():
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert limiter.stats["max_in_flight"] == 2
+
+
+def test_limiter_concurrency(limiter_module):
+    limiter = limiter_module.AdaptiveLimiter(initial=3, target_latency=0)
+    barrier = threading.Barrier(3)
+
+    def request():
+        with limiter.slot():
+            barrier.wait(timeout=5)
+            time.sleep(0.01)
+            limiter.succeeded(0.01)
+
+    threads = [threading.Thread(target=request) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # It should have run requests concurrently, up to the limit
+    assert limiter.stats["max_in_flight"] == 3
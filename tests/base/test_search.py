@@ -0,0 +1,109 @@
+import io
+import json
+
+import pytest
+from ansible.module_utils.basic import AnsibleModule
+
+
+@pytest.fixture
+def search(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        search,
+    )
+
+    yield search
+
+
+USERS = {
+    f"user-{i:03}": {"login": f"user-{i:03}", "name": f"User {i}"} for i in range(7)
+}
+
+
+def fake_search(module, url, method, data, headers):
+    # A fake of Pulp's users/search/ endpoint.
+    assert method == "POST"
+    assert url == "https://pulp.example.com/pulp/users/search/"
+    assert headers == {"Content-Type": "application/json"}
+
+    criteria = json.loads(data)["criteria"]
+    logins = criteria["filters"]["login"]["$in"]
+    fields = criteria.get("fields")
+
+    out = []
+    for login in logins:
+        if login in USERS:
+            user = USERS[login]
+            if fields:
+                user = {key: user[key] for key in fields}
+            out.append(user)
+
+    return (io.BytesIO(json.dumps(out).encode()), {"status": 200})
+
+
+def run_search(module_utils_base, search, **kwargs):
+    got = []
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            got.append(search.search_resources(self, "users", **kwargs))
+
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    assert excinfo.value.code == 0
+    return got[0]
+
+
+def test_search_chunks(
+    module_utils_base, search, set_module_params, fetch_url, fetch_url_calls
+):
+    set_module_params(pulp_url="https://pulp.example.com/pulp")
+    fetch_url.side_effect = fake_search
+
+    keys = ["user-003", "user-001", "missing", "user-005", "user-001", "user-006"]
+    out = run_search(module_utils_base, search, keys=keys, chunk_size=2)
+
+    # It should find all existing users, indexed by login
+    assert out == {key: USERS[key] for key in keys if key in USERS}
+
+    # It should have looked up unique logins in chunks
+    assert [call["data"]["criteria"] for call in fetch_url_calls()] == [
+        {"filters": {"login": {"$in": ["missing", "user-001"]}}},
+        {"filters": {"login": {"$in": ["user-003", "user-005"]}}},
+        {"filters": {"login": {"$in": ["user-006"]}}},
+    ]
+
+
+def test_search_fields(
+    module_utils_base, search, set_module_params, fetch_url, fetch_url_calls
+):
+    set_module_params(pulp_url="https://pulp.example.com/pulp")
+    fetch_url.side_effect = fake_search
+
+    out = run_search(module_utils_base, search, keys=["user-002"], fields=["name"])
+
+    # It should have requested the given fields and the key
+    assert fetch_url_calls()[0]["data"]["criteria"]["fields"] == ["login", "name"]
+    assert out == {"user-002": USERS["user-002"]}
+
+
+def test_search_error(module_utils_base, search, set_module_params, fetch_url):
+    set_module_params(pulp_url="https://pulp.example.com/pulp")
+    fetch_url.return_value = (io.BytesIO(b"oops"), {"status": 500})
+    fetch_url.side_effect = None
+
+    class MyModule(module_utils_base.BaseModule):
+        def __init__(self):
+            super().__init__(AnsibleModule(module_utils_base.COMMON_ARGUMENTS))
+
+        def run_module(self):
+            search.search_resources(self, "roles", ["a"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        MyModule().run()
+
+    # It should fail
+    assert excinfo.value.code == 1
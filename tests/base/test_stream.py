@@ -0,0 +1,146 @@
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def stream(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        stream,
+    )
+
+    yield stream
+
+
+class CountingReader(io.BytesIO):
+    # Tracks the amount of data read at once.
+    def read(self, size=-1):
+        assert size > 0, "unbounded read"
+        return super().read(size)
+
+
+VALUES = [
+    {"id": "role1", "users": ["alice", "bob"], "permissions": {"/": ["READ"]}},
+    12345,
+    -1.5e10,
+    "unicode: é中\U0001f600",
+    None,
+    True,
+    [],
+    {},
+    [1, [2, [3]]],
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_iter_json_array(stream, chunk_size):
+    data = json.dumps(VALUES, indent=2, ensure_ascii=False).encode("utf-8")
+
+    out = list(stream.iter_json_array(CountingReader(data), chunk_size=chunk_size))
+
+    # It should decode the same values as json.load
+    assert out == VALUES
+
+
+def test_iter_empty(stream):
+    assert list(stream.iter_json_array(io.BytesIO(b" [ ] "))) == []
+
+
+def test_iter_is_lazy(stream):
+    values = [{"n": i, "pad": "x" * 100} for i in range(1000)]
+    fp = io.BytesIO(json.dumps(values).encode())
+
+    it = stream.iter_json_array(fp, chunk_size=256)
+    assert next(it) == values[0]
+
+    # It should not have read the whole stream yet
+    assert fp.tell() < 1024
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"{}", b"[1, 2", b"[1 2]", b"[1, {]", b'["abc'], ids=repr
+)
+def test_iter_invalid(stream, data):
+    with pytest.raises(ValueError):
+        list(stream.iter_json_array(io.BytesIO(data), chunk_size=2))
+
+
+ROLE = {
+    "id": "role1",
+    "_href": "/pulp/api/v2/roles/role1/",
+    "display_name": 'Role "1" \\ [test] {x}',
+    "permissions": {f"/repo/{i}/": ["READ", "UPDATE"] for i in range(100)},
+    "users": [f"user-{i}" for i in range(100)],
+    "options": {"nested": [{"a": "]}"}, [], 1.5e3, None, False]},
+    "description": None,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+@pytest.mark.parametrize(
+    "fields", [("display_name", "description"), ("users",), ("missing",), ()]
+)
+def test_load_json_fields(stream, chunk_size, fields):
+    data = json.dumps(ROLE, indent=1).encode("utf-8")
+
+    out = stream.load_json(CountingReader(data), fields, chunk_size=chunk_size)
+
+    # It should decode only the requested fields
+    assert out == {key: ROLE[key] for key in fields if key in ROLE}
+
+
+def test_load_json_all_fields(stream):
+    data = json.dumps(ROLE).encode("utf-8")
+
+    # It should decode everything when no fields are requested
+    assert stream.load_json(io.BytesIO(data)) == ROLE
+    assert stream.load_json(io.BytesIO(data), ROLE.keys()) == ROLE
+
+
+def test_load_json_skips_large_values(stream):
+    role = {"users": ["x" * 1000] * 1000, "display_name": "big"}
+    data = json.dumps(role).encode("utf-8")
+
+    reader = stream.JSONStreamReader(io.BytesIO(data), chunk_size=1024)
+    assert reader.object(["display_name"]) == {"display_name": "big"}
+
+    # It should never have buffered much more than a single chunk
+    assert len(reader.buf) <= 2048
+
+
+def test_load_json_large_field(stream):
+    # A role with a multi-MB field, as with many users
+    role = {
+        "id": "big",
+        "users": [f"user-{i:07d}" for i in range(300000)],
+        "description": 'long "text" \\ ' * 100000,
+    }
+    data = json.dumps(role).encode("utf-8")
+    assert len(data) > 5000000
+
+    max_buf = []
+
+    class Reader(stream.JSONStreamReader):
+        def read_more(self):
+            more = super().read_more()
+            max_buf.append(len(self.buf))
+            return more
+
+    reader = Reader(CountingReader(data), chunk_size=65536)
+    out = reader.object(["users", "description"])
+
+    # It should decode the same values as json.load
+    assert out == {"users": role["users"], "description": role["description"]}
+
+    # Elements of the large array should have been decoded one at a time, so
+    # the buffer only grew to hold the large string
+    assert max(max_buf) < len(json.dumps(role["description"])) + 2 * 65536
+
+
+@pytest.mark.parametrize(
+    "data", [b"{", b'{"a" 1}', b'{"a": [1, 2}', b'{"a": "abc', b'{"a": "\\'], ids=repr
+)
+def test_load_json_invalid(stream, data):
+    with pytest.raises(ValueError):
+        stream.load_json(io.BytesIO(data), ["b"], chunk_size=2)
@@ -0,0 +1,107 @@
+import io
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def timing(module_utils_base):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        timing,
+    )
+
+    yield timing
+
+
+@pytest.mark.parametrize(
+    "rest,expected",
+    [
+        ("roles/", "roles/"),
+        ("roles/admins/", "roles/{role_id}/"),
+        ("roles/admins/users/alice/", "roles/{role_id}/users/{login}/"),
+        ("users/search/", "users/search/"),
+        ("permissions/actions/grant_to_role/", "permissions/actions/grant_to_role/"),
+    ],
+)
+def test_path_template(timing, rest, expected):
+    assert timing.path_template(rest) == expected
+
+
+def test_role_timings(pulp_role, set_module_params, fetch_url, out_reader):
+    set_module_params(
+        id="my-role",
+        pulp_url="https://pulp.example.com/pulp/",
+        permissions={"/": ["READ"]},
+        users=["alice"],
+        timings=True,
+    )
+
+    def fake_fetch_url(module, url, method, **kwargs):
+        if method == "GET":
+            body = json.dumps(dict(id="my-role", display_name="my-role"))
+            return (io.BytesIO(body.encode()), {"status": 200})
+        return (io.BytesIO(b"null"), {"status": 200})
+
+    fetch_url.side_effect = fake_fetch_url
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 0
+
+    timings = out_reader()["timings"]
+
+    # It should have recorded every request
+    requests = [
+        (r["method"], r["path"], r["status"], r["bytes"]) for r in timings["requests"]
+    ]
+    assert requests == [
+        ("GET", "roles/{role_id}/", 200, 44),
+        ("PUT", "roles/{role_id}/", 200, 4),
+        ("POST", "permissions/actions/grant_to_role/", 200, 4),
+        ("POST", "roles/{role_id}/users/", 200, 4),
+    ]
+    assert all(r["seconds"] >= 0 for r in timings["requests"])
+    assert timings["request_summary"]["GET roles/{role_id}/"]["count"] == 1
+
+    # It should have timed each phase
+    assert set(timings["phases"]) == {"pem_files", "get", "diff", "writes"}
+    assert timings["total_seconds"] >= timings["phases"]["writes"]
+
+
+def test_no_timings(pulp_role, set_module_params, fetch_url, out_reader):
+    set_module_params(id="my-role", pulp_url="https://pulp.example.com/pulp/")
+    fetch_url.side_effect = [(io.BytesIO(b"null"), {"status": 404})] + [
+        (io.BytesIO(b"null"), {"status": 200})
+    ]
+
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should not return timings unless requested
+    assert "timings" not in out_reader()
+
+
+def test_json_log_format(module_utils_base):
+    formatter = module_utils_base.JSONFormatter()
+    record = logging.LogRecord(
+        "release_engineering.pulp2_api",
+        logging.INFO,
+        __file__,
+        1,
+        "GET %s => %s",
+        ("roles/{role_id}/", 200),
+        None,
+    )
+    record.request = dict(method="GET", path="roles/{role_id}/", status=200)
+
+    out = json.loads(formatter.format(record))
+
+    # It should give the message and structured data
+    assert out["level"] == "INFO"
+    assert out["msg"] == "GET roles/{role_id}/ => 200"
+    assert out["request"] == dict(method="GET", path="roles/{role_id}/", status=200)
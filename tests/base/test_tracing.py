@@ -0,0 +1,106 @@
+import io
+import json
+
+import pytest
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+def attributes(span):
+    # Returns a span's attributes as a plain dict.
+    return {attr["key"]: list(attr["value"].values())[0] for attr in span["attributes"]}
+
+
+def read_spans(path):
+    [line] = path.read_text().splitlines()
+    [resource_spans] = json.loads(line)["resourceSpans"]
+    [scope_spans] = resource_spans["scopeSpans"]
+    return scope_spans["spans"]
+
+
+def test_trace(
+    pulp_role, set_module_params, fetch_url, fetch_url_calls, tmp_path, monkeypatch
+):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("PULP2_API_TRACE", str(trace_file))
+    monkeypatch.setenv("TRACEPARENT", f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+    set_module_params(
+        id="my-role",
+        pulp_url="https://pulp.example.com/pulp/",
+        users=["alice"],
+    )
+
+    def fake_fetch_url(module, url, method, **kwargs):
+        if method == "GET":
+            body = json.dumps(dict(id="my-role", display_name="my-role"))
+            return (io.BytesIO(body.encode()), {"status": 200})
+        return (io.BytesIO(b"null"), {"status": 200})
+
+    fetch_url.side_effect = fake_fetch_url
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 0
+
+    spans = read_spans(trace_file)
+    root = spans[-1]
+
+    # The root span should be for the module run, within the given trace
+    assert root["name"] == "RoleModule"
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == PARENT_ID
+    assert attributes(root) == {
+        "pulp2_api.resource_id": "my-role",
+        "pulp2_api.changed": True,
+    }
+
+    # There should be a child span per request
+    requests = spans[:-1]
+    assert [span["name"] for span in requests] == [
+        "GET roles/{role_id}/",
+        "PUT roles/{role_id}/",
+        "POST roles/{role_id}/users/",
+    ]
+    assert all(span["parentSpanId"] == root["spanId"] for span in requests)
+    assert all(span["traceId"] == TRACE_ID for span in requests)
+    assert attributes(requests[0]) == {
+        "http.request.method": "GET",
+        "url.template": "roles/{role_id}/",
+        "server.address": "pulp.example.com",
+        "http.response.status_code": "200",
+        "http.response.body.size": "44",
+    }
+
+    # Each request should have carried the span's context
+    headers = [call["headers"] for call in fetch_url_calls()]
+    assert [h["traceparent"] for h in headers] == [
+        f"00-{TRACE_ID}-{span['spanId']}-01" for span in requests
+    ]
+
+    # Other headers should have been kept
+    assert headers[1]["Content-Type"] == "application/json"
+
+
+def test_trace_error(pulp_role, set_module_params, fetch_url, tmp_path, monkeypatch):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("PULP2_API_TRACE", str(trace_file))
+    monkeypatch.delenv("TRACEPARENT", raising=False)
+
+    set_module_params(id="my-role", pulp_url="https://pulp.example.com/pulp/")
+    fetch_url.side_effect = [(io.BytesIO(b"error"), {"status": 500})]
+
+    # It should fail
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 1
+
+    # Both the request and the module run should be recorded as errors
+    [request, root] = read_spans(trace_file)
+    assert request["status"]["code"] == 2
+    assert root["status"]["code"] == 2
+    assert "parentSpanId" not in root
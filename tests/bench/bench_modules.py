@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Benchmarks running modules against a fake Pulp server.
+
+Usage: python tests/bench/bench_modules.py [--latency SECONDS] [SCENARIO...]
+
+Each scenario runs a module once, in a separate process, against a
+tests/fakepulp.py server adding the given latency to every request.
+Results are written to stdout as JSON.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SRCDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+sys.path.insert(0, os.path.join(SRCDIR, "tests"))
+
+from fakepulp import FakePulp  # noqa: E402
+
+# Fraction of entries which differ between current and desired state.
+CHURN = 0.1
+
+
+def role_users(pulp, parallelism):
+    # A role with 1000 users, of which 10% are replaced.
+    size = 1000
+    churn = int(size * CHURN)
+
+    for i in range(size + churn):
+        pulp.state.add_user(f"user-{i}")
+    pulp.state.add_role("big-role")
+    pulp.state.roles["big-role"]["users"].update(f"user-{i}" for i in range(size))
+
+    return (
+        "pulp_role",
+        dict(
+            id="big-role",
+            users=[f"user-{i}" for i in range(churn, size + churn)],
+            parallelism=parallelism,
+        ),
+    )
+
+
+def role_permissions(pulp, parallelism):
+    # A role with 200 permission paths, of which 10% are replaced.
+    size = 200
+    churn = int(size * CHURN)
+
+    pulp.state.add_role("perm-role")
+    pulp.state.roles["perm-role"]["permissions"] = {
+        f"/v2/repositories/repo-{i}/": {"READ", "UPDATE"} for i in range(size)
+    }
+
+    return (
+        "pulp_role",
+        dict(
+            id="perm-role",
+            permissions={
+                f"/v2/repositories/repo-{i}/": ["READ", "UPDATE"]
+                for i in range(churn, size + churn)
+            },
+            parallelism=parallelism,
+        ),
+    )
+
+
+def users_noop(pulp, parallelism):
+    # 500 users which are already up-to-date.
+    size = 500
+
+    for i in range(size):
+        pulp.state.add_user(f"user-{i}", name=f"User {i}")
+
+    return (
+        "pulp_users",
+        dict(
+            users=[dict(login=f"user-{i}", name=f"User {i}") for i in range(size)],
+            max_workers=parallelism,
+        ),
+    )
+
+
+SCENARIOS = {
+    "role_users": role_users,
+    "role_permissions": role_permissions,
+    "users_noop": users_noop,
+}
+
+
+def make_importable(tmpdir):
+    # Make the collection importable in the same way as tests/conftest.py.
+    os.makedirs(os.path.join(tmpdir, "ansible_collections/release_engineering"))
+    os.symlink(
+        SRCDIR,
+        os.path.join(tmpdir, "ansible_collections/release_engineering/pulp2_api"),
+    )
+
+
+def run_module(tmpdir, module, params):
+    # Runs a module in a new process, returning (result, seconds, peak RSS of
+    # the process in KiB).
+    args_file = os.path.join(tmpdir, "args.json")
+    with open(args_file, "w") as f:
+        json.dump(dict(ANSIBLE_MODULE_ARGS=params), f)
+
+    env = dict(os.environ, PYTHONPATH=tmpdir)
+    env.pop("PULP2_API_LOG", None)
+
+    start = time.monotonic()
+    proc = subprocess.run(
+        [sys.executable, os.path.join(SRCDIR, "plugins/modules", module + ".py")]
+        + [args_file],
+        env=env,
+        stdout=subprocess.PIPE,
+        check=False,
+    )
+    elapsed = time.monotonic() - start
+
+    # This is the peak RSS of any child process so far, so each scenario runs
+    # in its own process; see main().
+    rusage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    result = json.loads(proc.stdout)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} failed: {result.get('msg')}")
+
+    return (result, elapsed, rusage.ru_maxrss)
+
+
+def run_scenario(tmpdir, name, args):
+    with FakePulp(latency=args.latency) as pulp:
+        (module, params) = SCENARIOS[name](pulp, args.parallelism)
+        params.update(pulp_url=pulp.url, timings=True)
+        if args.persistent_connections is not None:
+            params["persistent_connections"] = args.persistent_connections
+
+        (result, elapsed, peak_rss) = run_module(tmpdir, module, params)
+        requests = len(pulp.requests)
+
+    return dict(
+        scenario=name,
+        module=module,
+        changed=result["changed"],
+        wall_seconds=elapsed,
+        module_seconds=result["timings"]["total_seconds"],
+        requests=requests,
+        requests_per_second=requests / elapsed,
+        max_in_flight=pulp.max_in_flight,
+        # ru_maxrss is in KiB on Linux.
+        peak_rss_kb=peak_rss,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        metavar="SCENARIO",
+        help=f"scenarios to run: {', '.join(sorted(SCENARIOS))} (default: all)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="seconds added to each request by the server",
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=8,
+        help="value of parallelism or max_workers for each module",
+    )
+    parser.add_argument(
+        "--persistent-connections",
+        choices=["true", "false"],
+        help="value of persistent_connections for each module (default: unset)",
+    )
+    args = parser.parse_args()
+    unknown = sorted(set(args.scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    if args.persistent_connections is not None:
+        args.persistent_connections = args.persistent_connections == "true"
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        make_importable(tmpdir)
+
+        for name in args.scenarios or sorted(SCENARIOS):
+            # Each scenario runs in a new process, so that the peak RSS of its
+            # module isn't confused with that of earlier scenarios.
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(
+                    executor.submit(run_scenario, tmpdir, name, args).result()
+                )
+
+    json.dump(
+        dict(
+            benchmark="modules",
+            latency=args.latency,
+            parallelism=args.parallelism,
+            persistent_connections=args.persistent_connections,
+            results=results,
+        ),
+        sys.stdout,
+        indent=2,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
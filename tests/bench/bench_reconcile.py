@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmarks computing changes to roles with many users and permissions.
+
+Usage: python tests/bench/bench_reconcile.py [SIZE...]
+
+Results are written to stdout as JSON.
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+SRCDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Fraction of entries which differ between current and desired state.
+CHURN = 0.1
+
+REPEAT = 5
+
+
+def import_reconcile(tmpdir):
+    # Make the collection importable in the same way as tests/conftest.py.
+    os.makedirs(os.path.join(tmpdir, "ansible_collections/release_engineering"))
+    os.symlink(
+        SRCDIR,
+        os.path.join(tmpdir, "ansible_collections/release_engineering/pulp2_api"),
+    )
+    sys.path.insert(0, tmpdir)
+
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        reconcile,
+    )
+
+    return reconcile
+
+
+def make_state(size):
+    churn = int(size * CHURN)
+
+    current_users = [f"user-{i}" for i in range(size)]
+    desired_users = [f"user-{i}" for i in range(churn, size + churn)]
+
+    current_perms = {f"/repo/{i}/": ["READ", "UPDATE"] for i in range(size)}
+    desired_perms = {
+        f"/repo/{i}/": ["READ", "DELETE"] for i in range(churn, size + churn)
+    }
+
+    return (current_users, desired_users, current_perms, desired_perms)
+
+
+def bench(fn):
+    # Returns the best time of several runs, in seconds.
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reconcile = import_reconcile(tmpdir)
+
+        for size in sizes:
+            (current_users, desired_users, current_perms, desired_perms) = make_state(
+                size
+            )
+            results.append(
+                dict(
+                    size=size,
+                    churn=CHURN,
+                    plan_members_seconds=bench(
+                        lambda: reconcile.plan_members(current_users, desired_users)
+                    ),
+                    plan_permissions_seconds=bench(
+                        lambda: reconcile.plan_permissions(current_perms, desired_perms)
+                    ),
+                )
+            )
+
+    json.dump(dict(benchmark="reconcile", results=results), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
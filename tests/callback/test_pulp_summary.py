@@ -0,0 +1,225 @@
+import json
+from unittest import mock
+
+import pytest
+import yaml
+
+
+@pytest.fixture
+def pulp_summary():
+    from ansible_collections.release_engineering.pulp2_api.plugins.callback import (
+        pulp_summary,
+    )
+
+    yield pulp_summary
+
+
+@pytest.fixture
+def make_callback(pulp_summary):
+    from ansible import constants as C
+
+    # Register the plugin's options as the plugin loader would.
+    options = yaml.safe_load(pulp_summary.DOCUMENTATION)["options"]
+    C.config.initialize_plugin_configuration_definitions(
+        "callback", "pulp_summary", options
+    )
+
+    def fn(**options):
+        callback = pulp_summary.CallbackModule()
+        callback._load_name = "pulp_summary"
+        callback.set_options(direct=options)
+        callback._display = mock.Mock()
+        return callback
+
+    return fn
+
+
+def request(method, path, seconds):
+    return dict(method=method, path=path, status=200, bytes=4, seconds=seconds)
+
+
+def task_result(action, args, result):
+    return mock.Mock(_task=mock.Mock(action=action, args=args), _result=result)
+
+
+RESULTS = [
+    task_result(
+        "release_engineering.pulp2_api.pulp_role",
+        dict(id="fast-role"),
+        dict(
+            changed=False,
+            timings=dict(
+                total_seconds=0.1,
+                requests=[request("GET", "roles/{role_id}/", 0.01)],
+            ),
+        ),
+    ),
+    task_result(
+        "pulp_role",
+        dict(id="slow-role"),
+        dict(
+            changed=True,
+            timings=dict(
+                total_seconds=2.0,
+                requests=[
+                    request("GET", "roles/{role_id}/", 0.03),
+                    request("POST", "roles/{role_id}/users/", 0.5),
+                ],
+            ),
+        ),
+    ),
+    task_result(
+        "release_engineering.pulp2_api.pulp_users",
+        dict(users=[dict(login="alice"), dict(login="bob")]),
+        dict(
+            changed=True,
+            users=[dict(login="alice", changed=True), dict(login="bob", changed=False)],
+            timings=dict(
+                total_seconds=1.0,
+                requests=[request("GET", "users/", 0.02)],
+            ),
+        ),
+    ),
+    # A task without timings still counts towards changes
+    task_result("pulp_user", dict(login="carol"), dict(changed=True)),
+    # Other modules are ignored
+    task_result("ansible.builtin.debug", dict(msg="hi"), dict(changed=False)),
+]
+
+
+def run_callback(callback):
+    for result in RESULTS:
+        callback.v2_runner_on_ok(result)
+    callback.v2_playbook_on_stats(mock.Mock())
+
+
+def test_summary_json(make_callback, tmp_path):
+    output_file = tmp_path / "summary.json"
+    callback = make_callback(output_file=str(output_file))
+
+    run_callback(callback)
+
+    summary = json.loads(output_file.read_text())
+
+    # It should summarize requests overall and by endpoint
+    assert summary["requests"] == dict(
+        count=4, seconds=pytest.approx(0.56), p50=0.02, p95=0.5, p99=0.5
+    )
+    assert summary["endpoints"]["GET roles/{role_id}/"] == dict(
+        count=2, seconds=pytest.approx(0.04), p50=0.01, p95=0.03, p99=0.03
+    )
+    assert sorted(summary["endpoints"]) == [
+        "GET roles/{role_id}/",
+        "GET users/",
+        "POST roles/{role_id}/users/",
+    ]
+
+    # It should list tasks from slowest to fastest
+    assert [(s["module"], s["resource"]) for s in summary["slowest"]] == [
+        ("pulp_role", "slow-role"),
+        ("pulp_users", "2 users"),
+        ("pulp_role", "fast-role"),
+    ]
+
+    # It should count changed resources, by module
+    assert summary["changed"] == {
+        "pulp_role": dict(resources=2, changed=1),
+        "pulp_users": dict(resources=2, changed=1),
+        "pulp_user": dict(resources=1, changed=1),
+    }
+
+    # It should have displayed a table
+    displayed = [call.args[0] for call in callback._display.display.mock_calls]
+    assert displayed[0].split() == ["ENDPOINT", "COUNT", "TOTAL", "P50", "P95", "P99"]
+    assert displayed[1].split() == [
+        "GET",
+        "roles/{role_id}/",
+        "2",
+        "40ms",
+        "10ms",
+        "30ms",
+        "30ms",
+    ]
+    assert "  pulp_role: 1 of 2 resource(s)" in displayed
+
+
+def test_summary_openmetrics(make_callback, tmp_path):
+    output_file = tmp_path / "summary.txt"
+    callback = make_callback(output_file=str(output_file), output_format="openmetrics")
+
+    run_callback(callback)
+
+    lines = output_file.read_text().splitlines()
+
+    assert (
+        'pulp2_api_request_seconds{method="POST",path="roles/{role_id}/users/",'
+        'quantile="0.95"} 0.5'
+    ) in lines
+    assert (
+        'pulp2_api_request_seconds_count{method="GET",path="roles/{role_id}/"} 2'
+    ) in lines
+    assert 'pulp2_api_resources{module="pulp_users",changed="false"} 1' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_summary_loop(make_callback, tmp_path):
+    output_file = tmp_path / "summary.json"
+    callback = make_callback(output_file=str(output_file))
+
+    # A task looping over several roles
+    items = [
+        task_result(
+            "pulp_role",
+            dict(id="{{ item }}"),
+            dict(
+                item=role_id,
+                changed=(role_id == "role-b"),
+                failed=(role_id == "role-c"),
+                invocation=dict(module_args=dict(id=role_id)),
+                timings=dict(
+                    total_seconds=seconds,
+                    requests=[request("GET", "roles/{role_id}/", seconds)],
+                ),
+            ),
+        )
+        for (role_id, seconds) in [("role-a", 0.1), ("role-b", 0.3), ("role-c", 0.2)]
+    ]
+
+    callback.v2_runner_item_on_ok(items[0])
+    callback.v2_runner_item_on_ok(items[1])
+    callback.v2_runner_item_on_failed(items[2])
+
+    # The task's own result only holds the results of the items
+    callback.v2_runner_on_failed(
+        task_result(
+            "pulp_role",
+            dict(id="{{ item }}"),
+            dict(changed=True, failed=True, results=[i._result for i in items]),
+        )
+    )
+    callback.v2_playbook_on_stats(mock.Mock())
+
+    summary = json.loads(output_file.read_text())
+
+    # It should have counted each item once
+    assert summary["requests"]["count"] == 3
+    assert summary["changed"] == {"pulp_role": dict(resources=3, changed=1)}
+
+    # It should have identified each item by its own args
+    assert [(s["module"], s["resource"]) for s in summary["slowest"]] == [
+        ("pulp_role", "role-b"),
+        ("pulp_role", "role-c"),
+        ("pulp_role", "role-a"),
+    ]
+
+
+def test_no_pulp_tasks(make_callback, tmp_path):
+    output_file = tmp_path / "summary.json"
+    callback = make_callback(output_file=str(output_file))
+
+    callback.v2_runner_on_ok(RESULTS[-1])
+    callback.v2_playbook_on_stats(mock.Mock())
+
+    # Nothing should be displayed or written
+    assert not callback._display.mock_calls
+    assert not output_file.exists()
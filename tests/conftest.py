@@ -1,10 +1,16 @@
 import json
 import os
+import shutil
+import subprocess
 import sys
 from unittest import mock
 
 import ansible.module_utils.basic
+import ansible.module_utils.urls
 import pytest
+from fakepulp import FakePulp
+
+REAL_FETCH_URL = ansible.module_utils.urls.fetch_url
 
 SRCDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -34,6 +40,40 @@ def fetch_url():
         yield mock_fetch_url
 
 
+@pytest.fixture(scope="session")
+def tls_files(tmp_path_factory):
+    # Self-signed certificates and keys for a server and a client.
+    if not shutil.which("openssl"):
+        pytest.skip("openssl is not available")
+
+    tmpdir = tmp_path_factory.mktemp("tls")
+    out = {}
+    for (name, cn) in [("server", "127.0.0.1"), ("client", "pulp-client")]:
+        (cert, key) = (str(tmpdir / f"{name}.crt"), str(tmpdir / f"{name}.key"))
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+            + ["-subj", f"/CN={cn}", "-keyout", key, "-out", cert],
+            check=True,
+            capture_output=True,
+        )
+        out[f"{name}_cert"] = cert
+        out[f"{name}_key"] = key
+    return out
+
+
+@pytest.fixture
+def real_fetch_url(fetch_url):
+    # Allows requests to be made for real, e.g. to a FakePulp server.
+    fetch_url.side_effect = REAL_FETCH_URL
+    yield fetch_url
+
+
+@pytest.fixture
+def fake_pulp(real_fetch_url):
+    with FakePulp() as pulp:
+        yield pulp
+
+
 @pytest.fixture
 def out_reader(capsys):
     def fn():
@@ -65,6 +105,62 @@ def fetch_url_calls(fetch_url):
     return fn
 
 
+class RequestBudget:
+    """Checks the number of requests made to Pulp, by HTTP method.
+
+    Budgets are given per method, either as a constant or as a function of
+    the size of the input. A constant budget means requests of that method
+    must not grow with input size, e.g. GET=1 for a no-op converge of any
+    number of users. Methods without a budget must not be used at all.
+
+    Requests are counted by the FakePulp server if given, since they may then
+    bypass fetch_url (e.g. over persistent connections); otherwise, calls to
+    fetch_url are counted.
+    """
+
+    def __init__(self, fetch_url, pulp=None):
+        self.fetch_url = fetch_url
+        self.pulp = pulp
+
+    def counts(self):
+        if self.pulp:
+            methods = [method for (method, _) in self.pulp.requests]
+        else:
+            methods = [
+                call.kwargs.get("method") or "GET"
+                for call in self.fetch_url.call_args_list
+            ]
+
+        out = {}
+        for method in methods:
+            out[method] = out.get(method, 0) + 1
+        return out
+
+    def reset(self):
+        self.fetch_url.reset_mock()
+        if self.pulp:
+            self.pulp.requests.clear()
+
+    def check(self, size, **budget):
+        counts = self.counts()
+        for (method, count) in sorted(counts.items()):
+            limit = budget.get(method, 0)
+            if callable(limit):
+                limit = limit(size)
+            assert count <= limit, (
+                f"{count} {method} request(s) exceeds budget of {limit} "
+                f"for size {size}; all requests: {counts}"
+            )
+
+
+@pytest.fixture
+def request_budget(request, fetch_url):
+    pulp = None
+    if "fake_pulp" in request.fixturenames:
+        pulp = request.getfixturevalue("fake_pulp")
+    yield RequestBudget(fetch_url, pulp)
+
+
 @pytest.fixture
 def module_utils_base():
     from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
@@ -74,6 +170,15 @@ def module_utils_base():
     yield base
 
 
+@pytest.fixture
+def pulp_facts():
+    from ansible_collections.release_engineering.pulp2_api.plugins.modules import (
+        pulp_facts,
+    )
+
+    yield pulp_facts
+
+
 @pytest.fixture
 def pulp_role():
     from ansible_collections.release_engineering.pulp2_api.plugins.modules import (
@@ -92,15 +197,35 @@ def pulp_user():
     yield pulp_user
 
 
+@pytest.fixture
+def pulp_roles():
+    from ansible_collections.release_engineering.pulp2_api.plugins.modules import (
+        pulp_roles,
+    )
+
+    yield pulp_roles
+
+
+@pytest.fixture
+def pulp_users():
+    from ansible_collections.release_engineering.pulp2_api.plugins.modules import (
+        pulp_users,
+    )
+
+    yield pulp_users
+
+
 @pytest.fixture(scope="function")
-def set_module_params(monkeypatch):
+def set_module_params(monkeypatch, tmp_path):
     def fn(**kwargs):
         # ansible caches module inputs here so would share params between
         # modules if not cleared
         setattr(ansible.module_utils.basic, "_ANSIBLE_ARGS", None)
 
-        monkeypatch.setattr(
-            sys, "argv", ["", json.dumps(dict(ANSIBLE_MODULE_ARGS=kwargs))]
-        )
+        # Inputs are passed via a file, as large inputs can't be passed
+        # directly as an argument.
+        args_file = tmp_path / "module_args.json"
+        args_file.write_text(json.dumps(dict(ANSIBLE_MODULE_ARGS=kwargs)))
+        monkeypatch.setattr(sys, "argv", ["", str(args_file)])
 
     return fn
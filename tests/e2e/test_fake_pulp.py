@@ -0,0 +1,122 @@
+import pytest
+from fakepulp import FakePulp
+
+
+def run_module(module_class, out_reader):
+    # Runs a module and returns its result, expecting success.
+    with pytest.raises(SystemExit) as excinfo:
+        module_class().run()
+
+    result = out_reader()
+    assert excinfo.value.code == 0, result
+    return result
+
+
+def test_role_converges(pulp_role, set_module_params, fake_pulp, out_reader):
+    for login in ["alice", "bob", "carol"]:
+        fake_pulp.state.add_user(login)
+    fake_pulp.state.add_role("my-role")
+    fake_pulp.state.roles["my-role"]["users"].update(["carol"])
+    fake_pulp.state.roles["my-role"]["permissions"]["/old"] = {"READ"}
+
+    params = dict(
+        id="my-role",
+        pulp_url=fake_pulp.url,
+        display_name="My role",
+        permissions={"/": ["READ"], "/v2/repositories/": ["CREATE", "UPDATE"]},
+        users=["alice", "bob"],
+        parallelism=4,
+    )
+    set_module_params(**params)
+
+    # It should make changes
+    assert run_module(pulp_role.RoleModule, out_reader)["changed"]
+
+    # Pulp should now hold the desired state
+    role = fake_pulp.state.role_repr("my-role")
+    assert role["display_name"] == "My role"
+    assert role["permissions"] == {
+        "/": ["READ"],
+        "/v2/repositories/": ["CREATE", "UPDATE"],
+    }
+    assert role["users"] == ["alice", "bob"]
+
+    # Running again should make no changes and no writes
+    fake_pulp.requests.clear()
+    set_module_params(**params)
+    assert not run_module(pulp_role.RoleModule, out_reader)["changed"]
+    assert all(method == "GET" for (method, _) in fake_pulp.requests)
+
+
+def test_bulk_users_under_latency(
+    pulp_users, set_module_params, real_fetch_url, out_reader
+):
+    with FakePulp(latency=0.02) as pulp:
+        set_module_params(
+            pulp_url=pulp.url,
+            users=[dict(login=f"user-{i}", name=f"User {i}") for i in range(40)],
+            max_workers=8,
+            persistent_connections=True,
+        )
+
+        result = run_module(pulp_users.UsersModule, out_reader)
+
+    # It should have created every user
+    assert result["changed"]
+    assert sorted(pulp.state.users) == sorted(f"user-{i}" for i in range(40))
+
+    # Requests should have been made concurrently, over reused connections
+    assert pulp.max_in_flight > 1
+    assert len(pulp.connections) <= 8
+
+
+def test_retries_injected_faults(
+    pulp_users, set_module_params, real_fetch_url, out_reader
+):
+    with FakePulp(error_rate=0.3, retry_after=0) as pulp:
+        set_module_params(
+            pulp_url=pulp.url,
+            users=[dict(login=f"user-{i}") for i in range(20)],
+            max_retries=10,
+        )
+
+        result = run_module(pulp_users.UsersModule, out_reader)
+
+    # It should have succeeded despite the faults
+    assert result["changed"]
+    assert len(pulp.state.users) == 20
+
+    # Faults should actually have occurred
+    assert pulp.faults > 0
+    assert len(pulp.requests) == 21 + pulp.faults
+
+
+@pytest.mark.parametrize("persistent_connections", [False, True])
+def test_client_certificate(
+    pulp_user,
+    set_module_params,
+    real_fetch_url,
+    out_reader,
+    tls_files,
+    persistent_connections,
+):
+    with FakePulp(
+        tls=(tls_files["server_cert"], tls_files["server_key"]),
+        client_ca=tls_files["client_cert"],
+        credentials=("admin", "not-used"),
+    ) as pulp:
+        set_module_params(
+            pulp_url=pulp.url,
+            login="alice",
+            name="Alice",
+            client_cert=tls_files["client_cert"],
+            client_key=tls_files["client_key"],
+            validate_certs=False,
+            persistent_connections=persistent_connections,
+        )
+
+        result = run_module(pulp_user.UserModule, out_reader)
+
+    # It should have authenticated by certificate and created the user
+    assert result["changed"]
+    assert pulp.state.user_repr("alice")["name"] == "Alice"
@@ -0,0 +1,422 @@
+"""A stand-in for the Pulp 2 RBAC API, for testing modules end to end.
+
+Implements the subset of the API used by this collection, holding state in
+memory. Latency, errors and TLS (optionally requiring client certificates)
+may be configured, so that modules can be tested under load without a real
+Pulp server.
+"""
+import base64
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+API_PATH = "/pulp/api/v2/"
+
+
+class NotFound(Exception):
+    pass
+
+
+class FakePulpState:
+    """In-memory users, roles and permissions, as held by Pulp."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users = {}
+        self.roles = {}
+
+    def add_user(self, login, name=None, password=None):
+        with self.lock:
+            self.users[login] = dict(login=login, name=name or login, password=password)
+
+    def add_role(self, role_id, display_name=None, description=None):
+        with self.lock:
+            self.roles[role_id] = dict(
+                id=role_id,
+                display_name=display_name or role_id,
+                description=description,
+                permissions={},
+                users=set(),
+            )
+
+    def user_repr(self, login):
+        user = self.users.get(login)
+        if user is None:
+            raise NotFound()
+        roles = sorted(r["id"] for r in self.roles.values() if login in r["users"])
+        return dict(
+            _id=login,
+            id=login,
+            login=login,
+            name=user["name"],
+            roles=roles,
+            _href=f"{API_PATH}users/{login}/",
+        )
+
+    def role_repr(self, role_id):
+        role = self.roles.get(role_id)
+        if role is None:
+            raise NotFound()
+        return dict(
+            _id=role_id,
+            id=role_id,
+            display_name=role["display_name"],
+            description=role["description"],
+            permissions={
+                key: sorted(ops) for (key, ops) in role["permissions"].items()
+            },
+            users=sorted(role["users"]),
+            _href=f"{API_PATH}roles/{role_id}/",
+        )
+
+
+class FakePulp:
+    """A Pulp 2 stand-in listening on localhost.
+
+    latency: seconds added to each request, or a callable returning seconds.
+    error_rate: fraction of requests failing with error_status.
+    retry_after: if set, value of a Retry-After header sent with errors.
+    tls: a (cert, key) tuple of files, to serve HTTPS.
+    client_ca: if set (with tls), a CA file used to require client certificates.
+    credentials: if set, a (username, password) tuple required via basic auth
+    unless a client certificate is presented.
+    """
+
+    def __init__(
+        self,
+        latency=0,
+        error_rate=0,
+        error_status=503,
+        retry_after=None,
+        tls=None,
+        client_ca=None,
+        credentials=None,
+        seed=0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.tls = tls
+        self.client_ca = client_ca
+        self.credentials = credentials
+
+        self.state = FakePulpState()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.faults = 0
+
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{self.httpd.server_address[1]}{API_PATH}"
+
+    def start(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakePulpHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.pulp = self
+
+        if self.tls:
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(*self.tls)
+            if self.client_ca:
+                context.load_verify_locations(self.client_ca)
+                context.verify_mode = ssl.CERT_REQUIRED
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            kwargs=dict(poll_interval=0.05),
+            daemon=True,
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def request_counts(self):
+        """Returns a dict of (method, path) => number of requests."""
+        out = {}
+        with self.lock:
+            for request in self.requests:
+                out[request] = out.get(request, 0) + 1
+        return out
+
+    def should_fail(self):
+        with self.lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.faults += 1
+                return True
+        return False
+
+    def delay(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+
+class FakePulpHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately, which shouldn't be delayed by
+    # Nagle's algorithm on kept-alive connections.
+    disable_nagle_algorithm = True
+
+    # Routes as (method, regex, handler name). Regexes match the path after
+    # API_PATH.
+    ROUTES = [
+        ("POST", r"actions/login/", "login"),
+        ("GET", r"users/", "list_users"),
+        ("POST", r"users/", "create_user"),
+        ("POST", r"users/search/", "search_users"),
+        ("GET", r"users/(?P<login>[^/]+)/", "get_user"),
+        ("PUT", r"users/(?P<login>[^/]+)/", "update_user"),
+        ("DELETE", r"users/(?P<login>[^/]+)/", "delete_user"),
+        ("GET", r"roles/", "list_roles"),
+        ("POST", r"roles/", "create_role"),
+        ("POST", r"roles/search/", "search_roles"),
+        ("GET", r"roles/(?P<role_id>[^/]+)/", "get_role"),
+        ("PUT", r"roles/(?P<role_id>[^/]+)/", "update_role"),
+        ("DELETE", r"roles/(?P<role_id>[^/]+)/", "delete_role"),
+        ("POST", r"roles/(?P<role_id>[^/]+)/users/", "add_role_user"),
+        (
+            "DELETE",
+            r"roles/(?P<role_id>[^/]+)/users/(?P<login>[^/]+)/",
+            "remove_role_user",
+        ),
+        ("POST", r"permissions/actions/grant_to_role/", "grant"),
+        ("POST", r"permissions/actions/revoke_from_role/", "revoke"),
+    ]
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def pulp(self):
+        return self.server.pulp
+
+    @property
+    def state(self):
+        return self.pulp.state
+
+    def respond(self, status, body=None, headers=None):
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for (key, value) in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def basic_auth(self):
+        # Returns (username, password) from an Authorization header, if any.
+        header = self.headers.get("Authorization") or ""
+        if not header.startswith("Basic "):
+            return None
+        decoded = base64.b64decode(header[len("Basic ") :]).decode("utf-8")
+        return tuple(decoded.split(":", 1))
+
+    def authorized(self):
+        if not self.pulp.credentials:
+            return True
+        if self.pulp.client_ca and self.connection.getpeercert():
+            return True
+        return self.basic_auth() == tuple(self.pulp.credentials)
+
+    def handle_request(self):
+        pulp = self.pulp
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        path = urlsplit(self.path).path
+        with pulp.lock:
+            pulp.requests.append((self.command, path))
+            pulp.in_flight += 1
+            pulp.max_in_flight = max(pulp.max_in_flight, pulp.in_flight)
+            pulp.connections.add(self.client_address)
+
+        try:
+            pulp.delay()
+
+            if pulp.should_fail():
+                headers = {}
+                if pulp.retry_after is not None:
+                    headers["Retry-After"] = str(pulp.retry_after)
+                return self.respond(
+                    pulp.error_status, dict(error="injected fault"), headers
+                )
+
+            if not path.startswith(API_PATH):
+                return self.respond(404, dict(error="not found"))
+            rest = path[len(API_PATH) :]
+
+            for (method, regex, name) in self.ROUTES:
+                match = re.fullmatch(regex, rest)
+                if method == self.command and match:
+                    break
+            else:
+                return self.respond(404, dict(error="not found"))
+
+            if name != "login" and not self.authorized():
+                return self.respond(
+                    401,
+                    dict(error="unauthorized"),
+                    {"WWW-Authenticate": 'Basic realm="pulp"'},
+                )
+
+            try:
+                with self.state.lock:
+                    (status, out) = getattr(self, name)(body, **match.groupdict())
+            except NotFound:
+                (status, out) = (404, dict(error="not found"))
+
+            self.respond(status, out)
+        finally:
+            with pulp.lock:
+                pulp.in_flight -= 1
+
+    do_GET = handle_request
+    do_POST = handle_request
+    do_PUT = handle_request
+    do_DELETE = handle_request
+
+    # Endpoints. Each returns (status, body).
+
+    def login(self, _body):
+        auth = self.basic_auth()
+        user = self.state.users.get(auth[0]) if auth else None
+        if not user or user["password"] != auth[1]:
+            return (401, dict(error="unauthorized"))
+        return (200, dict(key="fake-key", certificate="fake-certificate"))
+
+    def search(self, body, collection, key, repr_fn):
+        criteria = (body or {}).get("criteria") or {}
+        wanted = ((criteria.get("filters") or {}).get(key) or {}).get("$in")
+        fields = criteria.get("fields")
+
+        out = []
+        for item_id in sorted(collection):
+            if wanted is not None and item_id not in wanted:
+                continue
+            item = repr_fn(item_id)
+            if fields:
+                item = {field: item[field] for field in fields if field in item}
+            out.append(item)
+        return (200, out)
+
+    def list_users(self, _body):
+        return (
+            200,
+            [self.state.user_repr(login) for login in sorted(self.state.users)],
+        )
+
+    def search_users(self, body):
+        return self.search(body, self.state.users, "login", self.state.user_repr)
+
+    def create_user(self, body):
+        login = body["login"]
+        if login in self.state.users:
+            return (409, dict(error="conflict"))
+        self.state.add_user(login, body.get("name"), body.get("password"))
+        return (201, self.state.user_repr(login))
+
+    def get_user(self, _body, login):
+        return (200, self.state.user_repr(login))
+
+    def update_user(self, body, login):
+        user = self.state.users.get(login)
+        if user is None:
+            raise NotFound()
+        user.update(body["delta"])
+        return (200, self.state.user_repr(login))
+
+    def delete_user(self, _body, login):
+        if self.state.users.pop(login, None) is None:
+            raise NotFound()
+        for role in self.state.roles.values():
+            role["users"].discard(login)
+        return (200, None)
+
+    def list_roles(self, _body):
+        return (
+            200,
+            [self.state.role_repr(role_id) for role_id in sorted(self.state.roles)],
+        )
+
+    def search_roles(self, body):
+        return self.search(body, self.state.roles, "id", self.state.role_repr)
+
+    def create_role(self, body):
+        role_id = body["role_id"]
+        if role_id in self.state.roles:
+            return (409, dict(error="conflict"))
+        self.state.add_role(role_id, body.get("display_name"), body.get("description"))
+        return (201, self.state.role_repr(role_id))
+
+    def get_role(self, _body, role_id):
+        return (200, self.state.role_repr(role_id))
+
+    def update_role(self, body, role_id):
+        role = self.state.roles.get(role_id)
+        if role is None:
+            raise NotFound()
+        role.update(body["delta"])
+        return (200, self.state.role_repr(role_id))
+
+    def delete_role(self, _body, role_id):
+        if self.state.roles.pop(role_id, None) is None:
+            raise NotFound()
+        return (200, None)
+
+    def add_role_user(self, body, role_id):
+        role = self.state.roles.get(role_id)
+        if role is None or body["login"] not in self.state.users:
+            raise NotFound()
+        role["users"].add(body["login"])
+        return (200, None)
+
+    def remove_role_user(self, _body, role_id, login):
+        role = self.state.roles.get(role_id)
+        if role is None or login not in role["users"]:
+            raise NotFound()
+        role["users"].discard(login)
+        return (200, None)
+
+    def grant(self, body):
+        role = self.state.roles.get(body["role_id"])
+        if role is None:
+            raise NotFound()
+        ops = role["permissions"].setdefault(body["resource"], set())
+        ops.update(body["operations"])
+        return (200, None)
+
+    def revoke(self, body):
+        role = self.state.roles.get(body["role_id"])
+        if role is None:
+            raise NotFound()
+        ops = role["permissions"].get(body["resource"], set())
+        ops.difference_update(body["operations"])
+        if not ops:
+            role["permissions"].pop(body["resource"], None)
+        return (200, None)
@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+
+USERS = [
+    {"login": "alice", "name": "Alice", "roles": ["readers", "admins"]},
+    {"login": "bob", "name": "Bob", "roles": []},
+    {"login": "carol", "name": "Carol", "roles": ["stale-role"]},
+]
+
+ROLES = [
+    {
+        "id": "readers",
+        "display_name": "Readers",
+        "description": "read stuff",
+        "permissions": {"/": ["READ"], "/v2/repositories/": ["READ"]},
+        "users": ["bob", "alice"],
+    },
+    {
+        "id": "admins",
+        "display_name": "Admins",
+        "description": "do stuff",
+        "permissions": {"/": ["CREATE", "READ", "UPDATE", "DELETE", "EXECUTE"]},
+        "users": ["alice"],
+    },
+]
+
+
+def fake_fetch_url(module, url, method):
+    assert method == "GET"
+    data = {
+        "https://pulp.example.com/pulp/users/": USERS,
+        "https://pulp.example.com/pulp/roles/": ROLES,
+    }[url]
+    return (io.BytesIO(json.dumps(data).encode()), {"status": 200})
+
+
+def test_gather_facts(
+    pulp_facts, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(pulp_url="https://pulp.example.com/pulp")
+
+    fetch_url.side_effect = fake_fetch_url
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_facts.FactsModule().run()
+
+    assert excinfo.value.code == 0
+
+    result = out_reader()
+
+    # Gathering facts never changes anything
+    assert not result["changed"]
+
+    assert result["ansible_facts"]["pulp_rbac"] == {
+        "users": {
+            "alice": {"name": "Alice", "roles": ["admins", "readers"]},
+            "bob": {"name": "Bob", "roles": []},
+            "carol": {"name": "Carol", "roles": ["stale-role"]},
+        },
+        "roles": {
+            "readers": {
+                "display_name": "Readers",
+                "description": "read stuff",
+                "permissions": {"/": ["READ"], "/v2/repositories/": ["READ"]},
+                "users": ["alice", "bob"],
+            },
+            "admins": {
+                "display_name": "Admins",
+                "description": "do stuff",
+                "permissions": {"/": ["CREATE", "READ", "UPDATE", "DELETE", "EXECUTE"]},
+                "users": ["alice"],
+            },
+        },
+        # Memberships come from the roles
+        "user_roles": {
+            "alice": ["admins", "readers"],
+            "bob": ["readers"],
+            "carol": [],
+        },
+        "resource_roles": {
+            "/": {
+                "readers": ["READ"],
+                "admins": ["CREATE", "READ", "UPDATE", "DELETE", "EXECUTE"],
+            },
+            "/v2/repositories/": {"readers": ["READ"]},
+        },
+    }
+
+    # It should have needed only one request per collection
+    assert fetch_url_calls() == [
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/"},
+        {"method": "GET", "url": "https://pulp.example.com/pulp/roles/"},
+    ]
+
+
+def test_gather_users_only(
+    pulp_facts, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(pulp_url="https://pulp.example.com/pulp", gather=["users"])
+
+    fetch_url.side_effect = fake_fetch_url
+
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_facts.FactsModule().run()
+
+    assert excinfo.value.code == 0
+
+    facts = out_reader()["ansible_facts"]["pulp_rbac"]
+
+    # Memberships come from the users
+    assert facts["user_roles"] == {
+        "alice": ["admins", "readers"],
+        "bob": [],
+        "carol": ["stale-role"],
+    }
+    assert "roles" not in facts
+
+    assert fetch_url_calls() == [
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/"},
+    ]
+
+
+def test_gather_error(pulp_facts, set_module_params, fetch_url, out_reader):
+    set_module_params(pulp_url="https://pulp.example.com/pulp")
+
+    fetch_url.side_effect = [(io.BytesIO(b"oops"), {"status": 403})]
+
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_facts.FactsModule().run()
+
+    assert excinfo.value.code == 1
+    assert (
+        out_reader()["msg"]
+        == "unexpected status 403 from URL https://pulp.example.com/pulp/users/"
+    )
@@ -0,0 +1,83 @@
+import pytest
+
+
+def churn(size):
+    # Number of users or permissions replaced in each scenario.
+    return max(1, size // 10)
+
+
+def run_module(module_class):
+    with pytest.raises(SystemExit) as excinfo:
+        module_class().run()
+    assert excinfo.value.code == 0
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_users_budget(
+    pulp_role, set_module_params, fake_pulp, request_budget, out_reader, size
+):
+    for i in range(size + churn(size)):
+        fake_pulp.state.add_user(f"user-{i}")
+    fake_pulp.state.add_role("my-role", description="deployed by ansible")
+    fake_pulp.state.roles["my-role"]["users"].update(f"user-{i}" for i in range(size))
+
+    set_module_params(
+        id="my-role",
+        pulp_url=fake_pulp.url,
+        users=[f"user-{i}" for i in range(churn(size), size + churn(size))],
+    )
+    run_module(pulp_role.RoleModule)
+
+    assert out_reader()["changed"]
+
+    # The role is read once, then one write is made per changed user
+    request_budget.check(size, GET=1, POST=churn, DELETE=churn)
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_permissions_budget(
+    pulp_role, set_module_params, fake_pulp, request_budget, out_reader, size
+):
+    fake_pulp.state.add_role("my-role", description="deployed by ansible")
+    fake_pulp.state.roles["my-role"]["permissions"] = {
+        f"/repo-{i}/": {"READ"} for i in range(size)
+    }
+
+    set_module_params(
+        id="my-role",
+        pulp_url=fake_pulp.url,
+        permissions={
+            f"/repo-{i}/": ["READ"] for i in range(churn(size), size + churn(size))
+        },
+    )
+    run_module(pulp_role.RoleModule)
+
+    assert out_reader()["changed"]
+
+    # The role is read once, then one revoke or grant is made per changed path
+    request_budget.check(size, GET=1, POST=lambda n: 2 * churn(n))
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_noop_budget(
+    pulp_role, set_module_params, fake_pulp, request_budget, out_reader, size
+):
+    fake_pulp.state.add_role("my-role", description="deployed by ansible")
+    fake_pulp.state.roles["my-role"]["permissions"] = {
+        f"/repo-{i}/": {"READ"} for i in range(size)
+    }
+    for i in range(size):
+        fake_pulp.state.add_user(f"user-{i}")
+    fake_pulp.state.roles["my-role"]["users"].update(fake_pulp.state.users)
+
+    set_module_params(
+        id="my-role",
+        pulp_url=fake_pulp.url,
+        permissions={f"/repo-{i}/": ["READ"] for i in range(size)},
+        users=[f"user-{i}" for i in range(size)],
+    )
+    run_module(pulp_role.RoleModule)
+
+    assert not out_reader()["changed"]
+
+    request_budget.check(size, GET=1)
@@ -1,14 +1,12 @@
+import io
 import json
 
 import pytest
 
 
-class Response:
+class Response(io.BytesIO):
     def __init__(self, **kwargs):
-        self._bytes = json.dumps(kwargs).encode("utf8")
-
-    def read(self):
-        return self._bytes[:]
+        super().__init__(json.dumps(kwargs).encode("utf8"))
 
 
 def test_update_role(
@@ -0,0 +1,127 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+class FakeFetchUrl:
+    # A fetch_url implementation tracking concurrency of requests.
+    def __init__(self, role, fail_resources=()):
+        self.role = role
+        self.fail_resources = fail_resources
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.events = []
+
+    def __call__(self, module, url, method, **kwargs):
+        if method == "GET":
+            return (Response(**self.role), {"status": 200})
+
+        data = json.loads(kwargs["data"])
+        action = url.split("/")[-2]
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.events.append(("start", action, data["resource"]))
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.in_flight -= 1
+            self.events.append(("end", action, data["resource"]))
+
+        if data["resource"] in self.fail_resources:
+            return (io.BytesIO(b"oops"), {"status": 500})
+        return (object(), {"status": 200})
+
+
+def make_role(permissions):
+    return dict(
+        id="my-great-role",
+        description="deployed by ansible",
+        display_name="my-great-role",
+        permissions=permissions,
+        users=[],
+    )
+
+
+def test_update_role_parallel(pulp_role, set_module_params, fetch_url, out_reader):
+    set_module_params(
+        id="my-great-role",
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        permissions={f"/new/{i}": ["READ"] for i in range(10)},
+        parallelism=4,
+    )
+
+    pulp = FakeFetchUrl(make_role({f"/old/{i}": ["READ"] for i in range(10)}))
+    fetch_url.side_effect = pulp
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 0
+    assert out_reader()["changed"]
+
+    # It should have made requests concurrently, up to the limit
+    assert 1 < pulp.max_in_flight <= 4
+
+    # It should have made all the expected requests
+    assert sorted((e[1], e[2]) for e in pulp.events if e[0] == "end") == sorted(
+        [("revoke_from_role", f"/old/{i}") for i in range(10)]
+        + [("grant_to_role", f"/new/{i}") for i in range(10)]
+    )
+
+    # All revokes should have completed before any grants started
+    actions = [e[1] for e in pulp.events]
+    last_revoke = max(i for (i, a) in enumerate(actions) if a == "revoke_from_role")
+    first_grant = min(i for (i, a) in enumerate(actions) if a == "grant_to_role")
+    assert last_revoke < first_grant
+
+
+@pytest.mark.parametrize("parallelism", [1, 3])
+def test_update_role_collects_errors(
+    pulp_role, set_module_params, fetch_url, out_reader, parallelism
+):
+    set_module_params(
+        id="my-great-role",
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        permissions={f"/new/{i}": ["READ"] for i in range(5)},
+        parallelism=parallelism,
+    )
+
+    pulp = FakeFetchUrl(
+        make_role({"/old/1": ["READ"]}), fail_resources=["/old/1", "/new/3"]
+    )
+    fetch_url.side_effect = pulp
+
+    # It should run, unsuccessfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 1
+
+    # It should tell us about all the errors
+    result = out_reader()
+    assert result["changed"]
+    assert result["msg"] == "2 requests failed"
+    assert result["errors"] == [
+        "unexpected status 500 from URL "
+        "https://pulp.example.com/pulp/permissions/actions/revoke_from_role/",
+        "unexpected status 500 from URL "
+        "https://pulp.example.com/pulp/permissions/actions/grant_to_role/",
+    ]
+
+    # It should still have attempted all the other changes
+    assert len([e for e in pulp.events if e[0] == "end"]) == 6
@@ -1,14 +1,12 @@
+import io
 import json
 
 import pytest
 
 
-class Response:
+class Response(io.BytesIO):
     def __init__(self, **kwargs):
-        self._bytes = json.dumps(kwargs).encode("utf8")
-
-    def read(self):
-        return self._bytes[:]
+        super().__init__(json.dumps(kwargs).encode("utf8"))
 
 
 def test_update_role_users(
@@ -46,6 +44,11 @@ def test_update_role_users(
     # It should tell us it made changes
     result = out_reader()
     assert result["changed"]
+    assert result["user_changes"] == {
+        "added": ["user2"],
+        "removed": ["other-user"],
+        "failed": [],
+    }
 
     assert fetch_url_calls() == [
         # First it should try to get the role.
@@ -146,3 +149,103 @@ def test_update_role_users_check(
         {"method": "GET", "url": "https://pulp.example.com/pulp/roles/my-great-role/"},
         # ...and that's all, since we're in check mode
     ]
+
+
+def test_update_role_users_parallel(
+    pulp_role, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        id="my-great-role",
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        users=[f"new-{i}" for i in range(20)],
+        parallelism=5,
+    )
+
+    role_url = "https://pulp.example.com/pulp/roles/my-great-role/"
+    fail_urls = [role_url + "users/old-3/"]
+
+    def fake_fetch_url(module, url, method, **kwargs):
+        if method == "GET":
+            role = Response(
+                id="my-great-role",
+                description="deployed by ansible",
+                display_name="my-great-role",
+                permissions={},
+                users=[f"old-{i}" for i in range(10)],
+            )
+            return (role, {"status": 200})
+
+        if url in fail_urls:
+            return (io.BytesIO(b"error"), {"status": 500})
+        return (object(), {"status": 200})
+
+    fetch_url.side_effect = fake_fetch_url
+
+    # It should run, unsuccessfully due to the failed request
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+
+    assert excinfo.value.code == 1
+
+    result = out_reader()
+    assert result["changed"]
+    assert result["msg"] == "unexpected status 500 from URL " + fail_urls[0]
+
+    # It should tell us the outcome per user
+    assert result["user_changes"] == {
+        "added": sorted(f"new-{i}" for i in range(20)),
+        "removed": sorted(f"old-{i}" for i in range(10) if i != 3),
+        "failed": ["old-3"],
+    }
+
+    # All users should have been processed despite the failure
+    calls = fetch_url_calls()
+    assert len(calls) == 31
+
+    # Removals should all have come before additions
+    methods = [call["method"] for call in calls]
+    assert methods == ["GET"] + ["DELETE"] * 10 + ["POST"] * 20
+
+
+@pytest.mark.parametrize("check_mode", [False, True])
+def test_update_role_check_users(
+    pulp_role, set_module_params, fake_pulp, request_budget, out_reader, check_mode
+):
+    for login in ["user1", "user2", "user3"]:
+        fake_pulp.state.add_user(login)
+    fake_pulp.state.add_role("my-role", description="deployed by ansible")
+    fake_pulp.state.roles["my-role"]["users"].add("user1")
+
+    set_module_params(
+        id="my-role",
+        pulp_url=fake_pulp.url,
+        users=["user1", "user2", "user3", "ghost1", "ghost2"],
+        check_users=True,
+        _ansible_check_mode=check_mode,
+    )
+
+    # It should fail due to the missing users
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_role.RoleModule().run()
+    assert excinfo.value.code == 1
+
+    result = out_reader()
+    assert result["errors"] == [
+        "user ghost1 does not exist",
+        "user ghost2 does not exist",
+    ]
+
+    if check_mode:
+        # Nothing was changed, but users were still checked
+        assert fake_pulp.state.roles["my-role"]["users"] == {"user1"}
+        request_budget.check(1, GET=1, POST=1)
+    else:
+        # Only existing users were added, found with a single search
+        assert result["user_changes"] == {
+            "added": ["user2", "user3"],
+            "removed": [],
+            "failed": ["ghost1", "ghost2"],
+        }
+        assert fake_pulp.state.roles["my-role"]["users"] == {"user1", "user2", "user3"}
+        request_budget.check(1, GET=1, POST=3)
@@ -0,0 +1,288 @@
+import io
+import json
+import threading
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+ROLES_URL = "https://pulp.example.com/pulp/roles/"
+
+
+def fake_fetch_url(roles, fail_urls=()):
+    # Returns a fetch_url implementation serving the given roles.
+    # Since requests are made concurrently, responses are determined
+    # by URL rather than by the order of calls.
+    lock = threading.Lock()
+
+    def fn(module, url, method, **kwargs):
+        if url in fail_urls:
+            return (io.BytesIO(b"error"), {"status": 500})
+
+        if method == "GET":
+            role_id = url[len(ROLES_URL) :].rstrip("/")
+            with lock:
+                role = roles.get(role_id)
+            if role:
+                return (Response(**role), {"status": 200})
+            return (object(), {"status": 404})
+
+        return (object(), {"status": 200})
+
+    return fn
+
+
+def calls_for(calls, role_id):
+    # Returns the calls relating to a single role, in order.
+    out = []
+    for call in calls:
+        if call["url"].startswith(ROLES_URL + role_id + "/"):
+            out.append(call)
+        elif (call.get("data") or {}).get("role_id") == role_id:
+            out.append(call)
+    return out
+
+
+def test_bulk_roles(
+    pulp_roles, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        roles=[
+            dict(
+                id="new-role",
+                permissions={"/path1": ["READ"]},
+                users=["user1"],
+            ),
+            dict(
+                id="changed-role",
+                permissions={"/path1": ["READ"]},
+                users=["user1"],
+            ),
+            dict(id="old-role", state="absent"),
+            dict(id="ok-role"),
+        ],
+        max_workers=3,
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {
+            "changed-role": dict(
+                id="changed-role",
+                display_name="something else",
+                description="deployed by ansible",
+                permissions={"/path2": ["READ"]},
+                users=["user2"],
+            ),
+            "old-role": dict(id="old-role"),
+            "ok-role": dict(
+                id="ok-role",
+                display_name="ok-role",
+                description="deployed by ansible",
+                permissions={},
+                users=[],
+            ),
+        }
+    )
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_roles.RolesModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should tell us it made changes
+    result = out_reader()
+    assert result["changed"]
+
+    # It should tell us the outcome per role, in the same order as input
+    assert [(r["id"], r["changed"], r["failed"]) for r in result["roles"]] == [
+        ("new-role", True, False),
+        ("changed-role", True, False),
+        ("old-role", True, False),
+        ("ok-role", False, False),
+    ]
+
+    # It should include the outcome of user changes for roles which had any
+    roles = {r["id"]: r for r in result["roles"]}
+    assert roles["new-role"]["user_changes"] == dict(
+        added=["user1"], removed=[], failed=[]
+    )
+    assert roles["changed-role"]["user_changes"] == dict(
+        added=["user1"], removed=["user2"], failed=[]
+    )
+    assert "user_changes" not in roles["ok-role"]
+
+    calls = fetch_url_calls()
+
+    # Roles may be processed in any order, but the requests for any single
+    # role should be in the same order as pulp_role would make them.
+    assert calls_for(calls, "new-role") == [
+        {"method": "GET", "url": ROLES_URL + "new-role/"},
+        {
+            "data": {
+                "description": "deployed by ansible",
+                "display_name": "new-role",
+                "role_id": "new-role",
+            },
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": ROLES_URL,
+        },
+        {
+            "data": {
+                "operations": ["READ"],
+                "resource": "/path1",
+                "role_id": "new-role",
+            },
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": "https://pulp.example.com/pulp/permissions/actions/grant_to_role/",
+        },
+        {
+            "data": {"login": "user1"},
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": ROLES_URL + "new-role/users/",
+        },
+    ]
+
+    assert calls_for(calls, "changed-role") == [
+        {"method": "GET", "url": ROLES_URL + "changed-role/"},
+        {
+            "data": {"delta": {"display_name": "changed-role"}},
+            "headers": {"Content-Type": "application/json"},
+            "method": "PUT",
+            "url": ROLES_URL + "changed-role/",
+        },
+        {
+            "data": {
+                "operations": ["READ"],
+                "resource": "/path2",
+                "role_id": "changed-role",
+            },
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": "https://pulp.example.com/pulp/permissions/actions/revoke_from_role/",
+        },
+        {
+            "data": {
+                "operations": ["READ"],
+                "resource": "/path1",
+                "role_id": "changed-role",
+            },
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": "https://pulp.example.com/pulp/permissions/actions/grant_to_role/",
+        },
+        {"method": "DELETE", "url": ROLES_URL + "changed-role/users/user2/"},
+        {
+            "data": {"login": "user1"},
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": ROLES_URL + "changed-role/users/",
+        },
+    ]
+
+    assert calls_for(calls, "old-role") == [
+        {"method": "GET", "url": ROLES_URL + "old-role/"},
+        {"method": "DELETE", "url": ROLES_URL + "old-role/"},
+    ]
+
+    assert calls_for(calls, "ok-role") == [
+        {"method": "GET", "url": ROLES_URL + "ok-role/"},
+    ]
+
+    # And that should be all
+    assert len(calls) == 13
+
+
+def test_bulk_roles_failures(
+    pulp_roles, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        roles=[dict(id="broken-role"), dict(id="ok-role")],
+        timings=True,
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {
+            "ok-role": dict(
+                id="ok-role",
+                display_name="ok-role",
+                description="deployed by ansible",
+            ),
+        },
+        fail_urls=[ROLES_URL + "broken-role/"],
+    )
+
+    # It should run, unsuccessfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_roles.RolesModule().run()
+
+    assert excinfo.value.code == 1
+
+    result = out_reader()
+
+    # It should tell us that one role failed
+    assert result["msg"] == "1 of 2 roles failed"
+    assert not result["changed"]
+
+    # It should still return timings of the run
+    assert len(result["timings"]["requests"]) == 2
+    assert result["roles"] == [
+        {
+            "id": "broken-role",
+            "changed": False,
+            "failed": True,
+            "msg": "unexpected status 500 from URL " + ROLES_URL + "broken-role/",
+        },
+        {"id": "ok-role", "changed": False, "failed": False, "msg": ""},
+    ]
+
+
+def test_bulk_roles_user_errors(
+    pulp_roles, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        roles=[dict(id="some-role", users=["user1", "user2"])],
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {
+            "some-role": dict(
+                id="some-role",
+                display_name="some-role",
+                description="deployed by ansible",
+                permissions={},
+                users=[],
+            ),
+        },
+        fail_urls=[ROLES_URL + "some-role/users/"],
+    )
+
+    # It should run, unsuccessfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_roles.RolesModule().run()
+
+    assert excinfo.value.code == 1
+
+    result = out_reader()
+
+    # It should tell us which users could not be added, and why
+    [role] = result["roles"]
+    assert role["failed"]
+    assert role["user_changes"] == dict(added=[], removed=[], failed=["user1", "user2"])
+    assert (
+        role["errors"]
+        == ["unexpected status 500 from URL " + ROLES_URL + "some-role/users/"] * 2
+    )
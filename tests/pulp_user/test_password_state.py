@@ -0,0 +1,117 @@
+import io
+import json
+import os
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+def fake_fetch_url(users):
+    # A fetch_url implementation holding users in a dict.
+    def fn(module, url, method, **kwargs):
+        login = url.rstrip("/").split("/")[-1]
+
+        if method == "GET":
+            if login not in users:
+                return (io.BytesIO(b"not found"), {"status": 404})
+            return (Response(**users[login]), {"status": 200})
+
+        if method == "DELETE":
+            del users[login]
+            return (object(), {"status": 200})
+
+        data = json.loads(kwargs["data"])
+        if method == "POST":
+            users[data["login"]] = data
+        else:
+            users[login].update(data["delta"])
+        return (object(), {"status": 200})
+
+    return fn
+
+
+@pytest.fixture
+def run_user(pulp_user, set_module_params, fetch_url, fetch_url_calls, out_reader):
+    def fn(**kwargs):
+        fetch_url.reset_mock()
+        set_module_params(pulp_url="https://pulp.example.com/pulp", **kwargs)
+
+        with pytest.raises(SystemExit) as excinfo:
+            pulp_user.UserModule().run()
+
+        assert excinfo.value.code == 0
+
+        methods = [call["method"] for call in fetch_url_calls()]
+        return (out_reader()["changed"], methods)
+
+    return fn
+
+
+def test_password_state(run_user, fetch_url, tmp_path):
+    users = {"alice": dict(login="alice", name="Alice", password="old")}
+    fetch_url.side_effect = fake_fetch_url(users)
+
+    state_dir = str(tmp_path / "state")
+    args = dict(login="alice", name="Alice", password_state_dir=state_dir)
+
+    # The first time, the password must be updated
+    assert run_user(password="new", **args) == (True, ["GET", "PUT"])
+    assert users["alice"]["password"] == "new"
+
+    # The next time, it should be known to be applied already
+    assert run_user(password="new", **args) == (False, ["GET"])
+
+    # The name can still be updated without updating the password
+    assert run_user(password="new", **dict(args, name="A")) == (True, ["GET", "PUT"])
+    assert users["alice"] == dict(login="alice", name="A", password="new")
+
+    # A different password should be updated
+    assert run_user(password="newer", **dict(args, name="A")) == (True, ["GET", "PUT"])
+    assert users["alice"]["password"] == "newer"
+
+    # Updates can be forced
+    assert run_user(
+        password="newer", force_password_update=True, **dict(args, name="A")
+    ) == (True, ["GET", "PUT"])
+
+    # Passwords should not have been stored in plain text
+    for name in os.listdir(state_dir):
+        with open(os.path.join(state_dir, name)) as f:
+            assert "newer" not in f.read()
+
+
+def test_password_state_create_delete(run_user, fetch_url, tmp_path):
+    users = {}
+    fetch_url.side_effect = fake_fetch_url(users)
+
+    state_dir = str(tmp_path / "state")
+    args = dict(login="bob", password="secret", password_state_dir=state_dir)
+
+    # Creating a user should record the password
+    assert run_user(**args) == (True, ["GET", "POST"])
+    assert len(os.listdir(state_dir)) == 1
+    assert run_user(**args) == (False, ["GET"])
+
+    # Deleting a user should forget the password
+    assert run_user(state="absent", **args) == (True, ["GET", "DELETE"])
+    assert os.listdir(state_dir) == []
+
+
+def test_password_state_store(module_utils_base, tmp_path):
+    from ansible_collections.release_engineering.pulp2_api.plugins.module_utils import (
+        password_state,
+    )
+
+    store = password_state.PasswordStateStore(str(tmp_path))
+    store.record("https://pulp1.example.com/pulp", "alice", "secret")
+
+    assert store.matches("https://pulp1.example.com/pulp/", "alice", "secret")
+
+    # It should not match for any other password, user or Pulp server
+    assert not store.matches("https://pulp1.example.com/pulp", "alice", "Secret")
+    assert not store.matches("https://pulp1.example.com/pulp", "bob", "secret")
+    assert not store.matches("https://pulp2.example.com/pulp", "alice", "secret")
@@ -0,0 +1,191 @@
+import io
+import json
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+class FakeFetchUrl:
+    # A fetch_url implementation holding users and their passwords.
+    def __init__(self, users, login_status=None):
+        self.users = users
+        self.login_status = login_status
+        self.requests = []
+
+    def __call__(self, module, url, method, **kwargs):
+        path = url[len("https://pulp.example.com/pulp/") :]
+        self.requests.append((method, path))
+
+        if path == "actions/login/":
+            # Logins must not use the module's own credentials.
+            assert module.params["client_cert"] is None
+            assert module.params["force_basic_auth"] == "yes"
+
+            user = self.users.get(module.params["url_username"])
+            ok = user and user["password"] == module.params["url_password"]
+            status = self.login_status or (200 if ok else 401)
+            return (io.BytesIO(b"{}"), {"status": status})
+
+        login = path.split("/")[1]
+        if method == "GET":
+            return (Response(**self.users[login]), {"status": 200})
+
+        self.users[login].update(json.loads(kwargs["data"])["delta"])
+        return (object(), {"status": 200})
+
+
+@pytest.fixture
+def run_module(set_module_params, fetch_url, out_reader):
+    def fn(module_class, **kwargs):
+        set_module_params(
+            pulp_url="https://pulp.example.com/pulp",
+            url_username="admin",
+            url_password="admin-password",
+            client_cert="/some/cert.pem",
+            **kwargs,
+        )
+
+        with pytest.raises(SystemExit) as excinfo:
+            module_class().run()
+
+        assert excinfo.value.code == 0
+        return out_reader()
+
+    return fn
+
+
+def test_verify_unchanged(pulp_user, run_module, fetch_url):
+    pulp = FakeFetchUrl({"alice": dict(login="alice", name="alice", password="secret")})
+    fetch_url.side_effect = pulp
+
+    result = run_module(
+        pulp_user.UserModule,
+        login="alice",
+        password="secret",
+        password_update_mode="verify",
+    )
+
+    # It should verify the password and not change anything
+    assert not result["changed"]
+    assert result["password_status"] == "verified"
+    assert pulp.requests == [("GET", "users/alice/"), ("POST", "actions/login/")]
+
+
+@pytest.mark.parametrize("login_status", [None, 500])
+def test_verify_changed(pulp_user, run_module, fetch_url, login_status):
+    pulp = FakeFetchUrl(
+        {"alice": dict(login="alice", name="alice", password="old")},
+        login_status=login_status,
+    )
+    fetch_url.side_effect = pulp
+
+    result = run_module(
+        pulp_user.UserModule,
+        login="alice",
+        password="secret",
+        password_update_mode="verify",
+    )
+
+    # It should update the password after failing to verify it
+    assert result["changed"]
+    assert result["password_status"] == "updated"
+    assert pulp.requests == [
+        ("GET", "users/alice/"),
+        ("POST", "actions/login/"),
+        ("PUT", "users/alice/"),
+    ]
+    assert pulp.users["alice"]["password"] == "secret"
+
+
+def test_verify_forced(pulp_user, run_module, fetch_url):
+    pulp = FakeFetchUrl({"alice": dict(login="alice", name="alice", password="secret")})
+    fetch_url.side_effect = pulp
+
+    result = run_module(
+        pulp_user.UserModule,
+        login="alice",
+        password="secret",
+        password_update_mode="verify",
+        force_password_update=True,
+    )
+
+    # It should update the password without verifying it
+    assert result["changed"]
+    assert result["password_status"] == "updated"
+    assert pulp.requests == [("GET", "users/alice/"), ("PUT", "users/alice/")]
+
+
+def test_verify_bulk(pulp_users, run_module, fetch_url):
+    pulp = FakeFetchUrl(
+        {
+            "alice": dict(login="alice", name="alice", password="secret"),
+            "bob": dict(login="bob", name="bob", password="old"),
+        }
+    )
+    fetch_url.side_effect = pulp
+
+    result = run_module(
+        pulp_users.UsersModule,
+        users=[
+            dict(login="alice", password="secret"),
+            dict(login="bob", password="secret"),
+        ],
+        password_update_mode="verify",
+        persistent_connections=False,
+    )
+
+    # It should tell us how each password was handled
+    assert [
+        (r["login"], r["changed"], r["password_status"]) for r in result["users"]
+    ] == [
+        ("alice", False, "verified"),
+        ("bob", True, "updated"),
+    ]
+
+    # Only the password which didn't work should have been written
+    assert [r for r in pulp.requests if r[0] == "PUT"] == [("PUT", "users/bob/")]
+
+
+def test_verify_pool(pulp_users, set_module_params, fake_pulp, out_reader):
+    fake_pulp.credentials = ("admin", "admin-password")
+    fake_pulp.state.add_user("alice", password="secret")
+    fake_pulp.state.add_user("bob", password="old")
+
+    set_module_params(
+        pulp_url=fake_pulp.url,
+        url_username="admin",
+        url_password="admin-password",
+        force_basic_auth=True,
+        users=[
+            dict(login="alice", password="secret"),
+            dict(login="bob", password="secret"),
+        ],
+        password_update_mode="verify",
+        timings=True,
+    )
+
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_users.UsersModule().run()
+
+    assert excinfo.value.code == 0
+    result = out_reader()
+
+    # It should have verified passwords by logging in as each user
+    assert [(r["login"], r["password_status"]) for r in result["users"]] == [
+        ("alice", "verified"),
+        ("bob", "updated"),
+    ]
+
+    # Logins should have been made through the connection pool, as for any
+    # other request, and included in timings
+    assert result["connection_stats"]["requests"] == len(fake_pulp.requests)
+    logins = [
+        r["status"]
+        for r in result["timings"]["requests"]
+        if r["path"] == "actions/login/"
+    ]
+    assert sorted(logins) == [200, 401]
@@ -0,0 +1,226 @@
+import io
+import json
+import secrets
+
+import pytest
+
+
+class Response(io.BytesIO):
+    def __init__(self, **kwargs):
+        super().__init__(json.dumps(kwargs).encode("utf8"))
+
+
+def fake_fetch_url(users, fail_urls=()):
+    # Returns a fetch_url implementation serving the given users.
+    # Since requests are made concurrently, responses are determined
+    # by URL rather than by the order of calls.
+    def fn(module, url, method, **kwargs):
+        if url in fail_urls:
+            return (io.BytesIO(b"error"), {"status": 500})
+
+        login = url.rstrip("/").split("/")[-1]
+        if method == "GET":
+            if login in users:
+                return (Response(**users[login]), {"status": 200})
+            return (object(), {"status": 404})
+        return (object(), {"status": 200})
+
+    return fn
+
+
+def sorted_calls(calls):
+    return sorted(calls, key=lambda call: (call["url"], call["method"]))
+
+
+def test_bulk_users(
+    pulp_users, set_module_params, fetch_url, fetch_url_calls, out_reader, monkeypatch
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        users=[
+            dict(login="new-user"),
+            dict(login="renamed-user", name="new name"),
+            dict(login="old-user", state="absent"),
+            dict(login="ok-user", name="ok"),
+        ],
+        max_workers=2,
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {
+            "renamed-user": dict(login="renamed-user", name="old name"),
+            "old-user": dict(login="old-user", name="old-user"),
+            "ok-user": dict(login="ok-user", name="ok"),
+        }
+    )
+
+    monkeypatch.setattr(secrets, "token_urlsafe", lambda _: "super-strong-password")
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_users.UsersModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should tell us it made changes
+    result = out_reader()
+    assert result["changed"]
+
+    # It should tell us the outcome per user, in the same order as input
+    assert [(u["login"], u["changed"], u["failed"]) for u in result["users"]] == [
+        ("new-user", True, False),
+        ("renamed-user", True, False),
+        ("old-user", True, False),
+        ("ok-user", False, False),
+    ]
+
+    # It should have made the same requests as pulp_user would have
+    assert sorted_calls(fetch_url_calls()) == [
+        {
+            "data": {
+                "login": "new-user",
+                "name": "new-user",
+                "password": "super-strong-password",
+            },
+            "headers": {"Content-Type": "application/json"},
+            "method": "POST",
+            "url": "https://pulp.example.com/pulp/users/",
+        },
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/new-user/"},
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/ok-user/"},
+        {"method": "DELETE", "url": "https://pulp.example.com/pulp/users/old-user/"},
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/old-user/"},
+        {
+            "method": "GET",
+            "url": "https://pulp.example.com/pulp/users/renamed-user/",
+        },
+        {
+            "data": {"delta": {"name": "new name"}},
+            "headers": {"Content-Type": "application/json"},
+            "method": "PUT",
+            "url": "https://pulp.example.com/pulp/users/renamed-user/",
+        },
+    ]
+
+
+def test_bulk_users_check(
+    pulp_users, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        users=[dict(login="new-user"), dict(login="ok-user")],
+        _ansible_check_mode=True,
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {"ok-user": dict(login="ok-user", name="ok-user")}
+    )
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_users.UsersModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should tell us which users would be changed
+    result = out_reader()
+    assert result["changed"]
+    assert result["users"] == [
+        {
+            "login": "new-user",
+            "changed": True,
+            "failed": False,
+            "msg": "would create user (check mode)",
+        },
+        {"login": "ok-user", "changed": False, "failed": False, "msg": ""},
+    ]
+
+    # It should only have done GETs
+    assert set(call["method"] for call in fetch_url_calls()) == {"GET"}
+
+
+def test_bulk_users_failures(
+    pulp_users, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        users=[
+            dict(login="broken-user", name="x"),
+            dict(login="renamed-user", name="new name"),
+        ],
+    )
+
+    fetch_url.side_effect = fake_fetch_url(
+        {"renamed-user": dict(login="renamed-user", name="old name")},
+        fail_urls=["https://pulp.example.com/pulp/users/broken-user/"],
+    )
+
+    # It should run, unsuccessfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_users.UsersModule().run()
+
+    assert excinfo.value.code == 1
+
+    result = out_reader()
+
+    # It should tell us that one user failed
+    assert result["msg"] == "1 of 2 users failed"
+
+    # Other users should still have been processed
+    assert result["changed"]
+    assert result["users"] == [
+        {
+            "login": "broken-user",
+            "changed": False,
+            "failed": True,
+            "msg": "unexpected status 500 from URL "
+            "https://pulp.example.com/pulp/users/broken-user/",
+        },
+        {"login": "renamed-user", "changed": True, "failed": False, "msg": ""},
+    ]
+
+
+def test_bulk_users_snapshot(
+    pulp_users, set_module_params, fetch_url, fetch_url_calls, out_reader
+):
+    # With many users, state is fetched via a single request.
+    set_module_params(
+        pulp_url="https://pulp.example.com/pulp",
+        persistent_connections=False,
+        users=[dict(login=f"user-{i}", name=f"user {i}") for i in range(30)],
+    )
+
+    # Half of the users exist with correct name, the others don't exist
+    existing = [dict(login=f"user-{i}", name=f"user {i}") for i in range(0, 30, 2)]
+
+    def fn(module, url, method, **kwargs):
+        if method == "GET":
+            return (io.BytesIO(json.dumps(existing).encode()), {"status": 200})
+        return (object(), {"status": 201})
+
+    fetch_url.side_effect = fn
+
+    # It should run, successfully
+    with pytest.raises(SystemExit) as excinfo:
+        pulp_users.UsersModule().run()
+
+    assert excinfo.value.code == 0
+
+    # It should have created the missing users
+    result = out_reader()
+    assert [u["changed"] for u in result["users"]] == [False, True] * 15
+
+    calls = fetch_url_calls()
+
+    # It should have fetched all users at once...
+    assert [c for c in calls if c["method"] == "GET"] == [
+        {"method": "GET", "url": "https://pulp.example.com/pulp/users/"}
+    ]
+
+    # ...and then only created the missing users
+    assert sorted(c["data"]["login"] for c in calls if c["method"] == "POST") == (
+        sorted(f"user-{i}" for i in range(1, 30, 2))
+    )
@@ -0,0 +1,51 @@
+import pytest
+
+
+def run_module(module_class):
+    with pytest.raises(SystemExit) as excinfo:
+        module_class().run()
+    assert excinfo.value.code == 0
+
+
+def reads(module_class):
+    # Budget of GET requests: one per user, until there are enough users for
+    # all of them to be loaded at once.
+    return lambda n: 1 if n >= module_class.SNAPSHOT_THRESHOLD else n
+
+
+@pytest.mark.parametrize("size", [1, 10, 100, 500])
+def test_noop_budget(
+    pulp_users, set_module_params, fake_pulp, request_budget, out_reader, size
+):
+    users = [dict(login=f"user-{i}", name=f"User {i}") for i in range(size)]
+    for user in users:
+        fake_pulp.state.add_user(user["login"], name=user["name"])
+
+    set_module_params(pulp_url=fake_pulp.url, users=users)
+    run_module(pulp_users.UsersModule)
+
+    assert not out_reader()["changed"]
+
+    # Nothing should be written
+    request_budget.check(size, GET=reads(pulp_users.UsersModule))
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_update_budget(
+    pulp_users, set_module_params, fake_pulp, request_budget, out_reader, size
+):
+    for i in range(size):
+        fake_pulp.state.add_user(f"user-{i}", name="old name")
+
+    users = [dict(login=f"user-{i}", name="new name") for i in range(size)]
+    users.append(dict(login="new-user"))
+
+    set_module_params(pulp_url=fake_pulp.url, users=users)
+    run_module(pulp_users.UsersModule)
+
+    assert out_reader()["changed"]
+
+    # One write per changed user
+    request_budget.check(
+        len(users), GET=reads(pulp_users.UsersModule), PUT=lambda n: n - 1, POST=1
+    )
@@ -6,6 +6,9 @@ def test_can_import():
         base_options,
     )
     from ansible_collections.release_engineering.pulp2_api.plugins.modules import (
+        pulp_facts,
         pulp_role,
+        pulp_roles,
         pulp_user,
+        pulp_users,
     )